@@ -0,0 +1,498 @@
+import os
+import json
+import time
+import uuid
+import wave
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+from cancellation import run_cancellable
+from transcript_cache import transcription_options
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".videotranscriber", "fingerprints")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    fingerprint BLOB NOT NULL,
+    options TEXT,
+    source TEXT,
+    output_file TEXT,
+    transcript_hash TEXT,
+    groq_result TEXT,
+    notion_url TEXT,
+    duration REAL,
+    created REAL
+);
+CREATE TABLE IF NOT EXISTS transcripts (
+    hash TEXT PRIMARY KEY,
+    transcription TEXT NOT NULL
+);
+"""
+
+# Extracted audio is 16 kHz mono 16-bit PCM, read in blocks of this many samples
+EXTRACT_RATE = 16000
+READ_FRAMES = EXTRACT_RATE * 30
+# Low-pass filter applied before keeping every second sample
+DECIMATION_TAPS = 63
+DECIMATION_CUTOFF = 3600.0
+
+# Fingerprints are computed on 8 kHz mono audio: 256 ms frames every 32 ms
+FINGERPRINT_RATE = 8000
+FRAME_SIZE = 2048
+HOP_SIZE = 256
+FRAMES_PER_SECOND = FINGERPRINT_RATE / HOP_SIZE
+
+# 33 log-spaced bands between 300 Hz and 2 kHz give 32 bits per frame
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+NUM_BANDS = 33
+
+# Frames processed per FFT block (keeps memory flat for long recordings)
+BLOCK_FRAMES = 1024
+
+# Frames quieter than this (relative to a full-scale sine) carry no fingerprint
+SILENCE_DB = -55.0
+# Sub-fingerprint of a silent frame; such frames are left out of comparisons
+SILENT = 0
+
+# Two fingerprints match when at most 35% of the overlapping bits differ
+DEFAULT_THRESHOLD = 0.65
+# ...and the overlap covers most of the shorter clip (reposts are often trimmed)
+MIN_OVERLAP = 0.6
+# ...and at least this many non-silent frames (about 3 seconds) line up
+MIN_VOICED_FRAMES = int(3 * FRAMES_PER_SECOND)
+
+def _band_edges():
+    """FFT bin index where each band starts (plus the end of the last band)"""
+    edges_hz = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+    return np.round(edges_hz * FRAME_SIZE / FINGERPRINT_RATE).astype(np.int64)
+
+def _silence_floor():
+    """Band energy of a frame at SILENCE_DB (a full-scale sine gives (FRAME_SIZE / 4)^2)"""
+    return (FRAME_SIZE / 4.0) ** 2 * 10 ** (SILENCE_DB / 10.0)
+
+def compute_fingerprint(samples):
+    """
+    Compute a compact fingerprint of 8 kHz mono audio
+    
+    Each 32 ms step yields one 32-bit sub-fingerprint: bit m is set when the
+    energy difference between bands m and m+1 grows from the previous frame.
+    Energy differences survive re-encoding, bitrate changes and volume changes.
+    Steps next to a frame below SILENCE_DB are set to SILENT, since silence
+    looks the same in every clip.
+    
+    Parameters:
+        samples (numpy.ndarray): float32 samples at FINGERPRINT_RATE
+    
+    Returns:
+        numpy.ndarray: uint32 sub-fingerprints, one per frame
+    """
+    if len(samples) < FRAME_SIZE + HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+    
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    edges = _band_edges()
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    
+    energies = []
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES] * window
+        spectrum = np.abs(np.fft.rfft(block, axis=1)) ** 2
+        band_energy = np.add.reduceat(spectrum[:, edges[0]:edges[-1]], edges[:-1] - edges[0], axis=1)
+        energies.append(band_energy)
+    
+    energy = np.concatenate(energies)
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    
+    weights = (np.uint32(1) << np.arange(32, dtype=np.uint32))
+    fingerprint = (bits.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint64).astype(np.uint32)
+    
+    loud = energy.sum(axis=1) >= _silence_floor()
+    fingerprint[~(loud[1:] & loud[:-1])] = SILENT
+    return fingerprint
+
+def voiced_frames(fingerprint):
+    """Number of non-silent frames in a fingerprint"""
+    return int(np.count_nonzero(fingerprint != SILENT))
+
+def match_options(model_name, language, word_timestamps, refine_model_name=None, translate=False):
+    """Transcription settings a reposted clip must share to reuse the earlier transcript"""
+    return dict(transcription_options(model_name, language, word_timestamps, refine_model_name, translate),
+                model=model_name)
+
+def options_key(options):
+    """Canonical JSON of match_options(), so equal settings compare equal"""
+    return json.dumps(options, sort_keys=True) if options is not None else None
+
+def _decimation_filter():
+    """Hamming-windowed sinc low-pass for going from EXTRACT_RATE to FINGERPRINT_RATE"""
+    n = np.arange(DECIMATION_TAPS) - (DECIMATION_TAPS - 1) / 2.0
+    cutoff = DECIMATION_CUTOFF / EXTRACT_RATE
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(DECIMATION_TAPS)
+    return (taps / taps.sum()).astype(np.float32)
+
+def read_extracted_audio(audio_file, cancel_token=None):
+    """
+    Read 16 kHz mono 16-bit WAV audio (as written by audio extraction) at FINGERPRINT_RATE
+    
+    Returns:
+        numpy.ndarray: float32 samples, or None if the file has another format
+    """
+    try:
+        audio = wave.open(audio_file, "rb")
+    except (wave.Error, EOFError):
+        return None
+    
+    with audio:
+        if (audio.getnchannels(), audio.getsampwidth(), audio.getframerate()) != (1, 2, EXTRACT_RATE):
+            return None
+        
+        # Filter block by block, carrying the filter's history across blocks
+        taps = _decimation_filter()
+        history = np.zeros(DECIMATION_TAPS - 1, dtype=np.float32)
+        blocks = []
+        while True:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            data = audio.readframes(READ_FRAMES)
+            if not data:
+                break
+            samples = np.concatenate([history, np.frombuffer(data, "<i2").astype(np.float32) / 32768.0])
+            blocks.append(np.convolve(samples, taps, mode="valid")[::2])
+            history = samples[len(samples) - len(history):]
+    
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+def fingerprint_audio_file(audio_file, cancel_token=None):
+    """Fingerprint extracted audio (other formats are decoded to 8 kHz mono with ffmpeg)"""
+    samples = read_extracted_audio(audio_file, cancel_token)
+    if samples is None:
+        result = run_cancellable([
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_file,
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(FINGERPRINT_RATE), "-"
+        ], cancel_token)
+        samples = np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+    return compute_fingerprint(samples)
+
+def _bit_errors(a, b):
+    """Number of differing bits between two equal-length uint32 arrays"""
+    return int(np.unpackbits(np.bitwise_xor(a, b).view(np.uint8)).sum())
+
+def similarity(stored, query, offset):
+    """
+    Fraction of matching bits where query frame j lines up with stored frame j + offset
+    
+    Frames silent in both clips are skipped; a frame silent in only one of
+    them compares like unrelated audio.
+    
+    Returns:
+        tuple: (similarity 0..1, number of overlapping non-silent frames)
+    """
+    a = stored[max(0, offset):]
+    b = query[max(0, -offset):]
+    n = min(len(a), len(b))
+    voiced = (a[:n] != SILENT) | (b[:n] != SILENT)
+    count = int(np.count_nonzero(voiced))
+    if count == 0:
+        return 0.0, 0
+    return 1.0 - _bit_errors(a[:n][voiced], b[:n][voiced]) / (32.0 * count), count
+
+class FingerprintIndex:
+    """
+    Local index of audio fingerprints for clips that were already processed.
+    
+    Records (fingerprint, Groq summary, Notion page link and the transcription
+    options used) live in an SQLite database (fingerprints.db), with each
+    distinct transcript stored once and referenced by its hash. Every change
+    is a single-row write, so several processes can add clips at once. Lookups
+    use an in-memory inverted index of sub-fingerprint values to find
+    candidate alignments, then confirm them with the bit error rate over the
+    overlapping non-silent frames, so trimmed or re-encoded reposts still
+    match while clips that only share silence don't. Clips added by other
+    processes are picked up before each lookup.
+    """
+    def __init__(self, index_dir=None, threshold=DEFAULT_THRESHOLD):
+        self.index_dir = index_dir or INDEX_DIR
+        self.threshold = threshold
+        os.makedirs(self.index_dir, exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+        
+        self.fingerprints = {}
+        self.voiced = {}
+        self.options = {}
+        self.lookup = {}
+        self.last_seq = 0
+        self._import_json_index()
+        with self.lock:
+            self._refresh()
+    
+    @property
+    def db_file(self):
+        return os.path.join(self.index_dir, "fingerprints.db")
+    
+    def _import_json_index(self):
+        """Move records of the earlier index.json format (one .npy file per clip) into the database"""
+        index_file = os.path.join(self.index_dir, "index.json")
+        try:
+            with open(index_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        for entry_id, record in records.items():
+            fingerprint_file = os.path.join(self.index_dir, f"{entry_id}.npy")
+            try:
+                fingerprint = np.load(fingerprint_file)
+            except (OSError, ValueError):
+                continue
+            self._insert(entry_id, fingerprint, record.get("transcription"), record.get("source"),
+                         record.get("output_file"), record.get("groq_result"), record.get("notion_url"),
+                         record.get("options"), record.get("created"))
+        
+        for path in [index_file] + [os.path.join(self.index_dir, f"{entry_id}.npy") for entry_id in records]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def _insert(self, entry_id, fingerprint, transcription, source, output_file, groq_result, notion_url,
+                options, created=None):
+        transcript = json.dumps(transcription, ensure_ascii=False, sort_keys=True)
+        transcript_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+        fingerprint = np.ascontiguousarray(fingerprint, dtype=np.uint32)
+        
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO transcripts (hash, transcription) VALUES (?, ?)",
+                (transcript_hash, transcript)
+            )
+            self.connection.execute(
+                "INSERT OR IGNORE INTO clips (id, fingerprint, options, source, output_file, transcript_hash, "
+                "groq_result, notion_url, duration, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, fingerprint.tobytes(), options_key(options), source, output_file, transcript_hash,
+                 json.dumps(groq_result) if groq_result is not None else None, notion_url,
+                 len(fingerprint) / FRAMES_PER_SECOND, created or time.time())
+            )
+    
+    def _refresh(self):
+        """Load the fingerprints of clips added since the last lookup (call with the lock held)"""
+        rows = self.connection.execute(
+            "SELECT seq, id, fingerprint, options FROM clips WHERE seq > ? ORDER BY seq", (self.last_seq,)
+        ).fetchall()
+        for row in rows:
+            self.options[row["id"]] = row["options"]
+            self._add_to_lookup(row["id"], np.frombuffer(row["fingerprint"], dtype=np.uint32))
+            self.last_seq = row["seq"]
+    
+    def _add_to_lookup(self, entry_id, fingerprint):
+        self.fingerprints[entry_id] = fingerprint
+        self.voiced[entry_id] = voiced_frames(fingerprint)
+        for frame, value in enumerate(fingerprint.tolist()):
+            if value != SILENT:
+                self.lookup.setdefault(value, []).append((entry_id, frame))
+    
+    def _forget(self, entry_id):
+        """Drop a clip from the in-memory index (call with the lock held)"""
+        if self.fingerprints.pop(entry_id, None) is None:
+            return
+        self.options.pop(entry_id, None)
+        
+        # Rebuild the inverted index without the removed clip
+        fingerprints = self.fingerprints
+        self.fingerprints = {}
+        self.voiced = {}
+        self.lookup = {}
+        for other_id, fingerprint in fingerprints.items():
+            self._add_to_lookup(other_id, fingerprint)
+    
+    def _record(self, entry_id):
+        """Stored record of a clip, with its transcript, or None (call with the lock held)"""
+        row = self.connection.execute(
+            "SELECT c.*, t.transcription FROM clips c LEFT JOIN transcripts t ON t.hash = c.transcript_hash "
+            "WHERE c.id = ?", (entry_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        record = {key: row[key] for key in ("source", "output_file", "notion_url", "duration", "created")}
+        for key in ("transcription", "groq_result", "options"):
+            record[key] = json.loads(row[key]) if row[key] is not None else None
+        return record
+    
+    def find(self, fingerprint, options=None):
+        """
+        Find a previously processed clip with the same audio
+        
+        Parameters:
+            fingerprint (numpy.ndarray): Fingerprint of the new clip
+            options (dict, optional): match_options() of the new clip; only records
+                transcribed with the same options match
+        
+        Returns:
+            dict: The matching record with "id" and "similarity" added, or None
+        """
+        query_voiced = voiced_frames(fingerprint)
+        if query_voiced < MIN_VOICED_FRAMES:
+            return None
+        
+        with self.lock:
+            self._refresh()
+            
+            # Vote for (clip, offset) alignments using exactly matching sub-fingerprints
+            votes = {}
+            for frame, value in enumerate(fingerprint.tolist()):
+                if value == SILENT:
+                    continue
+                for entry_id, stored_frame in self.lookup.get(value, ()):
+                    key = (entry_id, stored_frame - frame)
+                    votes[key] = votes.get(key, 0) + 1
+            
+            candidates = [key for key, _ in sorted(votes.items(), key=lambda item: -item[1])[:10]]
+            
+            # Heavily degraded copies may share no exact sub-fingerprint; compare
+            # clips of similar length directly around the zero offset
+            for entry_id, stored in self.fingerprints.items():
+                if abs(len(stored) - len(fingerprint)) <= 0.1 * max(len(stored), len(fingerprint)):
+                    candidates.extend((entry_id, offset) for offset in range(-3, 4))
+            
+            wanted_options = options_key(options)
+            best = None
+            for entry_id, offset in candidates:
+                if options is not None and self.options[entry_id] != wanted_options:
+                    continue
+                stored = self.fingerprints[entry_id]
+                score, overlap = similarity(stored, fingerprint, offset)
+                if overlap < max(MIN_VOICED_FRAMES, MIN_OVERLAP * min(self.voiced[entry_id], query_voiced)):
+                    continue
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (entry_id, score)
+            
+            if best is None:
+                return None
+            
+            record = self._record(best[0])
+            if record is None:
+                # Removed by another process since it was loaded
+                self._forget(best[0])
+                return None
+            record["id"] = best[0]
+            record["similarity"] = best[1]
+            return record
+    
+    def add(self, fingerprint, transcription, source=None, output_file=None, groq_result=None, notion_url=None,
+            options=None):
+        """
+        Store a processed clip
+        
+        Returns:
+            str: Id of the new record
+        """
+        entry_id = uuid.uuid4().hex
+        self._insert(entry_id, fingerprint, transcription, source, output_file, groq_result, notion_url, options)
+        return entry_id
+    
+    def update(self, entry_id, groq_result=None, notion_url=None):
+        """Fill in a Groq summary or Notion link created after the clip was added"""
+        with self.lock, self.connection:
+            if groq_result is not None:
+                self.connection.execute(
+                    "UPDATE clips SET groq_result = ? WHERE id = ?", (json.dumps(groq_result), entry_id)
+                )
+            if notion_url is not None:
+                self.connection.execute("UPDATE clips SET notion_url = ? WHERE id = ?", (notion_url, entry_id))
+    
+    def remove(self, entry_id):
+        """Forget a clip so its reposts are transcribed again"""
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT transcript_hash FROM clips WHERE id = ?", (entry_id,)
+            ).fetchone()
+            self.connection.execute("DELETE FROM clips WHERE id = ?", (entry_id,))
+            if row is not None:
+                # Keep the transcript while another clip still refers to it
+                self.connection.execute(
+                    "DELETE FROM transcripts WHERE hash = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM clips WHERE transcript_hash = ?)",
+                    (row["transcript_hash"], row["transcript_hash"])
+                )
+            self._forget(entry_id)
+
+def find_reposted_audio(audio_file, cancel_token=None, log=None, options=None):
+    """
+    Fingerprint extracted audio and look it up in the shared index
+    
+    options (see match_options) restricts matches to clips transcribed with
+    the same model, language and timestamp settings.
+    
+    Returns:
+        tuple: (fingerprint or None, matching record or None)
+    """
+    try:
+        fingerprint = fingerprint_audio_file(audio_file, cancel_token)
+    except Exception as e:
+        if log:
+            log(f"Could not fingerprint audio: {str(e)}")
+        return None, None
+    
+    match = get_fingerprint_index().find(fingerprint, options)
+    if match and log:
+        log(f"Near-duplicate of {os.path.basename(match.get('source') or 'an earlier clip')} "
+            f"({match['similarity']:.0%} match) - reusing its transcript")
+    return fingerprint, match
+
+def remember_processed_audio(fingerprint, duplicate, source, transcription, groq_result=None,
+                             notion_url=None, output_file=None, options=None):
+    """
+    Record a processed clip, or fill in what a matched record was missing
+    
+    Returns:
+        str: Id of the new or matched record, or None without a fingerprint
+    """
+    if fingerprint is None:
+        return None
+    
+    index = get_fingerprint_index()
+    
+    if duplicate:
+        fields = {}
+        if groq_result and not duplicate.get("groq_result"):
+            fields["groq_result"] = groq_result
+        if notion_url and not duplicate.get("notion_url"):
+            fields["notion_url"] = notion_url
+        if fields:
+            index.update(duplicate["id"], **fields)
+        return duplicate["id"]
+    
+    return index.add(
+        fingerprint,
+        source=source,
+        output_file=output_file,
+        transcription=transcription,
+        groq_result=groq_result,
+        notion_url=notion_url,
+        options=options
+    )
+
+# Shared by every batch runner in this process
+_index = None
+_index_lock = threading.Lock()
+
+def get_fingerprint_index():
+    """Process-wide FingerprintIndex"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex()
+        return _index
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+
+from resource_governor import get_governor, media_duration
+
+TUNING_FILE = os.path.join(os.path.expanduser("~"), ".videotranscriber", "tuning.json")
+
+# Audio taken from each sample - long enough for several decoding windows
+CALIBRATION_SECONDS = 30.0
+
+# Sample files used (the first ones given)
+CALIBRATION_CLIPS = 3
+
+# ffmpeg -threads values tried for audio extraction (0 lets ffmpeg decide)
+FFMPEG_THREAD_CHOICES = (1, 2, 4, 0)
+
+# A configuration with more workers must be this much faster to be preferred (it costs memory)
+MIN_IMPROVEMENT = 0.05
+
+def load_tuning(tuning_file=TUNING_FILE):
+    """Every saved configuration, keyed by "model/device" """
+    try:
+        with open(tuning_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def tuned_settings(model_name, device, tuning_file=TUNING_FILE):
+    """
+    Configuration saved by the last calibration of this model and device
+    
+    Returns:
+        dict: workers, torch_threads, ffmpeg_threads and audio_per_second, or None if not calibrated
+    """
+    return load_tuning(tuning_file).get(f"{model_name}/{device}")
+
+def save_tuning(model_name, device, settings, tuning_file=TUNING_FILE):
+    """Store a configuration for this model and device (other entries are kept)"""
+    tuning = load_tuning(tuning_file)
+    tuning[f"{model_name}/{device}"] = settings
+    
+    os.makedirs(os.path.dirname(tuning_file), exist_ok=True)
+    temp_file = tuning_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, indent=2)
+    os.replace(temp_file, tuning_file)
+
+def set_torch_threads(threads):
+    """Use this many CPU threads for torch in the calling thread (ignored if not tuned)"""
+    if threads:
+        import torch
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+def ffmpeg_thread_args(settings):
+    """ffmpeg input options for the tuned thread count ([] if not tuned)"""
+    if not settings or settings.get("ffmpeg_threads") is None:
+        return []
+    return ["-threads", str(settings["ffmpeg_threads"])]
+
+def candidate_configs(cores, device="cpu", max_workers=None):
+    """
+    (workers, torch threads per worker) pairs to measure, using every core
+    
+    On a GPU the model runs on the device, so at most two workers are tried.
+    """
+    limit = max_workers or (2 if device == "cuda" else cores)
+    candidates = []
+    workers = 1
+    while workers <= min(limit, cores):
+        candidates.append((workers, max(1, cores // workers)))
+        workers *= 2
+    return candidates
+
+def extract_clip(media_file, audio_file, seconds, threads):
+    """
+    Extract the first seconds of audio like the batch does, with ffmpeg -threads
+    
+    Returns:
+        float: Seconds ffmpeg took
+    """
+    start_time = time.time()
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", str(threads), "-i", media_file,
+        "-t", f"{seconds:.2f}", "-q:a", "0", "-map", "a", audio_file, "-y"
+    ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return time.time() - start_time
+
+def calibrate(sample_files, model_name="base", language=None, max_workers=None,
+              seconds=CALIBRATION_SECONDS, log=print):
+    """
+    Measure worker count, torch threads and ffmpeg threads on sample audio and save the fastest
+    
+    Each configuration runs `workers` threads with their own model copy,
+    every one transcribing all sample clips at once, and is scored by audio
+    seconds transcribed per wall-clock second. Configurations whose models
+    don't fit in memory are skipped.
+    
+    Parameters:
+        sample_files (list): Local audio or video files to take the clips from
+        model_name (str): Whisper model to tune for
+        language (str, optional): Language code (skips language detection like real runs with a language)
+        max_workers (int, optional): Largest worker count to try
+        seconds (float): Audio taken from each sample
+        log (function): Writes one progress line
+    
+    Returns:
+        dict: The saved configuration plus "model", "device" and every measured "results" entry
+    
+    Raises:
+        ValueError: If no usable sample audio was found
+    """
+    import torch
+    import whisper
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    cores = os.cpu_count() or 1
+    default_threads = torch.get_num_threads()
+    temp_dir = tempfile.mkdtemp(prefix="videotranscriber-tune-")
+    models = []
+    reservations = []
+    
+    try:
+        # ffmpeg: extract the same clips with each thread setting
+        clips = []
+        ffmpeg_times = {}
+        for threads in FFMPEG_THREAD_CHOICES:
+            elapsed = 0.0
+            for index, sample_file in enumerate(sample_files[:CALIBRATION_CLIPS]):
+                audio_file = os.path.join(temp_dir, f"{index}.wav")
+                try:
+                    elapsed += extract_clip(sample_file, audio_file, seconds, threads)
+                except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                    log(f"Skipping {os.path.basename(sample_file)}: no audio could be extracted ({str(e)})")
+                    continue
+                if audio_file not in clips:
+                    clips.append(audio_file)
+            ffmpeg_times[threads] = elapsed
+            log(f"ffmpeg -threads {threads}: {elapsed:.2f}s for {len(clips)} clips")
+        
+        if not clips:
+            raise ValueError("None of the sample files has an audio track")
+        ffmpeg_threads = min(ffmpeg_times, key=lambda threads: ffmpeg_times[threads])
+        audio_seconds = sum(media_duration(clip) or 0.0 for clip in clips)
+        
+        transcribe_options = {"task": "transcribe", "verbose": None, "fp16": device == "cuda"}
+        if language:
+            transcribe_options["language"] = language
+        
+        results = []
+        for workers, threads in candidate_configs(cores, device, max_workers):
+            # One model copy per worker, as in a tuned batch
+            while len(models) < workers:
+                reservation = get_governor().try_acquire("calibration", model_name, seconds)
+                if reservation is None:
+                    break
+                reservations.append(reservation)
+                log(f"Loading Whisper {model_name} model {len(models) + 1} on {device}...")
+                model = whisper.load_model(model_name, device=device)
+                # Warm-up run so one-time initialization isn't measured
+                model.transcribe(clips[0], **transcribe_options)
+                models.append(model)
+            if len(models) < workers:
+                log(f"Skipping {workers} workers: {workers} {model_name} models don't fit in memory")
+                break
+            
+            barrier = threading.Barrier(workers + 1)
+            errors = []
+            
+            def work(model):
+                set_torch_threads(threads)
+                barrier.wait()
+                try:
+                    for clip in clips:
+                        model.transcribe(clip, **transcribe_options)
+                except Exception as e:
+                    errors.append(e)
+            
+            set_torch_threads(threads)
+            threads_list = [threading.Thread(target=work, args=(models[index],), daemon=True)
+                            for index in range(workers)]
+            for thread in threads_list:
+                thread.start()
+            barrier.wait()
+            start_time = time.time()
+            for thread in threads_list:
+                thread.join()
+            elapsed = time.time() - start_time
+            
+            if errors:
+                log(f"{workers} workers x {threads} threads failed: {str(errors[0])}")
+                continue
+            
+            audio_per_second = workers * audio_seconds / elapsed if elapsed > 0 else 0.0
+            results.append({"workers": workers, "torch_threads": threads, "audio_per_second": audio_per_second})
+            log(f"{workers} workers x {threads} threads: {audio_per_second:.1f} seconds of audio per second")
+        
+        if not results:
+            raise ValueError("No configuration could be measured")
+        
+        # Fewer workers unless more of them are clearly faster
+        best = results[0]
+        for result in results[1:]:
+            if result["audio_per_second"] > best["audio_per_second"] * (1 + MIN_IMPROVEMENT):
+                best = result
+        
+        settings = {
+            "workers": best["workers"],
+            "torch_threads": best["torch_threads"],
+            "ffmpeg_threads": ffmpeg_threads,
+            "audio_per_second": round(best["audio_per_second"], 2),
+            "cores": cores,
+            "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        save_tuning(model_name, device, settings)
+        return dict(settings, model=model_name, device=device, results=results)
+    finally:
+        models.clear()
+        for reservation in reservations:
+            reservation.release()
+        torch.set_num_threads(default_threads)
+        shutil.rmtree(temp_dir, ignore_errors=True)
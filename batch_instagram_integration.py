@@ -5,55 +5,146 @@ import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+from cancellation import CancellationToken, TranscriptionCancelled
+from multitask_transcription import write_translation, summary_input_text
+from audio_fingerprint import find_reposted_audio, remember_processed_audio, match_options
+from transcript_dedup import TranscriptIndex
+from speech_triage import triage_audio, no_speech_transcription
+from job_queue import get_job_queue, state_reached, urls_source
+from job_manager import get_job_manager, PRIORITY_BATCH, RUNNING, DONE, FAILED, CANCELLED
+
 def update_instagram_progress(gui_instance, value, status_text):
     """Update progress bar and status text for Instagram download"""
     gui_instance.root.after(0, lambda: gui_instance.instagram_progress.set(value))
     gui_instance.root.after(0, lambda: gui_instance.instagram_status.set(status_text))
 
-def transcribe_instagram_video(gui_instance, video_path, output_file):
+def transcribe_instagram_video(gui_instance, video_path, output_file, job_key=None, cancel_token=None,
+                               transcript_index=None, log=None, update_progress=None, resident_models=None):
     """
     Transcribe an Instagram video in the batch processing flow
     with improved error handling for Groq processing
+    
+    job_key is the URL's item in the batch job queue; stages it already
+    finished before an interruption are not run again.
+    
+    The cancellation token, transcript index and log default to the
+    Instagram batch's; other flows (saved posts) pass their own, along with
+    update_progress(value, status) and the resident_models dict that keeps
+    the Whisper model loaded between their videos.
     """
-    # Check if we need to switch behavior for batch mode
-    original_is_transcribing = gui_instance.is_transcribing
+    # Batch cancellation token (kills ffmpeg and stops Whisper mid-file)
+    if cancel_token is None:
+        cancel_token = getattr(gui_instance, 'instagram_cancel_token', None)
     
-    # Start transcription in the same thread for batch processing
-    gui_instance.is_transcribing = True
-    gui_instance.video_path.set(video_path)
-    gui_instance.output_path.set(output_file)
+    # Transcripts seen earlier in this batch, for reusing near-duplicate summaries
+    if transcript_index is None:
+        transcript_index = getattr(gui_instance, 'instagram_transcript_index', None)
+    
+    log = log or gui_instance.update_batch_log
+    if update_progress is None:
+        update_progress = lambda value, status: update_instagram_batch_progress(
+            gui_instance, value, status, job_key or video_path)
+    
+    # Results saved in the job queue before the batch was interrupted
+    job_queue = get_job_queue()
+    batch_id = getattr(gui_instance, 'instagram_job_batch', None) if job_key else None
+    item = job_queue.get_item(batch_id, job_key) if batch_id else None
+    restored = None
+    saved_groq = None
+    if item and state_reached(item['state'], 'transcribed'):
+        restored = item['data'].get('transcription')
+    if item and state_reached(item['state'], 'summarized'):
+        saved_groq = (True, item['data']['groq_result']) if item['data'].get('groq_result') \
+            else (False, item['data'].get('groq_error'))
     
     # Create audio file name
     audio_file = os.path.splitext(video_path)[0] + ".wav"
     
-    # Extract audio from video
-    if gui_instance.extract_audio_with_ffmpeg(video_path, audio_file):
+    # Extract audio from video (not needed when the transcript was saved)
+    if restored or gui_instance.extract_audio_with_ffmpeg(video_path, audio_file, cancel_token):
+        # Recognise reposts of a clip that was already processed with the same settings
+        fingerprint = None
+        duplicate = None
+        repost_options = match_options(
+            gui_instance.model_var.get(),
+            gui_instance.language_var.get() if gui_instance.language_var.get() != "None" else None,
+            gui_instance.word_timestamps_var.get(),
+            gui_instance.refine_model_var.get(),
+            gui_instance.translate_var.get()
+        )
+        if not restored and getattr(gui_instance, 'dedup_reposts_var', None) and gui_instance.dedup_reposts_var.get():
+            fingerprint, duplicate = find_reposted_audio(audio_file, cancel_token, log, repost_options)
+        
+        # Sample a few seconds to skip music-only and ambient clips before Whisper
+        # (no model is resident between clips here, so only the audio features are used)
+        speech_check = None
+        if not duplicate and not restored and getattr(gui_instance, 'skip_no_speech_var', None) and gui_instance.skip_no_speech_var.get():
+            speech_check = triage_audio(audio_file, cancel_token=cancel_token)
+        
         # Transcribe the audio
-        transcription = gui_instance.transcribe_with_whisper(audio_file, 
-                                                        gui_instance.model_var.get(),
-                                                        gui_instance.language_var.get() if gui_instance.language_var.get() != "None" else None,
-                                                        gui_instance.word_timestamps_var.get())
+        if restored:
+            log("Resuming with the transcript saved before the interruption")
+            transcription = restored
+        elif duplicate:
+            transcription = dict(duplicate['transcription'])
+        elif speech_check and not speech_check['speech']:
+            log(f"No speech detected ({speech_check['reason']}) - skipping Whisper, Groq and Notion")
+            transcription = no_speech_transcription(speech_check['duration'])
+        else:
+            transcription = gui_instance.transcribe_with_whisper(audio_file, 
+                                                            gui_instance.model_var.get(),
+                                                            gui_instance.language_var.get() if gui_instance.language_var.get() != "None" else None,
+                                                            gui_instance.word_timestamps_var.get(),
+                                                            cancel_token,
+                                                            update_progress,
+                                                            formats_file=output_file, source=video_path,
+                                                            resident_models=resident_models)
+        
+        if transcription and batch_id and not restored:
+            job_queue.advance(batch_id, job_key, 'transcribed', transcription=transcription)
         
         if transcription:
+            # Look for a near-identical transcript earlier in this batch
+            similar = None
+            if transcript_index is not None and not duplicate:
+                similar = transcript_index.find(transcription['text'])
+            
             # Process with Groq if enabled
             groq_result = None
-            if gui_instance.groq_enabled.get():
+            if gui_instance.groq_enabled.get() and not transcription.get('no_speech'):
                 # Get the system prompt
                 system_prompt = ""
                 if hasattr(gui_instance, "system_prompt_text"):
                     system_prompt = gui_instance.system_prompt_text.get(1.0, tk.END).strip()
                 
                 # Update the batch log
-                gui_instance.update_batch_log(f"Processing with Groq AI: {os.path.basename(video_path)}")
+                log(f"Processing with Groq AI: {os.path.basename(video_path)}")
                 
-                # Process with Groq - pass the video file path for error tracking
-                success, result = gui_instance.groq_api.summarize_transcript(
-                    transcription['text'], system_prompt, video_path
-                )
+                if saved_groq:
+                    # Summarized before the batch was interrupted
+                    success, result = saved_groq
+                elif duplicate and duplicate.get('groq_result'):
+                    # The original's summary applies to the repost as well
+                    success, result = True, duplicate['groq_result']
+                elif similar and similar.get('groq_result'):
+                    # Same script as an earlier transcript - skip the LLM round trip
+                    log(f"✓ Reusing Groq summary of {os.path.basename(similar['source'])} ({similar['similarity']:.0%} similar transcript)")
+                    success, result = True, similar['groq_result']
+                else:
+                    # Process with Groq - pass the video file path for error tracking
+                    success, result = gui_instance.groq_api.summarize_transcript(
+                        summary_input_text(transcription), system_prompt, video_path
+                    )
+                
+                if batch_id and not saved_groq:
+                    job_queue.advance(
+                        batch_id, job_key, 'summarized',
+                        groq_result=result if success else None, groq_error=None if success else result
+                    )
                 
                 if success:
                     groq_result = result
-                    gui_instance.update_batch_log(f"✓ Groq processing successful: {os.path.basename(video_path)}")
+                    log(f"✓ Groq processing successful: {os.path.basename(video_path)}")
                     
                     # Write enhanced transcription to file
                     try:
@@ -63,60 +154,113 @@ def transcribe_instagram_video(gui_instance, video_path, output_file):
                             file.write("--- Original Transcript ---\n\n")
                             file.write(transcription['detailed'])
                         
-                        gui_instance.update_batch_log(f"✓ Saved enhanced transcription: {os.path.basename(output_file)}")
+                        log(f"✓ Saved enhanced transcription: {os.path.basename(output_file)}")
                     except Exception as e:
-                        gui_instance.update_batch_log(f"✗ Error saving enhanced transcription: {str(e)}")
+                        log(f"✗ Error saving enhanced transcription: {str(e)}")
                 else:
                     # Log error but continue processing
-                    gui_instance.update_batch_log(f"✗ Groq processing issue: {result}")
+                    log(f"✗ Groq processing issue: {result}")
                     
                     # Write original transcription instead
                     try:
                         with open(output_file, "w", encoding="utf-8") as file:
                             file.write(transcription['detailed'])
                         
-                        gui_instance.update_batch_log(f"✓ Saved original transcription: {os.path.basename(output_file)}")
+                        log(f"✓ Saved original transcription: {os.path.basename(output_file)}")
                     except Exception as e:
-                        gui_instance.update_batch_log(f"✗ Error saving transcription: {str(e)}")
+                        log(f"✗ Error saving transcription: {str(e)}")
             else:
                 # Write transcription to file without Groq processing
                 try:
                     with open(output_file, "w", encoding="utf-8") as file:
                         file.write(transcription['detailed'])
                     
-                    gui_instance.update_batch_log(f"✓ Saved transcription: {os.path.basename(output_file)}")
+                    log(f"✓ Saved transcription: {os.path.basename(output_file)}")
                 except Exception as e:
-                    gui_instance.update_batch_log(f"✗ Error saving transcription: {str(e)}")
+                    log(f"✗ Error saving transcription: {str(e)}")
+            
+            # Write the English translation next to the transcript
+            try:
+                translation_file = write_translation(output_file, transcription)
+                if translation_file:
+                    log(f"✓ Saved translation: {os.path.basename(translation_file)}")
+            except Exception as e:
+                log(f"✗ Error saving translation: {str(e)}")
             
-            # Add to Notion if enabled
-            if gui_instance.notion_enabled.get():
+            # Add to Notion if enabled - a repost links to the original's page instead
+            notion_url = None
+            existing_url = (duplicate or {}).get('notion_url') or (item['data'].get('notion_url') if item else None)
+            if gui_instance.notion_enabled.get() and existing_url:
+                notion_url = existing_url
+                log(f"✓ Already in Notion: {notion_url}")
+            elif gui_instance.notion_enabled.get() and not transcription.get('no_speech'):
                 if groq_result:
                     success, message = gui_instance.notion_api.add_transcription_to_notion(
-                        video_path, transcription['detailed'], transcription.get('duration', None), groq_result
+                        video_path, transcription['detailed'], transcription.get('duration', None), groq_result,
+                        transcription.get('translation_detailed'),
+                        related_page_url=similar.get('notion_url') if similar else None
                     )
                 else:
                     success, message = gui_instance.notion_api.add_transcription_to_notion(
-                        video_path, transcription['detailed'], transcription.get('duration', None)
+                        video_path, transcription['detailed'], transcription.get('duration', None),
+                        translation_text=transcription.get('translation_detailed'),
+                        related_page_url=similar.get('notion_url') if similar else None
                     )
                     
                 if success:
-                    gui_instance.update_batch_log(f"✓ Added to Notion: {os.path.basename(video_path)}")
+                    notion_url = gui_instance.notion_api.last_page_url
+                    # Saved at once so a crash before the end can't create a second page
+                    if batch_id:
+                        job_queue.update_data(batch_id, job_key, notion_url=notion_url)
+                    log(f"✓ Added to Notion: {os.path.basename(video_path)}")
                 else:
-                    gui_instance.update_batch_log(f"✗ Notion error: {message}")
+                    log(f"✗ Notion error: {message}")
+            
+            # Index the transcript so later near-duplicates can reuse its summary
+            if transcript_index is not None and not duplicate and not similar:
+                transcript_index.add(transcription['text'], source=video_path, groq_result=groq_result, notion_url=notion_url)
+            
+            # Remember this clip so later reposts can reuse its results
+            remember_processed_audio(
+                fingerprint, duplicate, video_path, transcription, groq_result, notion_url, output_file,
+                repost_options
+            )
+            
+            if batch_id:
+                job_queue.advance(batch_id, job_key, 'published', notion_url=notion_url)
         
         # Clean up
         if not gui_instance.keep_audio_var.get() and os.path.exists(audio_file):
             try:
                 os.remove(audio_file)
             except Exception as e:
-                gui_instance.update_batch_log(f"Warning: Could not remove temporary audio file: {str(e)}")
+                log(f"Warning: Could not remove temporary audio file: {str(e)}")
+
+def run_instagram_batch(gui_instance):
+    """
+    Process every URL in the batch queue, then hand the job slot to the next job
     
-    # Reset transcription state
-    gui_instance.is_transcribing = False
+    The manager job is finished even if a URL raises outside the per-URL
+    error handling, so later single-file jobs never wait on a dead batch.
+    """
+    state = FAILED
+    try:
+        while process_next_instagram_url(gui_instance):
+            pass
+        state = DONE if gui_instance.is_batch_instagram_processing else CANCELLED
+    except Exception as e:
+        log_message = f"✗ Batch stopped by an unexpected error: {str(e)}"
+        gui_instance.root.after(0, lambda: gui_instance.update_batch_log(log_message))
+    finally:
+        gui_instance.instagram_manager_job.finish(state)
+        gui_instance.is_batch_instagram_processing = False
 
 def process_next_instagram_url(gui_instance):
     """
     Process the next Instagram URL in the batch queue
+    
+    Returns:
+        bool: True if more URLs remain, False once the batch is done or canceled
     """
     # Auto-delete any completed videos from previous iterations if option is enabled
     if gui_instance.instagram_auto_delete.get() and gui_instance.batch_completed_videos:
@@ -133,7 +277,21 @@ def process_next_instagram_url(gui_instance):
                     f"✗ Error deleting video: {os.path.basename(vp)} - {err}"
                 ))
     
+    # Skip URLs that were finished before the batch was interrupted
+    job_queue = get_job_queue()
+    batch_id = getattr(gui_instance, 'instagram_job_batch', None)
+    while batch_id and gui_instance.is_batch_instagram_processing and \
+          gui_instance.current_instagram_index < len(gui_instance.instagram_urls):
+        item = job_queue.get_item(batch_id, gui_instance.instagram_urls[gui_instance.current_instagram_index])
+        if not item or item['state'] != 'published':
+            break
+        gui_instance.current_instagram_index += 1
+    
     if not gui_instance.is_batch_instagram_processing or gui_instance.current_instagram_index >= len(gui_instance.instagram_urls):
+        # Mark the queued batch as done so the same URL list starts fresh next time
+        if batch_id and gui_instance.is_batch_instagram_processing:
+            job_queue.finish_batch(batch_id)
+        
         # Batch processing completed or canceled
         completion_message = f"Batch processing completed. Processed {gui_instance.current_instagram_index} of {len(gui_instance.instagram_urls)} videos."
         
@@ -180,8 +338,7 @@ def process_next_instagram_url(gui_instance):
             100, 
             completion_message
         ))
-        gui_instance.is_batch_instagram_processing = False
-        return
+        return False
     
     # Get current URL and increment index
     current_url = gui_instance.instagram_urls[gui_instance.current_instagram_index]
@@ -195,18 +352,25 @@ def process_next_instagram_url(gui_instance):
     ))
     
     try:
-        # Call the download method
-        success, result, description = gui_instance.instaloader_api.download_instagram_post(
-            current_url, 
-            output_dir,
-            lambda value, status: update_instagram_batch_progress(gui_instance, value, status, current_url)
-        )
+        # A video downloaded before the batch was interrupted is used as is
+        item = job_queue.get_item(batch_id, current_url) if batch_id else None
+        if item and state_reached(item['state'], 'downloaded') and os.path.isfile(item['data'].get('video_file', '')):
+            success, result, description = True, item['data']['video_file'], None
+        else:
+            # Call the download method
+            success, result, description = gui_instance.instaloader_api.download_instagram_post(
+                current_url, 
+                output_dir,
+                lambda value, status: update_instagram_batch_progress(gui_instance, value, status, current_url)
+            )
+            if success and batch_id:
+                job_queue.advance(batch_id, current_url, 'downloaded', video_file=result)
         
         if success:
             video_path = result
             
             # Store the original URL and description with the video path for Notion integration
-            if hasattr(gui_instance, 'notion_api'):
+            if hasattr(gui_instance, 'notion_api') and description is not None:
                 gui_instance.notion_api.store_video_metadata(video_path, current_url, description)
             
             # Log success
@@ -216,22 +380,16 @@ def process_next_instagram_url(gui_instance):
             # Set up transcription paths
             output_file = os.path.splitext(video_path)[0] + "_transcript.txt"
             
-            # Set video and output paths for transcription
-            gui_instance.video_path.set(video_path)
-            gui_instance.output_path.set(output_file)
-            
-            # Wait until previous transcription is complete
-            while hasattr(gui_instance, 'is_transcribing') and gui_instance.is_transcribing:
-                import time
-                time.sleep(0.5)
+            # Wait for this batch's turn - single-file jobs go first, even between two videos
+            manager_job = gui_instance.instagram_manager_job
+            report_wait = lambda message: gui_instance.root.after(0, lambda: gui_instance.update_batch_log(message))
+            if manager_job.state == RUNNING:
+                manager_job.checkpoint(gui_instance.instagram_cancel_token, on_wait=report_wait)
+            else:
+                manager_job.acquire(gui_instance.instagram_cancel_token, on_wait=report_wait)
             
             # Start transcription - using the function defined in this module
-            transcribe_instagram_video(gui_instance, video_path, output_file)
-            
-            # Wait until transcription is complete
-            while hasattr(gui_instance, 'is_transcribing') and gui_instance.is_transcribing:
-                import time
-                time.sleep(0.5)
+            transcribe_instagram_video(gui_instance, video_path, output_file, job_key=current_url)
             
             # Log transcription completion
             log_message = f"✓ Transcribed: {os.path.basename(output_file)}"
@@ -247,14 +405,17 @@ def process_next_instagram_url(gui_instance):
             log_message = f"✗ Error downloading {current_url}: {error_message}"
             gui_instance.root.after(0, lambda: gui_instance.update_batch_log(log_message))
     
+    except TranscriptionCancelled:
+        log_message = f"✗ Canceled before transcribing {current_url}"
+        gui_instance.root.after(0, lambda: gui_instance.update_batch_log(log_message))
     except Exception as e:
         # Log unexpected error
         log_message = f"✗ Unexpected error processing {current_url}: {str(e)}"
         gui_instance.root.after(0, lambda: gui_instance.update_batch_log(log_message))
     
-    # Increment index and process next URL
+    # Move on to the next URL
     gui_instance.current_instagram_index += 1
-    process_next_instagram_url(gui_instance)
+    return True
 
 def update_instagram_batch_progress(gui_instance, value, status, current_url):
     """
@@ -331,6 +492,8 @@ def add_batch_instagram_features(gui_instance):
     gui_instance.instagram_urls = []
     gui_instance.current_instagram_index = 0
     gui_instance.instagram_batch_thread = None
+    gui_instance.instagram_cancel_token = None
+    gui_instance.instagram_job_batch = None
     gui_instance.batch_completed_videos = []  # Track videos completed for auto-deletion
 
 def load_urls_from_file(gui_instance):
@@ -404,8 +567,21 @@ def start_batch_instagram_processing(gui_instance, urls):
     
     # Initialize batch processing
     gui_instance.is_batch_instagram_processing = True
+    gui_instance.instagram_cancel_token = CancellationToken()
+    gui_instance.instagram_transcript_index = TranscriptIndex()
     gui_instance.instagram_urls = urls
     gui_instance.current_instagram_index = 0
+    gui_instance.instagram_manager_job = get_job_manager().submit(
+        f"Instagram: {len(urls)} URLs", "instagram", PRIORITY_BATCH
+    )
+    
+    # Record the batch so an interrupted run resumes where it stopped
+    batch_id, resumed = get_job_queue().open_batch(
+        "instagram", urls_source(urls), os.path.abspath(output_dir), urls
+    )
+    gui_instance.instagram_job_batch = batch_id
+    if resumed:
+        gui_instance.update_batch_log("Resuming interrupted Instagram batch - finished URLs will be skipped")
     
     # Update status
     update_instagram_progress(
@@ -416,7 +592,7 @@ def start_batch_instagram_processing(gui_instance, urls):
     
     # Start batch thread
     gui_instance.instagram_batch_thread = threading.Thread(
-        target=process_next_instagram_url,
+        target=run_instagram_batch,
         args=(gui_instance,),
         daemon=True
     )
@@ -428,12 +604,15 @@ def cancel_batch_instagram_processing(gui_instance):
     """
     if gui_instance.is_batch_instagram_processing:
         gui_instance.is_batch_instagram_processing = False
+        # Stop the current video's ffmpeg/Whisper work instead of waiting for it
+        if getattr(gui_instance, 'instagram_cancel_token', None):
+            gui_instance.instagram_cancel_token.cancel()
         update_instagram_progress(
             gui_instance, 
             0, 
             f"Batch processing canceled after {gui_instance.current_instagram_index} of {len(gui_instance.instagram_urls)} videos."
         )
-        messagebox.showinfo("Info", "Batch Instagram processing will be canceled after the current video completes.")
+        messagebox.showinfo("Info", "Batch Instagram processing has been canceled. The current video was stopped.")
 
 # This should be added to instaloader_integration.py's integrate_instaloader function
 def extend_instagram_integration(gui_instance):
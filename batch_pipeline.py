@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+
+from cancellation import TranscriptionCancelled
+
+WORKERS_ENV_VAR = "VIDEOTRANSCRIBER_PIPELINE_WORKERS"
+
+# Workers per batch stage; only the network stages benefit from more than one
+DEFAULT_STAGE_WORKERS = {
+    "extract": 1,
+    "transcribe": 1,
+    "summarize": 4,
+    "publish": 2
+}
+
+# Files that may wait between two stages (bounds extracted audio on disk)
+DEFAULT_QUEUE_SIZE = 2
+
+def stage_workers(overrides=None):
+    """
+    Workers per stage: defaults, then VIDEOTRANSCRIBER_PIPELINE_WORKERS
+    (e.g. "summarize=8,publish=4"), then explicit overrides
+    """
+    workers = dict(DEFAULT_STAGE_WORKERS)
+    
+    for item in os.environ.get(WORKERS_ENV_VAR, "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            if name.strip() in workers:
+                workers[name.strip()] = max(1, int(value))
+        except ValueError:
+            pass
+    
+    workers.update(overrides or {})
+    return workers
+
+class OrderedLog:
+    """
+    Log that keeps each file's lines together and in input order.
+    
+    Lines of the oldest unfinished file are written immediately; lines of
+    files further ahead are held until every earlier file has finished, so
+    the log reads exactly as if the files had been processed one by one.
+    """
+    def __init__(self, write):
+        self.write = write
+        self.lock = threading.Lock()
+        self.head = 0
+        self.pending = {}
+        self.finished = set()
+    
+    def log(self, index, message):
+        with self.lock:
+            if index == self.head:
+                self.write(message)
+            else:
+                self.pending.setdefault(index, []).append(message)
+    
+    def finish(self, index):
+        """Mark a file as done and flush the held lines of the files after it"""
+        with self.lock:
+            self.finished.add(index)
+            while self.head in self.finished:
+                self.finished.discard(self.head)
+                self.head += 1
+                for message in self.pending.pop(self.head, []):
+                    self.write(message)
+
+class Stage:
+    """One step of a StagePipeline: func(job) runs on `workers` threads"""
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+
+class StagePipeline:
+    """
+    Runs jobs through a chain of stages connected by bounded queues.
+    
+    Every stage has its own worker threads, so while a network stage waits on
+    an HTTP call for one file the transcription stage already works on the
+    next one. A stage function returns False to skip the remaining stages for
+    a job; TranscriptionCancelled skips them for that job and every later one.
+    Jobs are handed to on_complete, and their log lines written, in input
+    order regardless of which stage finished first.
+    """
+    def __init__(self, stages, write_log, queue_size=DEFAULT_QUEUE_SIZE, should_stop=None, on_complete=None):
+        """
+        Parameters:
+            stages (list): Stage objects in processing order
+            write_log (function): Writes one log line
+            queue_size (int): Maximum jobs waiting in front of each stage
+            should_stop (function, optional): Returns True to stop feeding new jobs
+            on_complete (function, optional): Called with each finished job, in input order
+        """
+        self.stages = stages
+        self.ordered_log = OrderedLog(write_log)
+        self.queue_size = queue_size
+        self.should_stop = should_stop or (lambda: False)
+        self.on_complete = on_complete
+        self.stopped = threading.Event()
+        self.stop_index = float("inf")
+    
+    def stop(self, index=None):
+        """
+        Stop feeding new jobs; with an index, also skip the remaining stages of
+        that job and every later one (earlier jobs still run to the end)
+        """
+        self.stopped.set()
+        if index is not None:
+            self.stop_index = min(self.stop_index, index)
+    
+    def _job_log(self, index, on_log=None):
+        """Log function of one job (also handing its lines to the job's own on_log)"""
+        def log(message):
+            self.ordered_log.log(index, message)
+            if on_log:
+                on_log(message)
+        return log
+    
+    def _feed(self, jobs, first_queue):
+        for index, job in enumerate(jobs):
+            if self.stopped.is_set() or self.should_stop():
+                self.stopped.set()
+                break
+            job["index"] = index
+            job["skip"] = False
+            job["log"] = self._job_log(index, job.get("on_log"))
+            first_queue.put(job)
+        for _ in range(self.stages[0].workers):
+            first_queue.put(None)
+    
+    def _work(self, stage, in_queue, out_queue, next_workers, remaining):
+        while True:
+            job = in_queue.get()
+            if job is None:
+                break
+            
+            if job["index"] >= self.stop_index:
+                job["skip"] = True
+                job["cancelled"] = True
+            elif not job["skip"]:
+                try:
+                    if job.get("on_stage"):
+                        job["on_stage"](stage.name)
+                    if stage.func(job) is False:
+                        job["skip"] = True
+                except TranscriptionCancelled:
+                    job["skip"] = True
+                    job["cancelled"] = True
+                    self.stop(job["index"])
+                except Exception as e:
+                    job["skip"] = True
+                    job["error"] = e
+                    job["log"](f"✗ Error in {stage.name} stage for {os.path.basename(job['video_file'])}: {str(e)}")
+            
+            out_queue.put(job)
+        
+        # The last worker of a stage closes the next queue
+        with remaining["lock"]:
+            remaining["count"] -= 1
+            if remaining["count"] == 0:
+                for _ in range(next_workers):
+                    out_queue.put(None)
+    
+    def run(self, jobs):
+        """
+        Process jobs (dicts with at least "video_file") and block until all are done
+        
+        Jobs may be a generator that waits for new work (e.g. a watched folder);
+        it is consumed on a feeder thread as the first stage has room. Each job
+        gets "index", "log", "skip" and, on failure, "error" or "cancelled".
+        A job's optional "on_log" and "on_stage" callbacks receive its own log
+        lines as they are written and the name of each stage it enters.
+        
+        Returns:
+            list: The jobs that entered the pipeline, in input order
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        done_queue = queue.Queue()
+        threads = [threading.Thread(target=self._feed, args=(jobs, queues[0]), daemon=True)]
+        
+        for position, stage in enumerate(self.stages):
+            last = position == len(self.stages) - 1
+            out_queue = done_queue if last else queues[position + 1]
+            next_workers = 1 if last else self.stages[position + 1].workers
+            remaining = {"count": stage.workers, "lock": threading.Lock()}
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[position], out_queue, next_workers, remaining),
+                    daemon=True
+                ))
+        
+        for thread in threads:
+            thread.start()
+        
+        # Hand out finished jobs in input order
+        finished = []
+        waiting = {}
+        while True:
+            job = done_queue.get()
+            if job is None:
+                break
+            waiting[job["index"]] = job
+            while len(finished) in waiting:
+                job = waiting.pop(len(finished))
+                finished.append(job)
+                if self.on_complete:
+                    self.on_complete(job)
+                self.ordered_log.finish(job["index"])
+        
+        for thread in threads:
+            thread.join()
+        
+        return finished
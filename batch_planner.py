@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import threading
+
+from batch_scheduler import schedule_estimate, format_duration
+
+PROFILE_FILE = os.path.join(os.path.expanduser("~"), ".videotranscriber", "speed_profile.json")
+
+# Seconds of processing per second of audio for openai-whisper, used until
+# this machine has measured its own (rough figures for a laptop CPU / a mid-range GPU)
+DEFAULT_RTF = {
+    "cpu": {"tiny": 0.1, "base": 0.2, "small": 0.6, "medium": 1.8, "large": 3.5},
+    "cuda": {"tiny": 0.02, "base": 0.03, "small": 0.06, "medium": 0.12, "large": 0.2}
+}
+
+# Weight of the newest measurement in the running average
+RTF_SMOOTHING = 0.3
+
+# Shorter clips are dominated by start-up cost and would skew the average
+MIN_MEASURED_SECONDS = 5.0
+
+# ~150 spoken words per minute at ~1.3 tokens per word
+TOKENS_PER_AUDIO_SECOND = 3.3
+
+# System prompt, JSON wrapper and the title/summary Groq writes back
+GROQ_TOKENS_PER_REQUEST = 450
+
+# Extraction, Groq and Notion of the last file can't overlap with anything
+FILE_OVERHEAD_SECONDS = 3.0
+
+def model_size(model_name):
+    """Size name ("tiny" ... "large") of a Whisper model name such as "large-v3" or "small.en" """
+    for size in ("tiny", "base", "small", "medium", "large"):
+        if model_name and model_name.startswith(size):
+            return size
+    return "large"
+
+class SpeedProfile:
+    """
+    Measured Whisper speed of this machine, per model and device.
+    
+    Each finished transcription updates a running average of its real-time
+    factor (processing seconds per second of audio). The averages are kept
+    in ~/.videotranscriber/speed_profile.json so estimates improve across runs.
+    """
+    def __init__(self, profile_file=PROFILE_FILE):
+        self.profile_file = profile_file
+        self.lock = threading.Lock()
+        self.factors = {}
+        try:
+            with open(profile_file, "r", encoding="utf-8") as f:
+                self.factors = json.load(f)
+        except Exception:
+            pass
+    
+    def record(self, model_name, device, audio_seconds, processing_seconds):
+        """Add one measured transcription (ignored for very short clips)"""
+        if not audio_seconds or audio_seconds < MIN_MEASURED_SECONDS or processing_seconds <= 0:
+            return
+        
+        key = f"{model_name}/{device}"
+        rtf = processing_seconds / audio_seconds
+        with self.lock:
+            entry = self.factors.get(key)
+            if entry:
+                entry["rtf"] = (1 - RTF_SMOOTHING) * entry["rtf"] + RTF_SMOOTHING * rtf
+                entry["samples"] += 1
+            else:
+                self.factors[key] = {"rtf": rtf, "samples": 1}
+            
+            try:
+                os.makedirs(os.path.dirname(self.profile_file), exist_ok=True)
+                temp_file = self.profile_file + ".tmp"
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(self.factors, f, indent=2)
+                os.replace(temp_file, self.profile_file)
+            except Exception as e:
+                print(f"Warning: could not save the speed profile: {str(e)}")
+    
+    def rtf(self, model_name, device):
+        """
+        Returns:
+            tuple: (real-time factor, True if it was measured on this machine)
+        """
+        with self.lock:
+            entry = self.factors.get(f"{model_name}/{device}")
+        if entry:
+            return entry["rtf"], True
+        
+        defaults = DEFAULT_RTF.get(device, DEFAULT_RTF["cpu"])
+        return defaults[model_size(model_name)], False
+
+_profile = None
+_profile_lock = threading.Lock()
+
+def get_speed_profile():
+    """Return the process-wide speed profile"""
+    global _profile
+    with _profile_lock:
+        if _profile is None:
+            _profile = SpeedProfile()
+        return _profile
+
+def plan_batch(ordered_files, durations, model_name, device="cpu", groq_enabled=False, notion_enabled=False):
+    """
+    Estimate what a batch will cost before it runs
+    
+    Parameters:
+        ordered_files (list): Files in processing order
+        durations (dict): file -> duration in seconds (None if unknown)
+        model_name (str): Whisper model
+        device (str): "cuda" or "cpu"
+        groq_enabled (bool): Each file is summarized with Groq
+        notion_enabled (bool): Each file gets a Notion page
+    
+    Returns:
+        dict: files, audio_seconds, rtf, measured, wall_seconds, first_result,
+              groq_requests, groq_tokens and notion_calls
+    """
+    rtf, measured = get_speed_profile().rtf(model_name, device)
+    estimate = schedule_estimate(ordered_files, durations, workers=1, seconds_per_audio_second=rtf)
+    audio_seconds = schedule_estimate(ordered_files, durations)["makespan"]
+    
+    files = len(ordered_files)
+    return {
+        "files": files,
+        "audio_seconds": audio_seconds,
+        "rtf": rtf,
+        "measured": measured,
+        "wall_seconds": estimate["makespan"] + (FILE_OVERHEAD_SECONDS if files else 0.0),
+        "first_result": estimate["first_result"],
+        "groq_requests": files if groq_enabled else 0,
+        "groq_tokens": int(audio_seconds * TOKENS_PER_AUDIO_SECOND + files * GROQ_TOKENS_PER_REQUEST)
+                       if groq_enabled else 0,
+        "notion_calls": files if notion_enabled else 0
+    }
+
+def describe_plan(plan):
+    """Multi-line summary of a plan_batch() result for the confirm dialog and logs"""
+    speed = "measured on this machine" if plan["measured"] else "default estimate, not measured yet"
+    lines = [
+        f"Audio: {format_duration(plan['audio_seconds'])} in {plan['files']} files",
+        f"Expected time: about {format_duration(plan['wall_seconds'])} "
+        f"({plan['rtf']:.2f}s per second of audio, {speed})"
+    ]
+    if plan["groq_requests"]:
+        lines.append(f"Groq: {plan['groq_requests']} requests, about {plan['groq_tokens']:,} tokens")
+    if plan["notion_calls"]:
+        lines.append(f"Notion: {plan['notion_calls']} pages")
+    return "\n".join(lines)
+
+class EtaTracker:
+    """
+    Live estimate of the time left in a running batch.
+    
+    Starts from the planned speed and shifts towards the speed actually
+    observed in this run (wall time per second of audio, so Groq and Notion
+    waits are included) as more of the batch's audio is done.
+    """
+    def __init__(self, durations, rtf):
+        """
+        Parameters:
+            durations (dict): file -> duration in seconds (None if unknown) of the files still to process
+            rtf (float): Planned processing seconds per second of audio
+        """
+        known = [duration for duration in durations.values() if duration]
+        fallback = sum(known) / len(known) if known else 0.0
+        self.durations = {media_file: duration or fallback for media_file, duration in durations.items()}
+        self.total_audio = sum(self.durations.values())
+        self.done_audio = 0.0
+        self.rtf = rtf
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+    
+    def file_done(self, media_file):
+        """Count a finished (or skipped) file"""
+        with self.lock:
+            self.done_audio += self.durations.pop(media_file, 0.0)
+    
+    def remaining_seconds(self):
+        """Estimated seconds until the batch finishes"""
+        with self.lock:
+            elapsed = time.time() - self.start_time
+            remaining_audio = sum(self.durations.values())
+            if self.done_audio > 0 and self.total_audio > 0:
+                # Trust the observed speed in proportion to how much of the batch it covers
+                weight = self.done_audio / self.total_audio
+                observed = elapsed / self.done_audio
+                rtf = weight * observed + (1 - weight) * self.rtf
+            else:
+                rtf = self.rtf
+            
+            if self.done_audio == 0:
+                # Nothing finished yet: count down from the plan
+                return max(0.0, self.total_audio * rtf + FILE_OVERHEAD_SECONDS - elapsed)
+            return remaining_audio * rtf
+    
+    def status(self, processed_count, total_count):
+        """Status line such as "Processed 3 of 10 files (30%) - about 0:04:12 left" """
+        percent = processed_count / total_count * 100 if total_count else 100
+        return (f"Processed {processed_count} of {total_count} files ({percent:.0f}%) - "
+                f"about {format_duration(self.remaining_seconds())} left")
@@ -3,6 +3,23 @@ import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
+from cancellation import CancellationToken, TranscriptionCancelled, cancellable_whisper
+from selective_retranscription import refine_low_confidence_segments
+from multitask_transcription import transcribe_and_translate, write_translation, summary_input_text
+from resource_governor import get_governor
+from transcription_server import get_server_client
+from transcript_cache import get_transcript_cache, audio_content_hash, transcription_options, used_options
+from audio_fingerprint import find_reposted_audio, remember_processed_audio, match_options
+from transcript_dedup import TranscriptIndex
+from speech_triage import triage_audio, no_speech_transcription
+from batch_pipeline import StagePipeline, Stage, stage_workers
+from job_queue import get_job_queue, state_reached
+from incremental_manifest import IncrementalManifest
+from batch_scheduler import STRATEGIES, DEFAULT_STRATEGY, strategy_from_label, probe_durations, order_files, schedule_estimate, format_duration
+from batch_planner import get_speed_profile, plan_batch, describe_plan, EtaTracker
+from job_manager import get_job_manager, PRIORITY_BATCH, DONE, FAILED, CANCELLED
+from transcript_writers import open_writers
+
 def browse_input_directory(self):
     """Browse for input directory with video files"""
     directory = filedialog.askdirectory(title="Select Directory with Video Files")
@@ -71,9 +88,58 @@ def start_batch_transcription(self):
         messagebox.showerror("Error", "No video files found in the selected directory.")
         return
     
+    # Incremental mode: skip videos already transcribed into this folder with the same settings
+    self.batch_manifest = None
+    skipped_count = 0
+    if hasattr(self, 'incremental_var') and self.incremental_var.get():
+        language = self.language_var.get() if self.language_var.get() != "None" else None
+        refine_model_name = self.refine_model_var.get() if hasattr(self, 'refine_model_var') else "None"
+        translate = hasattr(self, 'translate_var') and self.translate_var.get()
+        manifest_options = dict(
+            transcription_options(self.model_var.get(), language, self.word_timestamps_var.get(),
+                                  refine_model_name, translate),
+            model=self.model_var.get(),
+            groq=bool(self.groq_enabled.get())
+        )
+        if hasattr(self, 'output_format_vars') and self.selected_output_formats():
+            manifest_options["formats"] = self.selected_output_formats()
+        self.batch_manifest = IncrementalManifest(output_dir, manifest_options)
+        video_files, skipped_count = self.batch_manifest.filter_changed(video_files)
+        
+        if not video_files:
+            messagebox.showinfo("Info", f"All {skipped_count} videos are unchanged since they were last transcribed.")
+            return
+    
+    # ffprobe runs once per file - probe on a worker thread so the window stays responsive
+    if getattr(self, 'batch_probing', False):
+        return
+    self.batch_probing = True
+    self.batch_status.set(f"Probing the duration of {len(video_files)} files...")
+    threading.Thread(
+        target=probe_batch_thread, args=(self, video_files, output_dir, skipped_count), daemon=True
+    ).start()
+
+def probe_batch_thread(self, video_files, output_dir, skipped_count):
+    """Probe the files' durations, then ask for confirmation on the Tk thread"""
+    durations = probe_durations(video_files)
+    self.root.after(0, lambda: confirm_batch_transcription(self, video_files, output_dir, durations, skipped_count))
+
+def confirm_batch_transcription(self, video_files, output_dir, durations, skipped_count):
+    """Show the estimate for the probed files and start the batch if confirmed"""
+    self.batch_probing = False
+    
+    # Estimate the run from the probed durations and this machine's measured Whisper speed
+    import torch
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    plan = plan_batch(video_files, durations, self.model_var.get(), device,
+                      self.groq_enabled.get(), self.notion_enabled.get())
+    
     # Confirm with user
+    skipped_note = f" ({skipped_count} unchanged videos will be skipped)" if skipped_count else ""
     if not messagebox.askyesno("Confirm", 
-                             f"Found {len(video_files)} video files to process. Continue?"):
+                             f"Found {len(video_files)} video files to process{skipped_note}.\n\n"
+                             f"{describe_plan(plan)}\n\nContinue?"):
+        self.batch_status.set("Batch transcription not started.")
         return
     
     # Reset UI for batch processing
@@ -84,16 +150,17 @@ def start_batch_transcription(self):
     
     # Start batch transcription in a separate thread
     self.is_batch_processing = True
+    self.batch_cancel_token = CancellationToken()
     self.processed_count = 0
     self.total_videos = len(video_files)
     self.batch_thread = threading.Thread(
         target=self.batch_transcribe_videos_thread,
-        args=(video_files, output_dir)
+        args=(video_files, output_dir, durations)
     )
     self.batch_thread.daemon = True
     self.batch_thread.start()
 
-def batch_transcribe_videos_thread(self, video_files, output_dir):
+def batch_transcribe_videos_thread(self, video_files, output_dir, durations=None):
     """Process multiple video files in a thread with auto-delete support"""
     # Import required modules inside the thread to ensure they're available
     import torch
@@ -105,6 +172,53 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
     language = self.language_var.get() if self.language_var.get() != "None" else None
     keep_audio = self.keep_audio_var.get()
     word_timestamps = self.word_timestamps_var.get()
+    refine_model_name = self.refine_model_var.get() if hasattr(self, 'refine_model_var') else "None"
+    translate = hasattr(self, 'translate_var') and self.translate_var.get()
+    output_formats = self.selected_output_formats() if hasattr(self, 'output_format_vars') else []
+    cache = get_transcript_cache() if hasattr(self, 'use_cache_var') and self.use_cache_var.get() else None
+    dedup_reposts = hasattr(self, 'dedup_reposts_var') and self.dedup_reposts_var.get()
+    skip_no_speech = hasattr(self, 'skip_no_speech_var') and self.skip_no_speech_var.get()
+    order_strategy = strategy_from_label(self.batch_order_var.get()) if hasattr(self, 'batch_order_var') else DEFAULT_STRATEGY
+    
+    # Order the files by duration so a long file doesn't run alone at the end
+    if durations is None:
+        self.update_batch_log(f"Probing the duration of {len(video_files)} files...")
+        durations = probe_durations(video_files)
+    video_files = order_files(video_files, durations, order_strategy)
+    
+    # Record the batch so an interrupted run resumes where it stopped (with the same settings)
+    batch_options = dict(
+        match_options(model_name, language, word_timestamps, refine_model_name, translate),
+        groq=self.groq_enabled.get(), notion=self.notion_enabled.get(), formats=output_formats
+    )
+    job_queue = get_job_queue()
+    batch_id, resumed = job_queue.open_batch(
+        "folder", os.path.abspath(self.batch_directory.get()), os.path.abspath(output_dir),
+        [os.path.abspath(video_file) for video_file in video_files], options=batch_options
+    )
+    queue_items = job_queue.items(batch_id)
+    if resumed:
+        done = [video_file for video_file in video_files
+                if queue_items[os.path.abspath(video_file)]['state'] == 'published']
+        self.update_batch_log(f"Resuming interrupted batch - {len(done)} of {len(video_files)} files were already done")
+        self.processed_count = len(done)
+        video_files = [video_file for video_file in video_files if video_file not in done]
+    
+    # Whisper runs one file at a time; the other stages overlap with it
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    rtf, _ = get_speed_profile().rtf(model_name, device)
+    estimate = schedule_estimate(video_files, durations, workers=1, seconds_per_audio_second=rtf)
+    self.update_batch_log(
+        f"Order: {STRATEGIES[order_strategy]} - expected time {format_duration(estimate['makespan'])}, "
+        f"first result after {format_duration(estimate['first_result'])}, "
+        f"average file done after {format_duration(estimate['mean_completion'])}"
+    )
+    eta = EtaTracker({video_file: durations.get(video_file) for video_file in video_files}, rtf)
+    
+    # Transcripts seen earlier in this batch, for reusing near-duplicate summaries
+    transcript_index = TranscriptIndex()
+    cancel_token = self.batch_cancel_token
+    manifest = getattr(self, 'batch_manifest', None)
     
     # Check if auto-delete option is enabled for Instagram videos
     auto_delete_enabled = hasattr(self, 'instagram_auto_delete') and self.instagram_auto_delete.get()
@@ -114,10 +228,40 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
     if self.groq_enabled.get() and hasattr(self, "system_prompt_text"):
         system_prompt = self.system_prompt_text.get(1.0, tk.END).strip()
     
+    # Hand the jobs to the warm transcription server if enabled
+    allow_downgrade = hasattr(self, 'downgrade_on_memory_var') and self.downgrade_on_memory_var.get()
+    server_client = None
+    if hasattr(self, 'use_server_var') and self.use_server_var.get():
+        self.update_batch_log("Connecting to the transcription server...")
+        server_client = get_server_client()
+        if server_client:
+            self.update_batch_log("Using the transcription server - models stay loaded between runs.")
+        else:
+            self.update_batch_log("Transcription server unavailable - transcribing in this process.")
+    
     # Load the Whisper model at the beginning of batch processing
-    try:
+    reservation = None
+    refine_model = None
+    
+    def report_wait(message):
+        self.update_batch_log(message)
+        self.update_batch_status(message)
+    
+    def load_models():
+        """Reserve memory for the models and the longest input, then load them"""
+        nonlocal reservation, refine_model, model_name, refine_model_name
+        longest = max([durations[video_file] for video_file in video_files if durations[video_file]] or [None])
+        reservation = get_governor().acquire(
+            f"batch of {len(video_files)} files", model_name, longest,
+            refine_model_name=refine_model_name,
+            allow_downgrade=allow_downgrade,
+            cancel_token=cancel_token,
+            on_wait=report_wait
+        )
+        model_name = reservation.model_name
+        refine_model_name = reservation.refine_model_name
+        
         # Check for GPU
-        device = "cuda" if torch.cuda.is_available() else "cpu"
         if device == "cuda":
             self.update_batch_log(f"Using GPU acceleration with {device}")
         else:
@@ -128,11 +272,57 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
         # Clear any existing model to prevent memory issues
         if hasattr(self, 'whisper_model'):
             self.whisper_model = None
-            
+        
         # Load a fresh model for batch processing to avoid potential state issues
         self.whisper_model = whisper.load_model(model_name, device=device)
         self.update_batch_log("Model loaded successfully.")
+        
+        # Load the larger refinement model once for the whole batch
+        if refine_model_name and refine_model_name != "None" and refine_model_name != model_name:
+            self.update_batch_log(f"Loading Whisper {refine_model_name} model for low-confidence segments...")
+            refine_model = whisper.load_model(refine_model_name, device=device)
+            self.update_batch_log("Refinement model loaded successfully.")
+    
+    def unload_models():
+        """Free the models and their memory reservation"""
+        nonlocal reservation, refine_model
+        self.whisper_model = None
+        refine_model = None
+        if reservation:
+            reservation.release()
+            reservation = None
+    
+    def pause_for(other_job):
+        """Step aside for an interactive job between files"""
+        self.update_batch_log(f"Pausing the batch for {other_job.name}...")
+        self.update_batch_status(f"Paused for {other_job.name}")
+        if server_client is None:
+            unload_models()
+    
+    def resume():
+        self.update_batch_log("Resuming the batch")
+        if server_client is None:
+            load_models()
+    
+    # Take a turn in the job queue; interactive jobs go first
+    manager_job = get_job_manager().submit(
+        f"Folder: {os.path.basename(os.path.normpath(self.batch_directory.get()))}", "batch", PRIORITY_BATCH
+    )
+    
+    try:
+        manager_job.acquire(cancel_token, on_wait=report_wait)
+        if server_client is None:
+            load_models()
+    except TranscriptionCancelled:
+        manager_job.finish(CANCELLED)
+        self.update_batch_log("Batch processing canceled while waiting for its turn.")
+        self.update_batch_status("Batch processing canceled.")
+        self.is_batch_processing = False
+        self.root.after(0, lambda: self.batch_cancel_button.config(state=tk.DISABLED))
+        return
     except Exception as e:
+        manager_job.finish(FAILED)
+        unload_models()
         self.update_batch_log(f"Error loading Whisper model: {str(e)}")
         self.update_batch_status("Batch processing failed - model could not be loaded.")
         self.is_batch_processing = False
@@ -145,25 +335,72 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
     # Track processed videos for auto-deletion
     processed_videos = []
     
-    # Process each video file
-    for i, video_file in enumerate(video_files):
-        if not self.is_batch_processing:
-            self.update_batch_status(f"Batch processing canceled after {i} of {len(video_files)} files")
-            break
+    # Fingerprint index entries created in this batch, so in-batch reposts can wait for their original
+    batch_entries = {}
+    
+    def wait_for(origin, event):
+        """Wait until an earlier job reaches a stage, or is known never to"""
+        while not origin[event].wait(0.5):
+            if origin['skip'] or pipeline.stopped.is_set() or cancel_token.is_cancelled:
+                break
+    
+    def extract_stage(job):
+        """Extract the audio track (runs ahead of Whisper)"""
+        video_basename = os.path.basename(job['video_file'])
+        job['log'](f"Processing ({job['index']+1}/{len(video_files)}): {video_basename}")
         
-        video_basename = os.path.basename(video_file)
-        output_basename = os.path.splitext(video_basename)[0] + "_transcript.txt"
-        output_file = os.path.join(output_dir, output_basename)
+        # Transcribed before the batch was interrupted - the audio isn't needed again
+        if state_reached(job['queue_item']['state'], 'transcribed'):
+            return True
         
-        # Update batch log and status
-        self.update_batch_log(f"Processing ({i+1}/{len(video_files)}): {video_basename}")
-        self.update_batch_status(f"Processing: {video_basename}")
+        if self.extract_audio_with_ffmpeg(job['video_file'], job['audio_file'], cancel_token):
+            job_queue.advance(batch_id, job['key'], 'extracted')
+            return True
+        if cancel_token.is_cancelled:
+            job['log'](f"✗ Canceled while extracting audio from {video_basename}")
+            raise TranscriptionCancelled("Operation canceled")
+        return False
+    
+    def transcribe_stage(job):
+        """Fingerprint, triage and transcribe one file (the only stage that uses the model)"""
+        video_file = job['video_file']
+        audio_file = job['audio_file']
+        video_basename = os.path.basename(video_file)
+        log = job['log']
         
-        # Extract audio from video
-        audio_file = os.path.splitext(video_file)[0] + ".wav"
-        if self.extract_audio_with_ffmpeg(video_file, audio_file):
-            # Transcribe the audio
-            try:
+        try:
+            # Let a waiting single-file job run before this file
+            manager_job.checkpoint(cancel_token, pause_for, resume, on_wait=report_wait)
+            self.update_batch_status(f"Processing: {video_basename} - about {format_duration(eta.remaining_seconds())} left")
+            
+            # Transcript saved before the batch was interrupted
+            restored = None
+            if state_reached(job['queue_item']['state'], 'transcribed'):
+                restored = job['queue_item']['data'].get('transcription')
+            
+            # Recognise reposts of a clip that was already processed with the same settings
+            fingerprint = None
+            duplicate = None
+            job['match_options'] = match_options(model_name, language, word_timestamps, refine_model_name, translate)
+            if dedup_reposts and not restored:
+                fingerprint, duplicate = find_reposted_audio(audio_file, cancel_token, log, job['match_options'])
+            
+            # Sample a few seconds to skip music-only and ambient clips before Whisper
+            speech_check = None
+            if skip_no_speech and not duplicate and not restored:
+                speech_check = triage_audio(
+                    audio_file, self.whisper_model if server_client is None else None, language, cancel_token
+                )
+            
+            if restored:
+                log("Resuming with the transcript saved before the interruption")
+                transcription = restored
+            elif duplicate:
+                transcription = dict(duplicate['transcription'])
+            elif speech_check and not speech_check['speech']:
+                log(f"No speech detected ({speech_check['reason']}) - skipping Whisper, Groq and Notion")
+                transcription = no_speech_transcription(speech_check['duration'])
+            else:
                 # Create a fresh instance of transcribe options for each run
                 transcribe_options = {
                     "task": "transcribe",
@@ -175,22 +412,108 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
                     transcribe_options["language"] = language
                 
                 start_time = time.time()
+                writers = None
+                
+                # Reuse a stored transcript of the same audio, model and options
+                cache_options = transcription_options(model_name, language, word_timestamps, refine_model_name, translate)
+                cached = None
+                if cache:
+                    audio_hash = audio_content_hash(audio_file)
+                    cached = cache.get(audio_hash, model_name, cache_options)
+                
+                if cached:
+                    log("Found cached transcript - skipped Whisper")
+                    result = cached['result']
+                    translation_result = cached['translation']
+                elif server_client:
+                    server_result = server_client.transcribe(
+                        audio_file, model_name, transcribe_options,
+                        refine_model_name=refine_model_name,
+                        translate=translate,
+                        allow_downgrade=allow_downgrade,
+                        cancel_token=cancel_token,
+                        on_status=log
+                    )
+                    result = server_result['transcription']
+                    translation_result = server_result['translation']
+                else:
+                    # Ensure whisper_model exists and is valid
+                    if not hasattr(self, 'whisper_model') or self.whisper_model is None:
+                        log("Reloading Whisper model...")
+                        self.whisper_model = whisper.load_model(model_name, device=device)
+                    
+                    # The checked formats are written as each window is decoded, unless
+                    # refinement will still replace some of the segments
+                    if output_formats and refine_model is None:
+                        try:
+                            writers = open_writers(job['output_file'], output_formats, {
+                                "source": video_file,
+                                "language": language,
+                                "model": model_name
+                            })
+                        except OSError as e:
+                            log(f"Error saving transcript formats: {str(e)}")
+                    
+                    translation_result = None
+                    whisper_seconds = None
+                    try:
+                        with cancellable_whisper(
+                            self.whisper_model, cancel_token, segment_callback=writers.add if writers else None
+                        ):
+                            if translate:
+                                # Encode each window once and decode it for both tasks
+                                multitask_result = transcribe_and_translate(
+                                    self.whisper_model, audio_file, language, cancel_token,
+                                    word_timestamps=word_timestamps
+                                )
+                                result = multitask_result['transcription']
+                                result['duration'] = multitask_result['duration']
+                                translation_result = multitask_result['translation']
+                            else:
+                                whisper_start = time.time()
+                                result = self.whisper_model.transcribe(audio_file, **transcribe_options)
+                                whisper_seconds = time.time() - whisper_start
+                    except BaseException:
+                        if writers:
+                            writers.discard()
+                        raise
+                    
+                    # Re-transcribe only the low-confidence ranges with the larger model
+                    if refine_model is not None:
+                        result = refine_low_confidence_segments(
+                            result, audio_file, refine_model, transcribe_options,
+                            cancel_token=cancel_token, log=log
+                        )
+                    elif whisper_seconds is not None:
+                        # Only a plain Whisper pass measures this machine's speed for the model
+                        get_speed_profile().record(model_name, device, durations.get(video_file), whisper_seconds)
+                    
+                    result['model'] = model_name
+                    result['refine_model'] = refine_model_name if refine_model is not None else None
                 
-                # Ensure whisper_model exists and is valid
-                if not hasattr(self, 'whisper_model') or self.whisper_model is None:
-                    self.update_batch_log("Reloading Whisper model...")
-                    self.whisper_model = whisper.load_model(model_name, device=device)
+                if cache and not cached:
+                    cache.put(
+                        audio_hash, result.get('model', model_name), used_options(cache_options, result),
+                        result, translation_result, source=video_file
+                    )
                 
-                result = self.whisper_model.transcribe(audio_file, **transcribe_options)
                 elapsed = time.time() - start_time
                 
-                self.update_batch_log(f"Transcription completed in {elapsed:.2f} seconds")
+                log(f"Transcription completed in {elapsed:.2f} seconds")
+                
+                if writers:
+                    try:
+                        writers.finish(result['segments'])
+                        log(f"Saved {', '.join(os.path.basename(path) for path in writers.paths)}")
+                    except OSError as e:
+                        log(f"Error saving transcript formats: {str(e)}")
+                elif output_formats:
+                    self.save_output_formats(
+                        job['output_file'], result, output_formats, video_file, lambda value, status: log(status)
+                    )
                 
                 # Format output based on word timestamps option
                 if word_timestamps and 'words' in result:
-                    # Create detailed output with word-level timestamps
-                    detailed_text = result['text']
-                    
                     # Create a timestamped transcript
                     timestamped_text = []
                     
@@ -212,103 +535,296 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
                         'duration': result.get('duration', None)
                     }
                 
-                # Process with Groq if enabled
-                groq_result = None
-                if self.groq_enabled.get():
-                    self.update_batch_log(f"Processing with Groq AI: {video_basename}")
-                    
-                    # Process with Groq - pass the video file path for error tracking
-                    success, result = self.groq_api.summarize_transcript(
-                        transcription['text'], system_prompt, video_file
-                    )
-                    
-                    if success:
-                        groq_result = result
-                        self.update_batch_log(f"✓ Groq processing successful: {video_basename}")
-                        
-                        # Write enhanced transcription to file
-                        try:
-                            with open(output_file, "w", encoding="utf-8") as file:
-                                file.write(f"Title: {groq_result['title']}\n\n")
-                                file.write(f"Summary: {groq_result['summary']}\n\n")
-                                file.write("--- Original Transcript ---\n\n")
-                                file.write(transcription['detailed'])
-                            
-                            self.update_batch_log(f"✓ Saved enhanced transcription: {output_basename}")
-                        except Exception as e:
-                            self.update_batch_log(f"✗ Error saving enhanced transcription: {str(e)}")
-                            continue
-                    else:
-                        self.update_batch_log(f"✗ Groq processing issue: {result}")
-                        # Track the file with Groq issues
-                        groq_issues.append((video_file, result))
-                        
-                        # Write original transcription instead
-                        try:
-                            with open(output_file, "w", encoding="utf-8") as file:
-                                file.write(transcription['detailed'])
-                            
-                            self.update_batch_log(f"✓ Saved original transcription: {output_basename}")
-                        except Exception as e:
-                            self.update_batch_log(f"✗ Error saving transcription: {str(e)}")
-                            continue
-                else:
-                    # Write transcription to file without Groq processing
-                    try:
-                        with open(output_file, "w", encoding="utf-8") as file:
-                            file.write(transcription['detailed'])
-                        
-                        self.update_batch_log(f"✓ Saved: {output_basename}")
-                    except Exception as e:
-                        self.update_batch_log(f"✗ Error saving transcription: {str(e)}")
-                        continue
-                    
-                # Add to Notion if enabled
-                if self.notion_enabled.get():
+                # Attach the English translation produced in the same pass
+                if translation_result:
+                    transcription['translation'] = translation_result['text']
+                    transcription['translation_detailed'] = '\n'.join(
+                        f"[{self.format_timestamp(segment['start'])}] {segment['text'].strip()}"
+                        for segment in translation_result['segments']
+                    ) if word_timestamps else translation_result['text']
+        except TranscriptionCancelled:
+            log(f"✗ Canceled while transcribing {video_basename}")
+            raise
+        except Exception as e:
+            log(f"✗ Error transcribing {video_basename}: {str(e)}")
+            job['error'] = e
+            return False
+        
+        if not restored:
+            job_queue.advance(batch_id, job['key'], 'transcribed', transcription=transcription)
+        
+        # Register the clip now (in input order) so later files in this batch find it
+        # deterministically; its Groq summary and Notion link are filled in as they arrive
+        similar = None
+        if not duplicate:
+            similar = transcript_index.find(transcription['text'])
+            if not similar:
+                transcript_index.add(transcription['text'], source=video_file, job=job)
+        
+        job['fingerprint'] = fingerprint
+        job['duplicate'] = duplicate
+        job['origin'] = batch_entries.get(duplicate['id']) if duplicate else None
+        job['similar'] = similar
+        job['transcription'] = transcription
+        
+        entry_id = remember_processed_audio(
+            fingerprint, duplicate, video_file, transcription, output_file=job['output_file'],
+            options=job['match_options']
+        )
+        job['fingerprint_id'] = entry_id
+        if entry_id and not duplicate:
+            batch_entries[entry_id] = job
+        return True
+    
+    def summarize_stage(job):
+        """Groq summary (network bound, several files at once)"""
+        try:
+            transcription = job['transcription']
+            duplicate = job['duplicate']
+            origin = job['origin']
+            similar = job['similar']
+            video_file = job['video_file']
+            
+            if not self.groq_enabled.get() or transcription.get('no_speech'):
+                return True
+            
+            # Summarized before the batch was interrupted
+            if state_reached(job['queue_item']['state'], 'summarized'):
+                job['groq_result'] = job['queue_item']['data'].get('groq_result')
+                job['groq_error'] = job['queue_item']['data'].get('groq_error')
+                return True
+            
+            job['log'](f"Processing with Groq AI: {os.path.basename(video_file)}")
+            
+            if origin:
+                # Repost of a file earlier in this batch - wait for its summary
+                wait_for(origin, 'summarized')
+            if similar:
+                wait_for(similar['job'], 'summarized')
+            
+            if duplicate and duplicate.get('groq_result'):
+                # The original's summary applies to the repost as well
+                success, result = True, duplicate['groq_result']
+            elif origin and origin.get('groq_result'):
+                success, result = True, origin['groq_result']
+            elif similar and similar['job'].get('groq_result'):
+                # Same script as an earlier transcript - skip the LLM round trip
+                job['log'](f"✓ Reusing Groq summary of {os.path.basename(similar['source'])} ({similar['similarity']:.0%} similar transcript)")
+                success, result = True, similar['job']['groq_result']
+            else:
+                # Process with Groq - pass the video file path for error tracking
+                success, result = self.groq_api.summarize_transcript(
+                    summary_input_text(transcription), system_prompt, video_file
+                )
+            
+            if success:
+                job['groq_result'] = result
+                job['log'](f"✓ Groq processing successful: {os.path.basename(video_file)}")
+            else:
+                job['groq_error'] = result
+                job['log'](f"✗ Groq processing issue: {result}")
+                # Track the file with Groq issues
+                groq_issues.append((video_file, result))
+            
+            job_queue.advance(
+                batch_id, job['key'], 'summarized',
+                groq_result=job.get('groq_result'), groq_error=job.get('groq_error')
+            )
+            return True
+        finally:
+            job['summarized'].set()
+    
+    def publish_stage(job):
+        """Write the transcript and translation, then add the Notion page (network bound)"""
+        try:
+            transcription = job['transcription']
+            origin = job['origin']
+            similar = job['similar']
+            output_file = job['output_file']
+            output_basename = os.path.basename(output_file)
+            groq_result = job.get('groq_result')
+            log = job['log']
+            
+            try:
+                with open(output_file, "w", encoding="utf-8") as file:
                     if groq_result:
-                        success, message = self.notion_api.add_transcription_to_notion(
-                            video_file, transcription['detailed'], transcription.get('duration', None), groq_result
-                        )
-                    else:
-                        success, message = self.notion_api.add_transcription_to_notion(
-                            video_file, transcription['detailed'], transcription.get('duration', None)
-                        )
-                        
-                    if success:
-                        self.update_batch_log(f"✓ Added to Notion: {video_basename}")
-                    else:
-                        self.update_batch_log(f"✗ Notion error: {message}")
+                        # Write enhanced transcription to file
+                        file.write(f"Title: {groq_result['title']}\n\n")
+                        file.write(f"Summary: {groq_result['summary']}\n\n")
+                        file.write("--- Original Transcript ---\n\n")
+                    file.write(transcription['detailed'])
                 
-                # Add to processed videos list for auto-deletion
-                if auto_delete_enabled:
-                    processed_videos.append(video_file)
-                    
+                if groq_result:
+                    log(f"✓ Saved enhanced transcription: {output_basename}")
+                elif job.get('groq_error'):
+                    log(f"✓ Saved original transcription: {output_basename}")
+                else:
+                    log(f"✓ Saved: {output_basename}")
             except Exception as e:
-                self.update_batch_log(f"✗ Error transcribing {video_basename}: {str(e)}")
-                continue
+                if groq_result:
+                    log(f"✗ Error saving enhanced transcription: {str(e)}")
+                else:
+                    log(f"✗ Error saving transcription: {str(e)}")
+                return False
             
-            # Clean up audio file if needed
-            if not keep_audio and os.path.exists(audio_file):
-                try:
-                    os.remove(audio_file)
-                except Exception as e:
-                    self.update_batch_log(f"Warning: Could not remove temporary audio file: {str(e)}")
+            # Write the English translation next to the transcript
+            try:
+                translation_file = write_translation(output_file, transcription)
+                if translation_file:
+                    log(f"✓ Saved translation: {os.path.basename(translation_file)}")
+            except Exception as e:
+                log(f"✗ Error saving translation: {str(e)}")
+            
+            # A file linking to an earlier file's Notion page that isn't there yet is
+            # finished in input order by complete_job, instead of holding a worker here
+            linked = [earlier for earlier in (origin, similar['job'] if similar else None) if earlier]
+            if self.notion_enabled.get() and any(
+                not (earlier['published'].is_set() or earlier['skip']) for earlier in linked
+            ):
+                job['publish_later'] = True
+                return True
+            
+            publish_notion(job)
+            return True
+        finally:
+            if not job.get('publish_later'):
+                job['published'].set()
+    
+    def publish_notion(job):
+        """Add the Notion page, then record the file as published"""
+        transcription = job['transcription']
+        duplicate = job['duplicate']
+        origin = job['origin']
+        similar = job['similar']
+        video_file = job['video_file']
+        output_file = job['output_file']
+        groq_result = job.get('groq_result')
+        log = job['log']
+        
+        # Add to Notion if enabled - a repost links to the original's page instead
+        notion_url = None
+        existing_url = (duplicate or {}).get('notion_url') or (origin or {}).get('notion_url') \
+            or job['queue_item']['data'].get('notion_url')
+        if self.notion_enabled.get() and existing_url:
+            notion_url = existing_url
+            log(f"✓ Already in Notion: {notion_url}")
+        elif self.notion_enabled.get() and not transcription.get('no_speech'):
+            related_page_url = similar['job'].get('notion_url') if similar else None
+            if groq_result:
+                success, message = self.notion_api.add_transcription_to_notion(
+                    video_file, transcription['detailed'], transcription.get('duration', None), groq_result,
+                    transcription.get('translation_detailed'),
+                    related_page_url=related_page_url
+                )
+            else:
+                success, message = self.notion_api.add_transcription_to_notion(
+                    video_file, transcription['detailed'], transcription.get('duration', None),
+                    translation_text=transcription.get('translation_detailed'),
+                    related_page_url=related_page_url
+                )
+            
+            if success:
+                notion_url = self.notion_api.last_page_url
+                # Saved at once so a crash before the end of this stage can't create a second page
+                job_queue.update_data(batch_id, job['key'], notion_url=notion_url)
+                log(f"✓ Added to Notion: {os.path.basename(video_file)}")
+            else:
+                log(f"✗ Notion error: {message}")
+        job['notion_url'] = notion_url
+        
+        # Store the summary and page link with the clip's fingerprint
+        remember_processed_audio(
+            job['fingerprint'], duplicate or {'id': job['fingerprint_id']}, video_file, transcription,
+            groq_result, notion_url, output_file
+        )
+        
+        job_queue.advance(batch_id, job['key'], 'published', notion_url=notion_url)
+        if manifest:
+            manifest.record(video_file, output_file)
+        job['completed'] = True
+    
+    def complete_job(job):
+        """Clean up and count a finished file (called in input order)"""
+        video_file = job['video_file']
+        video_basename = os.path.basename(video_file)
+        
+        # Every earlier file is done by now, so the page this one links to exists
+        if job.get('publish_later'):
+            try:
+                publish_notion(job)
+            except Exception as e:
+                job['error'] = e
+                job['log'](f"✗ Error in publish stage for {video_basename}: {str(e)}")
+            finally:
+                job['published'].set()
+        
+        # Clean up audio file if needed
+        if not keep_audio and os.path.exists(job['audio_file']):
+            try:
+                os.remove(job['audio_file'])
+            except Exception as e:
+                job['log'](f"Warning: Could not remove temporary audio file: {str(e)}")
+        
+        if job.get('error'):
+            job_queue.fail(batch_id, job['key'], job['error'])
+        
+        if job.get('cancelled'):
+            return
         
         # Update progress
         self.processed_count += 1
         progress_percent = (self.processed_count / self.total_videos) * 100
         self.batch_progress.set(progress_percent)
+        eta.file_done(video_file)
+        self.update_batch_status(eta.status(self.processed_count, self.total_videos))
         
         # Auto-delete this video if option is enabled and transcription is complete
-        if auto_delete_enabled and video_file in processed_videos:
+        if auto_delete_enabled and job.get('completed'):
+            processed_videos.append(video_file)
             try:
                 if os.path.exists(video_file):
                     os.remove(video_file)
-                    self.update_batch_log(f"✓ Deleted video after processing: {video_basename}")
+                    job['log'](f"✓ Deleted video after processing: {video_basename}")
                     # Remove from list after successful deletion
                     processed_videos.remove(video_file)
             except Exception as e:
-                self.update_batch_log(f"✗ Error deleting video: {video_basename} - {str(e)}")
+                job['log'](f"✗ Error deleting video: {video_basename} - {str(e)}")
+    
+    # Whisper keeps working on the next file while Groq and Notion calls are in flight
+    workers = stage_workers()
+    pipeline = StagePipeline(
+        [
+            Stage("extract", extract_stage, workers["extract"]),
+            Stage("transcribe", transcribe_stage, 1),
+            Stage("summarize", summarize_stage, workers["summarize"]),
+            Stage("publish", publish_stage, workers["publish"])
+        ],
+        self.update_batch_log,
+        should_stop=lambda: not self.is_batch_processing,
+        on_complete=complete_job
+    )
+    
+    jobs = []
+    for video_file in video_files:
+        output_basename = os.path.splitext(os.path.basename(video_file))[0] + "_transcript.txt"
+        jobs.append({
+            'key': os.path.abspath(video_file),
+            'queue_item': queue_items[os.path.abspath(video_file)],
+            'video_file': video_file,
+            'audio_file': os.path.splitext(video_file)[0] + ".wav",
+            'output_file': os.path.join(output_dir, output_basename),
+            'summarized': threading.Event(),
+            'published': threading.Event()
+        })
+    
+    pipeline.run(jobs)
+    
+    if manifest:
+        manifest.save()
+    
+    if self.is_batch_processing:
+        job_queue.finish_batch(batch_id)
+    
     
     # Complete batch processing
     if self.is_batch_processing:
@@ -349,18 +865,21 @@ def batch_transcribe_videos_thread(self, video_files, output_dir):
     else:
         self.update_batch_status(f"Batch processing canceled. Processed {self.processed_count} of {self.total_videos} files.")
     
-    # Reset state and clear model reference to free memory
-    self.whisper_model = None
+    # Reset state and clear model references to free memory
+    unload_models()
+    manager_job.finish(DONE if self.is_batch_processing else CANCELLED)
     self.is_batch_processing = False
     self.root.after(0, lambda: self.batch_cancel_button.config(state=tk.DISABLED))
 
 def cancel_batch_transcription(self):
     """Cancel the batch transcription process"""
     if self.is_batch_processing:
-        # Mark as canceled - thread will clean up
+        # Mark as canceled and stop the current file's ffmpeg/Whisper work immediately
         self.is_batch_processing = False
+        if getattr(self, 'batch_cancel_token', None):
+            self.batch_cancel_token.cancel()
         self.batch_status.set("Canceling batch processing...")
-        messagebox.showinfo("Info", "Batch processing will be canceled after the current file completes.")
+        messagebox.showinfo("Info", "Batch processing has been canceled. The current file was stopped.")
         self.batch_cancel_button.config(state=tk.DISABLED)
 
 def update_batch_log(self, message):
@@ -397,6 +916,10 @@ def integrate_batch_processing(self):
     self.batch_progress = tk.DoubleVar(value=0)
     self.batch_status = tk.StringVar(value="Ready for batch processing")
     self.is_batch_processing = False
+    self.batch_cancel_token = None
+    self.batch_manifest = None
+    self.incremental_var = tk.BooleanVar(value=False)
+    self.batch_order_var = tk.StringVar(value=STRATEGIES[DEFAULT_STRATEGY])
     self.batch_thread = None
     self.processed_count = 0
     self.total_videos = 0
@@ -441,6 +964,12 @@ def integrate_batch_processing(self):
                                  values=list(models.values()), width=15)
     model_combobox.pack(side=tk.LEFT, padx=5)
     
+    # Optional larger model used only for low-confidence segments
+    ttk.Label(model_frame, text="Refine low-confidence parts with:").pack(side=tk.LEFT, padx=5)
+    refine_combobox = ttk.Combobox(model_frame, textvariable=self.refine_model_var, 
+                                  values=["None", "small", "medium", "large"], width=10)
+    refine_combobox.pack(side=tk.LEFT, padx=5)
+    
     # Language selection
     language_frame = ttk.Frame(batch_options_frame)
     language_frame.pack(fill=tk.X, pady=5)
@@ -460,10 +989,42 @@ def integrate_batch_processing(self):
                                     values=list(languages.values()), width=10)
     language_combobox.pack(side=tk.LEFT, padx=5)
     
+    # Processing order
+    order_frame = ttk.Frame(batch_options_frame)
+    order_frame.pack(fill=tk.X, pady=5)
+    
+    ttk.Label(order_frame, text="Processing order:").pack(side=tk.LEFT, padx=5)
+    order_combobox = ttk.Combobox(order_frame, textvariable=self.batch_order_var, 
+                                 values=list(STRATEGIES.values()), width=30, state="readonly")
+    order_combobox.pack(side=tk.LEFT, padx=5)
+    
     # Timestamp checkbox
     ttk.Checkbutton(batch_options_frame, text="Include word-level timestamps", 
                   variable=self.word_timestamps_var).pack(anchor=tk.W, pady=5)
     
+    # Translation checkbox
+    ttk.Checkbutton(batch_options_frame, text="Also create English translations (same encoder pass)", 
+                  variable=self.translate_var).pack(anchor=tk.W, pady=5)
+    
+    # Subtitle and JSON outputs
+    self.create_output_formats_row(batch_options_frame)
+    
+    # Memory admission checkbox
+    ttk.Checkbutton(batch_options_frame, text="Use a smaller model instead of waiting when memory is short", 
+                  variable=self.downgrade_on_memory_var).pack(anchor=tk.W, pady=5)
+    
+    # Incremental mode checkbox
+    ttk.Checkbutton(batch_options_frame, text="Only process new or changed videos (incremental)", 
+                  variable=self.incremental_var).pack(anchor=tk.W, pady=5)
+    
+    # Repost detection checkbox
+    ttk.Checkbutton(batch_options_frame, text="Reuse results for reposted clips (audio fingerprint)", 
+                  variable=self.dedup_reposts_var).pack(anchor=tk.W, pady=5)
+    
+    # Speech triage checkbox
+    ttk.Checkbutton(batch_options_frame, text="Skip clips without speech (music or ambient audio only)", 
+                  variable=self.skip_no_speech_var).pack(anchor=tk.W, pady=5)
+    
     # Keep audio checkbox
     ttk.Checkbutton(batch_options_frame, text="Keep extracted audio files", 
                   variable=self.keep_audio_var).pack(anchor=tk.W, pady=5)
@@ -0,0 +1,99 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+from resource_governor import media_duration
+
+# Batch orderings, by the name stored in the GUI and passed to order_files()
+STRATEGIES = {
+    "longest": "Longest first (throughput)",
+    "shortest": "Shortest first (early results)",
+    "input": "Folder order"
+}
+
+DEFAULT_STRATEGY = "longest"
+
+# ffprobe calls run in parallel; each one mostly waits on process start-up
+PROBE_WORKERS = 8
+
+def strategy_from_label(label):
+    """Strategy name for a GUI label (or a name), defaulting to longest first"""
+    for name, strategy_label in STRATEGIES.items():
+        if label in (name, strategy_label):
+            return name
+    return DEFAULT_STRATEGY
+
+def probe_durations(media_files):
+    """
+    Returns:
+        dict: file -> duration in seconds (None if it could not be probed)
+    """
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        return dict(zip(media_files, executor.map(media_duration, media_files)))
+
+def _estimated(durations):
+    """Durations with unknown values replaced by the mean of the known ones"""
+    known = [duration for duration in durations.values() if duration]
+    fallback = sum(known) / len(known) if known else 0.0
+    return {media_file: duration or fallback for media_file, duration in durations.items()}
+
+def order_files(media_files, durations, strategy=DEFAULT_STRATEGY):
+    """
+    Order a batch for its workers
+    
+    "longest" (LPT) starts the longest files first, so no long file is left
+    running alone at the end while the other workers are idle. "shortest"
+    (SPT) finishes the most files soonest. "input" keeps the given order.
+    Files with an unknown duration count as an average file. Ties keep their
+    input order.
+    """
+    if strategy == "input":
+        return list(media_files)
+    
+    estimated = _estimated({media_file: durations.get(media_file) for media_file in media_files})
+    return sorted(media_files, key=lambda media_file: estimated[media_file], reverse=strategy == "longest")
+
+def completion_times(ordered_durations, workers=1):
+    """
+    Finish time of each job when every job goes to the first free worker
+    (list scheduling - how the batch pipeline hands out its queue)
+    """
+    free_at = [0.0] * max(1, workers)
+    finished = []
+    for duration in ordered_durations:
+        start = heapq.heappop(free_at)
+        heapq.heappush(free_at, start + duration)
+        finished.append(start + duration)
+    return finished
+
+def schedule_estimate(ordered_files, durations, workers=1, seconds_per_audio_second=1.0):
+    """
+    Expected timing of a batch in the given order
+    
+    Parameters:
+        ordered_files (list): Files in processing order
+        durations (dict): file -> duration in seconds (None if unknown)
+        workers (int): Files processed at once
+        seconds_per_audio_second (float): Processing time per second of audio
+            (1.0 reports the schedule in seconds of audio)
+    
+    Returns:
+        dict: makespan, first_result and mean_completion in seconds
+    """
+    estimated = _estimated({media_file: durations.get(media_file) for media_file in ordered_files})
+    finished = completion_times(
+        [estimated[media_file] * seconds_per_audio_second for media_file in ordered_files], workers
+    )
+    
+    if not finished:
+        return {"makespan": 0.0, "first_result": 0.0, "mean_completion": 0.0}
+    
+    return {
+        "makespan": max(finished),
+        "first_result": min(finished),
+        "mean_completion": sum(finished) / len(finished)
+    }
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS"""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,198 @@
+import subprocess
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+class TranscriptionCancelled(Exception):
+    """Raised inside a worker thread when its cancellation token has been triggered"""
+    pass
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag shared between the UI and a worker thread.
+    
+    Cancelling the token kills any subprocess registered with it (e.g. ffmpeg)
+    and makes Whisper stop at the next encoder/decoder step when the model is
+    wrapped with cancellable_whisper().
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = []
+    
+    def cancel(self):
+        """Mark the token as canceled and kill any registered subprocess"""
+        self._event.set()
+        
+        with self._lock:
+            processes = list(self._processes)
+        
+        for process in processes:
+            _kill_process(process)
+    
+    @property
+    def is_cancelled(self):
+        """True once cancel() has been called"""
+        return self._event.is_set()
+    
+    def raise_if_cancelled(self):
+        """Raise TranscriptionCancelled if the token has been canceled"""
+        if self._event.is_set():
+            raise TranscriptionCancelled("Operation canceled")
+    
+    def register_process(self, process):
+        """Track a running subprocess so cancel() can kill it"""
+        with self._lock:
+            self._processes.append(process)
+        
+        # The token may have been canceled while the process was starting
+        if self._event.is_set():
+            _kill_process(process)
+    
+    def unregister_process(self, process):
+        """Stop tracking a subprocess once it has exited"""
+        with self._lock:
+            if process in self._processes:
+                self._processes.remove(process)
+
+def _kill_process(process):
+    """Kill a subprocess if it is still running"""
+    try:
+        if process.poll() is None:
+            process.kill()
+    except Exception as e:
+        print(f"Error killing process: {str(e)}")
+
+def run_cancellable(command, cancel_token=None):
+    """
+    Run a command like subprocess.run(..., check=True) but kill it when the token is canceled
+    
+    Parameters:
+        command (list): Command and arguments to execute
+        cancel_token (CancellationToken, optional): Token that can abort the command
+    
+    Returns:
+        subprocess.CompletedProcess: The finished process
+    
+    Raises:
+        TranscriptionCancelled: If the token was canceled while the command was running
+        subprocess.CalledProcessError: If the command exited with a non-zero status
+        FileNotFoundError: If the executable could not be found
+    """
+    if cancel_token:
+        cancel_token.raise_if_cancelled()
+    
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    if cancel_token:
+        cancel_token.register_process(process)
+    
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        if cancel_token:
+            cancel_token.unregister_process(process)
+    
+    if cancel_token and cancel_token.is_cancelled:
+        raise TranscriptionCancelled("Operation canceled")
+    
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+# Per-thread callback invoked by Whisper's progress bar after each decoded window
+_window_state = threading.local()
+_window_hook_installed = False
+_window_hook_lock = threading.Lock()
+
+def _install_window_hook():
+    """
+    Replace the tqdm reference in whisper.transcribe with a subclass that reports
+    every finished 30-second window (and its new segments) to the callbacks
+    registered for the current thread
+    """
+    global _window_hook_installed
+    
+    with _window_hook_lock:
+        if _window_hook_installed:
+            return
+        
+        import tqdm as tqdm_module
+        import whisper.transcribe as whisper_transcribe
+        
+        class WindowProgressTqdm(tqdm_module.tqdm):
+            def update(self, n=1):
+                result = super().update(n)
+                
+                # tqdm does not count when disabled (verbose=False), so keep our own total
+                self._frames_done = getattr(self, "_frames_done", 0) + (n or 0)
+                
+                # whisper.transcribe adds a window's segments to all_segments before updating the bar
+                segment_callback = getattr(_window_state, "segment_callback", None)
+                if segment_callback:
+                    segments = sys._getframe(1).f_locals.get("all_segments", [])
+                    for segment in segments[getattr(self, "_segments_done", 0):]:
+                        segment_callback(segment)
+                    self._segments_done = len(segments)
+                
+                callback = getattr(_window_state, "callback", None)
+                if callback:
+                    callback(self._frames_done, self.total)
+                
+                return result
+        
+        whisper_transcribe.tqdm = types.SimpleNamespace(tqdm=WindowProgressTqdm)
+        _window_hook_installed = True
+
+@contextmanager
+def cancellable_whisper(model, cancel_token=None, window_callback=None, segment_callback=None):
+    """
+    Make a Whisper model stop promptly when the token is canceled
+    
+    The token is checked before every encoder pass and every decoder step, so a
+    canceled job frees the CPU/GPU within one decoding step instead of running
+    to the end of the file.
+    
+    Parameters:
+        model: Loaded Whisper model
+        cancel_token (CancellationToken, optional): Token to check
+        window_callback (function, optional): Called as callback(frames_done, total_frames)
+            after each decoded window
+        segment_callback (function, optional): Called with each segment as soon as
+            model.transcribe() has decoded its window
+    """
+    handles = []
+    previous_callback = getattr(_window_state, "callback", None)
+    previous_segment_callback = getattr(_window_state, "segment_callback", None)
+    
+    def check_cancelled(module, inputs):
+        cancel_token.raise_if_cancelled()
+    
+    def on_window(frames_done, total_frames):
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        if window_callback:
+            window_callback(frames_done, total_frames)
+    
+    try:
+        if cancel_token:
+            for submodule in (getattr(model, "encoder", None), getattr(model, "decoder", None)):
+                if submodule is not None:
+                    handles.append(submodule.register_forward_pre_hook(check_cancelled))
+        
+        try:
+            _install_window_hook()
+            _window_state.callback = on_window
+            _window_state.segment_callback = segment_callback
+        except ImportError:
+            # Window progress is optional; the forward hooks still handle cancellation
+            pass
+        
+        yield model
+    finally:
+        _window_state.callback = previous_callback
+        _window_state.segment_callback = previous_segment_callback
+        for handle in handles:
+            handle.remove()
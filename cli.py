@@ -0,0 +1,474 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+from job_queue import DB_ENV_VAR, DEFAULT_LEASE_SECONDS
+from transcript_writers import WRITERS, FORMATS_ENV_VAR, parse_formats, default_formats
+
+# Exit statuses
+EXIT_OK = 0             # every file was transcribed (or had no speech)
+EXIT_PARTIAL = 1        # some files failed
+EXIT_USAGE = 2          # bad arguments, missing input or unconfigured Groq/Notion
+EXIT_FAILED = 3         # nothing could be processed (model failed to load, every file failed)
+EXIT_INTERRUPTED = 130  # stopped with Ctrl+C
+
+class Reporter:
+    """Progress output: readable lines, or one JSON object per line with --json"""
+    def __init__(self, json_output=False, total=0):
+        self.json_output = json_output
+        self.total = total
+        self.finished = 0
+        self.lock = threading.Lock()
+    
+    def emit(self, event, **fields):
+        with self.lock:
+            print(json.dumps(dict(event=event, time=round(time.time(), 3), **fields), ensure_ascii=False), flush=True)
+    
+    def log(self, message):
+        if self.json_output:
+            self.emit("log", message=message)
+        else:
+            print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+    
+    def result(self, result):
+        self.finished += 1
+        if self.json_output:
+            self.emit("result", finished=self.finished, total=self.total, **result)
+        else:
+            progress = f"{self.finished}/{self.total}" if self.total else str(self.finished)
+            print(f"[{time.strftime('%H:%M:%S')}] Progress: {progress} ({result['status']})", flush=True)
+    
+    def summary(self, counts, exit_code):
+        if self.json_output:
+            self.emit("summary", total=self.total, exit_code=exit_code, **counts)
+        else:
+            print(
+                f"Done: {counts['done']} transcribed, {counts['no_speech']} without speech, "
+                f"{counts['failed']} failed, {counts['cancelled']} canceled (of {self.total})",
+                flush=True
+            )
+
+def read_url_file(url_file):
+    """Instagram post, reel and TV URLs in a text file (one per line)"""
+    with open(url_file, "r") as file:
+        urls = [line.strip() for line in file if line.strip()]
+    return [url for url in urls if "instagram.com" in url and ("/p/" in url or "/reel/" in url or "/tv/" in url)]
+
+def folder_jobs(args, processor, reporter):
+    """Jobs, job-queue batch and manifest for `batch DIR`; None if there is nothing to do"""
+    from headless_batch import video_files_in, transcript_path
+    from batch_scheduler import probe_durations, order_files
+    from incremental_manifest import IncrementalManifest
+    from job_queue import get_job_queue
+    
+    output_dir = os.path.abspath(args.output or os.path.join(args.input, "transcripts"))
+    video_files = video_files_in(args.input)
+    if not video_files:
+        reporter.log(f"No video files found in {args.input}")
+        return None
+    
+    manifest = None
+    if args.incremental:
+        manifest = IncrementalManifest(output_dir, processor.options())
+        video_files, skipped_count = manifest.filter_changed(video_files)
+        if skipped_count:
+            reporter.log(f"Skipping {skipped_count} unchanged videos")
+    
+    durations = probe_durations(video_files)
+    video_files = order_files(video_files, durations, args.order)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    job_queue = get_job_queue()
+    batch_id, resumed = job_queue.open_batch(
+        "folder", os.path.abspath(args.input), output_dir,
+        [os.path.abspath(video_file) for video_file in video_files], options=processor.options()
+    )
+    queue_items = job_queue.items(batch_id)
+    
+    jobs = []
+    for video_file in video_files:
+        item = queue_items[os.path.abspath(video_file)]
+        if item['state'] == 'published':
+            continue
+        jobs.append({
+            'key': os.path.abspath(video_file),
+            'queue_item': item,
+            'video_file': video_file,
+            'output_file': transcript_path(video_file, output_dir)
+        })
+    
+    if resumed:
+        reporter.log(f"Resuming interrupted batch - {len(video_files) - len(jobs)} of {len(video_files)} files were already done")
+    return jobs, batch_id, manifest
+
+def instagram_jobs(args, processor, reporter):
+    """Jobs and job-queue batch for `instagram URLS.txt`; None if there is nothing to do"""
+    from job_queue import get_job_queue, urls_source
+    
+    urls = list(dict.fromkeys(read_url_file(args.input)))
+    if not urls:
+        reporter.log(f"No valid Instagram URLs found in {args.input}")
+        return None
+    
+    download_dir = os.path.abspath(args.output or os.getcwd())
+    os.makedirs(download_dir, exist_ok=True)
+    job_queue = get_job_queue()
+    batch_id, resumed = job_queue.open_batch("instagram", urls_source(urls), download_dir, urls)
+    queue_items = job_queue.items(batch_id)
+    
+    jobs = []
+    for url in urls:
+        if queue_items[url]['state'] == 'published':
+            continue
+        jobs.append({
+            'key': url,
+            'queue_item': queue_items[url],
+            'url': url,
+            'video_file': url,
+            'download_dir': download_dir
+        })
+    
+    if resumed:
+        reporter.log(f"Resuming interrupted Instagram batch - {len(urls) - len(jobs)} of {len(urls)} URLs were already done")
+    return jobs, batch_id, None
+
+def replay_jobs(args, processor, reporter):
+    """Jobs and job-queue batch for `replay DIR`; None if there is nothing to do"""
+    from transcript_replay import transcript_files_in, replay_jobs as transcript_jobs
+    from job_queue import get_job_queue
+    
+    if os.path.isdir(args.input):
+        transcript_files = transcript_files_in(args.input)
+    else:
+        transcript_files = [args.input]
+    if not transcript_files:
+        reporter.log(f"No *_transcript.txt files found in {args.input}")
+        return None
+    
+    job_queue = get_job_queue()
+    source = os.path.abspath(args.input)
+    batch_id, resumed = job_queue.open_batch(
+        "replay", source, source, [os.path.abspath(transcript_file) for transcript_file in transcript_files]
+    )
+    queue_items = job_queue.items(batch_id)
+    
+    jobs = []
+    for job in transcript_jobs(transcript_files, args.videos and [args.videos]):
+        item = queue_items[job['key']]
+        if item['state'] == 'published':
+            continue
+        job['queue_item'] = item
+        if processor.notion_api and not args.keep_old_pages:
+            # The page of the last transcription or replay of this video
+            job['replaces_notion_url'] = job_queue.latest_value(
+                [os.path.abspath(job['video_file']), job['key']], 'notion_url'
+            )
+        jobs.append(job)
+    
+    if resumed:
+        reporter.log(f"Resuming interrupted replay - {len(transcript_files) - len(jobs)} of {len(transcript_files)} transcripts were already done")
+    return jobs, batch_id, None
+
+def formats_argument(value):
+    """argparse type for --formats"""
+    try:
+        return parse_formats(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def finish_batch(batch_id):
+    """Close a completed batch so the next run over the same input starts fresh"""
+    from job_queue import get_job_queue
+    get_job_queue().finish_batch(batch_id)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Headless batch transcription (no Tk or Gradio needed)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    batch = commands.add_parser("batch", help="Transcribe every video in a folder")
+    batch.add_argument("input", help="Folder with video files (including subfolders)")
+    batch.add_argument("-o", "--output", help="Transcript folder (default: <folder>/transcripts)")
+    batch.add_argument("--order", choices=["longest", "shortest", "input"], default="longest",
+                       help="Processing order by duration (default: longest first)")
+    batch.add_argument("--incremental", action="store_true", help="Skip videos unchanged since their last transcription")
+    
+    instagram = commands.add_parser("instagram", help="Download and transcribe Instagram URLs from a text file")
+    instagram.add_argument("input", help="Text file with one Instagram URL per line")
+    instagram.add_argument("-o", "--output", help="Folder for the videos and transcripts (default: current folder)")
+    instagram.add_argument("--delete-videos", action="store_true", help="Delete each video after it is transcribed")
+    
+    enqueue = commands.add_parser("enqueue", help="Add a folder or URL file to the shared queue for worker processes")
+    enqueue.add_argument("input", help="Folder with video files, or text file with Instagram URLs")
+    enqueue.add_argument("-o", "--output", help="Transcript folder every worker can reach "
+                                                "(default: <folder>/transcripts, or the current folder for URLs)")
+    
+    worker = commands.add_parser("worker", help="Transcribe items from the shared queue")
+    worker.add_argument("--worker-id", help="Name used in leases and logs (default: host:pid)")
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help=f"Seconds before a crashed worker's items are handed out again (default: {DEFAULT_LEASE_SECONDS:g})")
+    worker.add_argument("--prefetch", type=int, default=2, help="Items leased at once (default: 2)")
+    worker.add_argument("--exit-when-empty", action="store_true", help="Exit once every queued item is done")
+    
+    autotune = commands.add_parser("autotune", help="Measure the fastest worker and thread counts on sample audio "
+                                                    "and save them for batch and web runs")
+    autotune.add_argument("samples", nargs="+", help="A few typical local video or audio files, or a folder of videos")
+    autotune.add_argument("-m", "--model", default="base", help="Whisper model to tune for (default: base)")
+    autotune.add_argument("-l", "--language", default=None, help="Language code (default: detect)")
+    autotune.add_argument("--max-workers", type=int, help="Largest number of parallel workers to try")
+    autotune.add_argument("--seconds", type=float, default=30.0, help="Seconds of audio used from each sample (default: 30)")
+    
+    replay = commands.add_parser("replay", help="Re-run Groq and Notion for existing transcripts without Whisper")
+    replay.add_argument("input", help="Folder with *_transcript.txt files (including subfolders), or one transcript")
+    replay.add_argument("--videos", help="Folder with the original videos if they aren't next to the transcripts "
+                                         "or in their parent folder")
+    replay.add_argument("--keep-old-pages", action="store_true",
+                        help="Don't archive the Notion pages created by earlier runs")
+    replay.add_argument("--groq", action="store_true", help="Write a new Groq title and summary (saved Groq settings)")
+    replay.add_argument("--notion", action="store_true", help="Create new Notion pages (saved Notion settings)")
+    
+    for command in (batch, instagram, enqueue):
+        command.add_argument("-m", "--model", default="base", help="Whisper model (default: base)")
+        command.add_argument("-l", "--language", default=None, help="Language code (default: detect)")
+        command.add_argument("--timestamps", action="store_true", help="Include segment timestamps")
+        command.add_argument("--groq", action="store_true", help="Add a Groq title and summary (saved Groq settings)")
+        command.add_argument("--notion", action="store_true", help="Add transcripts to Notion (saved Notion settings)")
+        command.add_argument("--formats", type=formats_argument, default=default_formats(),
+                             help=f"Also write these formats next to each transcript, e.g. srt,vtt "
+                                  f"({', '.join(sorted(WRITERS))}; default: ${FORMATS_ENV_VAR})")
+    
+    for command in (enqueue, worker):
+        command.add_argument("--db", help=f"Shared queue database, e.g. on a network share (default: ${DB_ENV_VAR} "
+                                          "or ~/.videotranscriber/jobs.db)")
+    
+    for command in (batch, instagram, enqueue, worker, autotune, replay):
+        command.add_argument("--json", action="store_true", help="Report progress as JSON lines on stdout")
+    
+    return parser
+
+def run_interruptible(target, stop, abort, reporter):
+    """
+    Run target() on a thread; the first Ctrl+C calls stop() so the items in
+    progress finish, a second one calls abort()
+    
+    Returns:
+        bool: True if the run was interrupted
+    """
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    
+    interrupted = False
+    while thread.is_alive():
+        try:
+            thread.join(0.5)
+        except KeyboardInterrupt:
+            if interrupted:
+                reporter.log("Aborting the items in progress...")
+                abort()
+            else:
+                interrupted = True
+                reporter.log("Stopping - finishing the items in progress (Ctrl+C again to abort)...")
+                stop()
+    return interrupted
+
+def run_enqueue(args, reporter):
+    """`enqueue`: add a folder or URL file to the shared queue"""
+    from headless_batch import HeadlessProcessor
+    from queue_worker import enqueue
+    
+    # The same settings check the workers will do, so mistakes show up here
+    try:
+        options = HeadlessProcessor(
+            args.model, args.language, args.timestamps, args.groq, args.notion, output_formats=args.formats
+        ).options()
+    except ValueError as e:
+        reporter.log(str(e))
+        return EXIT_USAGE
+    
+    if os.path.isdir(args.input):
+        batch_id, count = enqueue(args.input, args.output or os.path.join(args.input, "transcripts"), options)
+    elif os.path.isfile(args.input):
+        urls = list(dict.fromkeys(read_url_file(args.input)))
+        if not urls:
+            reporter.log(f"No valid Instagram URLs found in {args.input}")
+            return EXIT_USAGE
+        batch_id, count = enqueue(args.input, args.output or os.getcwd(), options, urls)
+    else:
+        reporter.log(f"Input not found: {args.input}")
+        return EXIT_USAGE
+    
+    if args.json:
+        reporter.emit("enqueued", batch_id=batch_id, items=count)
+    else:
+        reporter.log(f"Queued batch {batch_id} with {count} items")
+    return EXIT_OK if count else EXIT_USAGE
+
+def run_worker(args, reporter):
+    """`worker`: process shared-queue items until stopped"""
+    from queue_worker import QueueWorker
+    
+    worker = QueueWorker(
+        args.worker_id, args.lease, args.prefetch, args.exit_when_empty,
+        log=reporter.log, on_result=reporter.result
+    )
+    outcome = {}
+    
+    def run():
+        try:
+            worker.run()
+        except Exception as e:
+            outcome["error"] = e
+    
+    interrupted = run_interruptible(run, worker.stop, lambda: worker.stop(cancel_current=True), reporter)
+    
+    counts = dict(worker.counts)
+    reporter.total = sum(counts.values())
+    if "error" in outcome and not interrupted:
+        reporter.log(f"✗ Worker failed: {str(outcome['error'])}")
+        exit_code = EXIT_FAILED
+    elif interrupted:
+        exit_code = EXIT_INTERRUPTED
+    else:
+        exit_code = EXIT_PARTIAL if counts["failed"] else EXIT_OK
+    
+    reporter.summary(counts, exit_code)
+    return exit_code
+
+def run_autotune(args, reporter):
+    """`autotune`: calibrate worker, torch and ffmpeg thread counts on sample files"""
+    from headless_batch import video_files_in
+    from autotune import calibrate, TUNING_FILE
+    
+    sample_files = []
+    for sample in args.samples:
+        if os.path.isdir(sample):
+            sample_files.extend(video_files_in(sample))
+        elif os.path.isfile(sample):
+            sample_files.append(sample)
+        else:
+            reporter.log(f"Sample not found: {sample}")
+            return EXIT_USAGE
+    if not sample_files:
+        reporter.log("No video files found in the sample folders")
+        return EXIT_USAGE
+    
+    try:
+        tuning = calibrate(sample_files, args.model, args.language, args.max_workers, args.seconds, log=reporter.log)
+    except ValueError as e:
+        reporter.log(str(e))
+        return EXIT_FAILED
+    
+    if args.json:
+        reporter.emit("tuned", **tuning)
+    else:
+        reporter.log(f"Best for {tuning['model']} on {tuning['device']}: {tuning['workers']} workers x "
+                     f"{tuning['torch_threads']} torch threads, ffmpeg -threads {tuning['ffmpeg_threads']} "
+                     f"({tuning['audio_per_second']:.1f} seconds of audio per second)")
+        reporter.log(f"Saved to {TUNING_FILE}")
+    return EXIT_OK
+
+def main(argv=None):
+    """
+    Command-line entry point for `batch`, `instagram`, `replay`, `enqueue`, `worker` and `autotune` runs
+    
+    Returns:
+        int: Exit status (EXIT_OK, EXIT_PARTIAL, EXIT_USAGE, EXIT_FAILED or EXIT_INTERRUPTED)
+    """
+    args = build_parser().parse_args(argv)
+    reporter = Reporter(args.json)
+    
+    if getattr(args, "db", None):
+        os.environ[DB_ENV_VAR] = os.path.abspath(args.db)
+    if args.command == "enqueue":
+        return run_enqueue(args, reporter)
+    if args.command == "worker":
+        return run_worker(args, reporter)
+    if args.command == "autotune":
+        return run_autotune(args, reporter)
+    
+    if args.command == "batch" and not os.path.isdir(args.input):
+        reporter.log(f"Folder not found: {args.input}")
+        return EXIT_USAGE
+    if args.command == "instagram" and not os.path.isfile(args.input):
+        reporter.log(f"URL file not found: {args.input}")
+        return EXIT_USAGE
+    if args.command == "replay":
+        if not os.path.exists(args.input):
+            reporter.log(f"Transcripts not found: {args.input}")
+            return EXIT_USAGE
+        if not args.groq and not args.notion:
+            reporter.log("Nothing to replay - add --groq and/or --notion")
+            return EXIT_USAGE
+    
+    from headless_batch import HeadlessProcessor
+    
+    try:
+        processor = HeadlessProcessor(
+            getattr(args, "model", "base"), getattr(args, "language", None), getattr(args, "timestamps", False),
+            args.groq, args.notion,
+            delete_videos=getattr(args, "delete_videos", False),
+            log=reporter.log, on_result=reporter.result, output_formats=getattr(args, "formats", None)
+        )
+    except ValueError as e:
+        reporter.log(str(e))
+        return EXIT_USAGE
+    
+    prepare = {"batch": folder_jobs, "instagram": instagram_jobs, "replay": replay_jobs}[args.command]
+    prepared = prepare(args, processor, reporter)
+    if prepared is None:
+        return EXIT_USAGE
+    jobs, batch_id, manifest = prepared
+    
+    reporter.total = len(jobs)
+    if not jobs:
+        reporter.log("Nothing to do - every item was already processed")
+        finish_batch(batch_id)
+        reporter.summary(dict(processor.counts), EXIT_OK)
+        return EXIT_OK
+    
+    units = {"batch": "files", "instagram": "URLs", "replay": "transcripts"}[args.command]
+    reporter.log(f"Processing {len(jobs)} {units}")
+    
+    stop_event = threading.Event()
+    outcome = {}
+    
+    def run():
+        try:
+            if args.command == "replay":
+                processor.replay(jobs, batch_id, should_stop=stop_event.is_set)
+            else:
+                processor.run(jobs, manifest, batch_id, should_stop=stop_event.is_set)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            processor.close()
+    
+    interrupted = run_interruptible(run, stop_event.set, processor.cancel, reporter)
+    
+    if "error" in outcome and not interrupted:
+        reporter.log(f"✗ Batch failed: {str(outcome['error'])}")
+        reporter.summary(dict(processor.counts), EXIT_FAILED)
+        return EXIT_FAILED
+    
+    counts = dict(processor.counts)
+    finished = counts["done"] + counts["no_speech"]
+    if interrupted or finished + counts["failed"] < len(jobs):
+        exit_code = EXIT_INTERRUPTED
+    elif counts["failed"] == 0:
+        finish_batch(batch_id)
+        exit_code = EXIT_OK
+    else:
+        # The batch stays open, so running the same command again retries only the failed items
+        reporter.log("Run the same command again to retry the failed items")
+        exit_code = EXIT_PARTIAL if finished else EXIT_FAILED
+    
+    reporter.summary(counts, exit_code)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
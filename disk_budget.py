@@ -0,0 +1,132 @@
+import os
+import shutil
+import threading
+
+from cancellation import TranscriptionCancelled
+
+BUDGET_ENV_VAR = "VIDEOTRANSCRIBER_DISK_BUDGET_MB"
+
+# Downloaded media waiting for transcription before downloads pause
+DEFAULT_BUDGET_MB = 2048
+
+# Downloads also pause when the disk has less than this left
+MIN_FREE_MB = 1024
+
+def default_budget_mb():
+    """
+    Disk budget for downloaded media waiting for transcription in MB
+    
+    Uses the VIDEOTRANSCRIBER_DISK_BUDGET_MB environment variable if set,
+    otherwise 2 GB.
+    """
+    configured = os.environ.get(BUDGET_ENV_VAR)
+    if configured:
+        try:
+            return int(configured)
+        except ValueError:
+            print(f"Ignoring invalid {BUDGET_ENV_VAR} value: {configured}")
+    return DEFAULT_BUDGET_MB
+
+def free_disk_mb(directory):
+    """Free space on the disk holding directory in MB, or None if unknown"""
+    try:
+        return shutil.disk_usage(directory).free / (1024 * 1024)
+    except OSError:
+        return None
+
+class DiskBudget:
+    """
+    Backpressure between a downloader and the transcription consuming its files.
+    
+    The downloader calls wait_for_room() before each download and add() for
+    every file it hands to transcription; the consumer calls release() once a
+    file is transcribed (and deleted, with auto-delete). Downloads pause while
+    the files still waiting take more than the budget or the disk is nearly
+    full, and resume as soon as transcription frees enough.
+    """
+    def __init__(self, directory, budget_mb=None, min_free_mb=MIN_FREE_MB, poll_interval=2.0):
+        self.directory = directory
+        self.budget_mb = budget_mb if budget_mb is not None else default_budget_mb()
+        self.min_free_mb = min_free_mb
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._releases = 0
+    
+    @property
+    def pending_mb(self):
+        """Size of the files waiting for transcription in MB"""
+        with self._condition:
+            return sum(self._pending.values()) / (1024 * 1024)
+    
+    @property
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+    
+    def add(self, path):
+        """Count a downloaded file against the budget until it is released"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._condition:
+            self._pending[path] = size
+    
+    def release(self, path):
+        """The consumer is done with a file; wakes a paused downloader (safe to call twice)"""
+        with self._condition:
+            self._pending.pop(path, None)
+            self._releases += 1
+            self._condition.notify_all()
+    
+    def _blocked(self):
+        """Why the next download has to wait, or None (caller holds the lock)"""
+        pending_mb = sum(self._pending.values()) / (1024 * 1024)
+        if self.budget_mb and pending_mb >= self.budget_mb:
+            return f"{len(self._pending)} videos ({pending_mb:.0f} MB) waiting for transcription"
+        
+        free_mb = free_disk_mb(self.directory)
+        if free_mb is not None and free_mb < self.min_free_mb:
+            return f"only {free_mb:.0f} MB free on disk"
+        return None
+    
+    def wait_for_room(self, cancel_token=None, on_wait=None):
+        """
+        Block until the next download fits in the budget
+        
+        Only waits while files are pending - when nothing is left to
+        transcribe, waiting wouldn't free anything, so the download proceeds.
+        
+        Parameters:
+            cancel_token (CancellationToken, optional): Token checked while waiting
+            on_wait (function, optional): Called with a message when the downloads pause
+                (never while the budget's lock is held)
+        
+        Returns:
+            bool: True if the downloads had to pause
+        
+        Raises:
+            TranscriptionCancelled: If the token is canceled while waiting
+        """
+        paused = False
+        
+        while True:
+            with self._condition:
+                if cancel_token and cancel_token.is_cancelled:
+                    raise TranscriptionCancelled("Operation canceled")
+                
+                reason = self._blocked() if self._pending else None
+                if reason is None:
+                    return paused
+                releases = self._releases
+            
+            if not paused:
+                paused = True
+                if on_wait:
+                    on_wait(f"Downloads paused: {reason}")
+            
+            # Wake up on release(), or poll for cancellation and disk space freed elsewhere
+            with self._condition:
+                if self._releases == releases:
+                    self._condition.wait(self.poll_interval)
@@ -0,0 +1,638 @@
+import os
+import time
+import queue
+import shutil
+import tempfile
+import subprocess
+
+from cancellation import CancellationToken, run_cancellable, cancellable_whisper
+from transcript_cache import get_transcript_cache, cache_enabled_by_default, audio_content_hash, transcription_options, used_options
+from speech_triage import triage_audio, no_speech_transcription, triage_enabled_by_default
+from resource_governor import get_governor, media_duration
+from batch_pipeline import StagePipeline, Stage, stage_workers
+from job_queue import get_job_queue, state_reached
+from metadata_store import get_metadata_store
+from live_transcription import format_timestamp
+from transcription_server import get_server_client
+from selective_retranscription import refine_low_confidence_segments
+from batch_planner import get_speed_profile
+from autotune import tuned_settings, set_torch_threads, ffmpeg_thread_args
+from transcript_writers import write_transcript_formats, open_writers
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm')
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".videotranscriber")
+
+def is_video_file(path):
+    """True for a video file name that isn't hidden (partial downloads are usually dotfiles)"""
+    name = os.path.basename(path)
+    return not name.startswith(".") and name.lower().endswith(VIDEO_EXTENSIONS)
+
+def video_files_in(directory):
+    """All video files under a folder"""
+    video_files = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if is_video_file(file):
+                video_files.append(os.path.join(root, file))
+    return video_files
+
+def load_saved_settings():
+    """
+    Notion and Groq settings saved by the desktop app or web UI
+    
+    Returns:
+        dict: notion_token, notion_database_id, groq_api_key and groq_system_prompt (None when not set)
+    """
+    settings = {
+        "notion_token": None,
+        "notion_database_id": None,
+        "groq_api_key": None,
+        "groq_system_prompt": None
+    }
+    
+    try:
+        with open(os.path.join(CONFIG_DIR, "notion_config.txt"), "r") as f:
+            lines = f.readlines()
+        if len(lines) >= 2:
+            settings["notion_token"] = lines[0].strip()
+            settings["notion_database_id"] = lines[1].strip()
+    except OSError:
+        pass
+    
+    try:
+        with open(os.path.join(CONFIG_DIR, "groq_config.txt"), "r") as f:
+            parts = f.read().split("\n", 1)
+        settings["groq_api_key"] = parts[0].strip() or None
+        settings["groq_system_prompt"] = parts[1].strip() if len(parts) > 1 and parts[1].strip() else None
+    except OSError:
+        pass
+    
+    return settings
+
+def transcript_path(video_file, output_dir=None):
+    """Transcript file of a video: in output_dir if given, else next to the video"""
+    output_basename = os.path.splitext(os.path.basename(video_file))[0] + "_transcript.txt"
+    return os.path.join(output_dir or os.path.dirname(video_file), output_basename)
+
+class HeadlessProcessor:
+    """
+    Batch transcription without a GUI (command line, watch mode, pipeline engine).
+    
+    Runs jobs through the same stages as the desktop batch - Instagram
+    download, audio extraction, Whisper, Groq and writing the transcript plus
+    the Notion page - on a StagePipeline, with one resident Whisper model
+    (one per worker when `autotune` found several workers faster, or the
+    transcription server). Groq and Notion use the settings saved by
+    the desktop app or web UI unless configured integrations are passed in.
+    With a job-queue batch every finished stage is recorded, so an
+    interrupted run resumes where it stopped.
+    """
+    def __init__(self, model_name="base", language=None, word_timestamps=False, groq_enabled=False,
+                 notion_enabled=False, delete_videos=False, log=print, on_result=None, refine_model_name=None,
+                 use_server=False, allow_downgrade=False, groq_api=None, notion_api=None, output_formats=None):
+        """
+        Parameters:
+            model_name (str): Whisper model kept loaded for the whole run
+            language (str, optional): Language code; detected per file if None
+            word_timestamps (bool): Write segment timestamps into the transcripts
+            groq_enabled (bool): Add a Groq title and summary
+            notion_enabled (bool): Add each transcript to Notion
+            delete_videos (bool): Delete each video once its transcript is saved (a job's
+                "delete_video" overrides it)
+            log (function): Writes one log line
+            on_result (function, optional): Called with a result dict for each finished job, in input order
+            refine_model_name (str, optional): Larger model for low-confidence segments
+            use_server (bool): Transcribe in the background transcription server when it is reachable
+            allow_downgrade (bool): Load a smaller model instead of waiting when memory is short
+            groq_api (GroqIntegration, optional): Configured integration instead of the saved settings
+            notion_api (NotionIntegration, optional): Configured integration instead of the saved settings
+            output_formats (list, optional): Extra formats written next to each transcript
+                ("srt", "vtt", "tsv", "json" - see transcript_writers)
+        
+        Raises:
+            ValueError: If Groq or Notion is enabled but not configured
+        """
+        self.model_name = model_name
+        if not refine_model_name or refine_model_name in ("None", model_name):
+            refine_model_name = None
+        self.refine_model_name = refine_model_name
+        self.use_server = use_server
+        self.allow_downgrade = allow_downgrade
+        self.language = language
+        self.word_timestamps = word_timestamps
+        self.output_formats = list(output_formats or [])
+        self.delete_videos = delete_videos
+        self.log = log
+        self.on_result = on_result
+        
+        self.groq_api = None
+        self.notion_api = None
+        settings = load_saved_settings()
+        if groq_enabled:
+            if groq_api and groq_api.api_key:
+                self.groq_api = groq_api
+            elif settings["groq_api_key"]:
+                from groq_integration import GroqIntegration
+                self.groq_api = GroqIntegration(settings["groq_api_key"])
+            else:
+                raise ValueError("Groq is enabled but no API key is saved. Configure it in the app first.")
+        if notion_enabled:
+            if notion_api and notion_api.token and notion_api.database_id:
+                self.notion_api = notion_api
+            elif settings["notion_token"] and settings["notion_database_id"]:
+                from notion_integration import NotionIntegration
+                self.notion_api = NotionIntegration(settings["notion_token"], settings["notion_database_id"])
+            else:
+                raise ValueError("Notion is enabled but not configured. Configure it in the app first.")
+        
+        self.cache = get_transcript_cache() if cache_enabled_by_default() else None
+        self.skip_no_speech = triage_enabled_by_default()
+        self.cancel_token = CancellationToken()
+        self.instaloader_api = None
+        self.model = None
+        self.refine_model = None
+        self.server_client = None
+        self.device = "cpu"
+        self.reservation = None
+        self.models = queue.Queue()
+        self.spare_reservations = []
+        self.tuning = None
+        self.transcribe_workers = 1
+        self.torch_threads = None
+        self.temp_dir = None
+        self.manifest = None
+        self.batch_id = None
+        self.job_queue = None
+        self.pipeline = None
+        self.counts = {"done": 0, "no_speech": 0, "failed": 0, "cancelled": 0}
+    
+    def options(self):
+        """Settings that change the output, as stored in incremental manifests"""
+        options = {
+            "model": self.model_name,
+            "language": self.language,
+            "word_timestamps": bool(self.word_timestamps),
+            "groq": self.groq_api is not None,
+            "notion": self.notion_api is not None
+        }
+        if self.refine_model_name:
+            options["refine_model"] = self.refine_model_name
+        if self.output_formats:
+            options["formats"] = self.output_formats
+        return options
+    
+    def load_model(self):
+        """Reserve memory for the models and load them, or connect to the server (once per processor)"""
+        import torch
+        import whisper
+        
+        if self.model is not None or self.server_client is not None:
+            return
+        
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tuning = tuned_settings(self.model_name, self.device)
+        if self.use_server:
+            self.server_client = get_server_client()
+            if self.server_client:
+                self.log("Using the transcription server - models stay loaded between runs.")
+                return
+            self.log("Transcription server unavailable - transcribing in this process.")
+        
+        self.reservation = get_governor().acquire(
+            "headless batch", self.model_name, refine_model_name=self.refine_model_name,
+            allow_downgrade=self.allow_downgrade, cancel_token=self.cancel_token, on_wait=self.log
+        )
+        self.model_name = self.reservation.model_name
+        self.refine_model_name = self.reservation.refine_model_name
+        self.tuning = tuned_settings(self.model_name, self.device)
+        self.log(f"Loading Whisper {self.model_name} model on {self.device}...")
+        self.model = whisper.load_model(self.model_name, device=self.device)
+        self.models.put(self.model)
+        if self.refine_model_name:
+            self.log(f"Loading Whisper {self.refine_model_name} model for low-confidence segments...")
+            self.refine_model = whisper.load_model(self.refine_model_name, device=self.device)
+        
+        # The calibrated number of files transcribed at once, each with its own model copy
+        workers = self.tuning["workers"] if self.tuning else 1
+        if workers > 1 and self.refine_model is not None:
+            self.log("Transcribing one file at a time - the refinement model can't be shared")
+            workers = 1
+        while self.models.qsize() < workers:
+            reservation = get_governor().try_acquire("headless batch", self.model_name)
+            if reservation is None:
+                self.log(f"Memory is short - transcribing {self.models.qsize()} files at a time instead of {workers}")
+                break
+            self.spare_reservations.append(reservation)
+            self.log(f"Loading Whisper {self.model_name} model copy {self.models.qsize() + 1} of {workers}...")
+            self.models.put(whisper.load_model(self.model_name, device=self.device))
+        self.transcribe_workers = self.models.qsize()
+        if self.tuning:
+            # The calibrated thread count belongs to the calibrated worker count
+            self.torch_threads = self.tuning["torch_threads"] if self.transcribe_workers == self.tuning["workers"] \
+                else max(1, (os.cpu_count() or 1) // self.transcribe_workers)
+    
+    def close(self):
+        """Unload the models and release their memory reservation"""
+        self.model = None
+        self.refine_model = None
+        self.server_client = None
+        self.models = queue.Queue()
+        self.transcribe_workers = 1
+        if self.reservation:
+            self.reservation.release()
+            self.reservation = None
+        for reservation in self.spare_reservations:
+            reservation.release()
+        self.spare_reservations = []
+    
+    def cancel(self):
+        """Stop the files in progress (their ffmpeg and Whisper work is aborted)"""
+        self.cancel_token.cancel()
+    
+    def _advance(self, job, state, **data):
+        batch_id = job.get('batch_id', self.batch_id)
+        if batch_id:
+            self.job_queue.advance(batch_id, job['key'], state, **data)
+    
+    def _saved(self, job, state):
+        """A stage's saved results if it finished before the batch was interrupted, else None"""
+        item = job.get('queue_item')
+        if item and state_reached(item['state'], state):
+            return item['data']
+        return None
+    
+    def download_stage(self, job):
+        """Download an Instagram post (jobs with a "url" only)"""
+        if 'url' not in job:
+            return True
+        
+        url = job['url']
+        job['log'](f"Downloading ({job['index'] + 1}): {url}")
+        
+        saved = self._saved(job, 'downloaded')
+        if saved and os.path.isfile(saved.get('video_file', '')):
+            success, result, description = True, saved['video_file'], None
+        else:
+            if self.instaloader_api is None:
+                from instagram_downloader import InstaloaderIntegration
+                self.instaloader_api = InstaloaderIntegration()
+            success, result, description = self.instaloader_api.download_instagram_post(url, job['download_dir'])
+        
+        if not success:
+            job['log'](f"✗ Error downloading {url}: {result}")
+            job['error'] = result
+            return False
+        
+        # Keep the original URL and caption for the Notion page
+        if description is not None:
+            get_metadata_store().put(result, url, description or None)
+        
+        job['video_file'] = result
+        job['output_file'] = transcript_path(result, job.get('output_dir'))
+        self._advance(job, 'downloaded', video_file=result)
+        job['log'](f"✓ Downloaded: {os.path.basename(result)}")
+        return True
+    
+    def extract_stage(self, job):
+        """Extract the audio track"""
+        if 'url' not in job:
+            job['log'](f"Processing ({job['index'] + 1}): {job['video_file']}")
+        
+        # Transcribed before the batch was interrupted - the audio isn't needed again
+        if self._saved(job, 'transcribed'):
+            return True
+        
+        job['audio_file'] = os.path.join(self.temp_dir, f"{job['index']}.wav")
+        try:
+            run_cancellable([
+                "ffmpeg", "-nostdin", *ffmpeg_thread_args(self.tuning), "-i", job['video_file'], "-q:a", "0", "-map", "a", job['audio_file'], "-y"
+            ], self.cancel_token)
+        except subprocess.CalledProcessError as e:
+            message = e.stderr.decode(errors='replace').strip().splitlines()[-1] if e.stderr else str(e)
+            job['log'](f"✗ Error extracting audio: {message}")
+            job['error'] = message
+            return False
+        
+        self._advance(job, 'extracted')
+        return True
+    
+    def transcribe_stage(self, job):
+        """Triage and transcribe one file with a free resident model (or the server)"""
+        model = self.models.get() if self.model is not None else None
+        try:
+            return self._transcribe(job, model)
+        finally:
+            if model is not None:
+                self.models.put(model)
+    
+    def _transcribe(self, job, model):
+        log = job['log']
+        
+        saved = self._saved(job, 'transcribed')
+        if saved and saved.get('transcription'):
+            log("Resuming with the transcript saved before the interruption")
+            job['transcription'] = saved['transcription']
+            return True
+        
+        audio_file = job['audio_file']
+        speech_check = triage_audio(audio_file, model, self.language, self.cancel_token) if self.skip_no_speech else None
+        if speech_check and not speech_check['speech']:
+            log(f"No speech detected ({speech_check['reason']}) - skipping Whisper, Groq and Notion")
+            job['transcription'] = no_speech_transcription(speech_check['duration'])
+            self._advance(job, 'transcribed', transcription=job['transcription'])
+            return True
+        
+        transcribe_options = {
+            "task": "transcribe",
+            "verbose": False,
+            "word_timestamps": self.word_timestamps,
+        }
+        if self.language:
+            transcribe_options["language"] = self.language
+        
+        start_time = time.time()
+        writers = None
+        
+        # Reuse a stored transcript of the same audio, model and options
+        cache_options = transcription_options(self.model_name, self.language, self.word_timestamps, self.refine_model_name)
+        cached = None
+        if self.cache:
+            audio_hash = audio_content_hash(audio_file)
+            cached = self.cache.get(audio_hash, self.model_name, cache_options)
+        
+        if cached:
+            log("Found cached transcript - skipped Whisper")
+            result = cached['result']
+        else:
+            if self.server_client:
+                result = self.server_client.transcribe(
+                    audio_file, self.model_name, transcribe_options,
+                    refine_model_name=self.refine_model_name,
+                    allow_downgrade=self.allow_downgrade,
+                    cancel_token=self.cancel_token,
+                    on_status=log
+                )['transcription']
+            else:
+                set_torch_threads(self.torch_threads)
+                
+                # Subtitles and the JSON sidecar are written as each window is decoded,
+                # unless refinement will still replace some of the segments
+                if self.output_formats and self.refine_model is None:
+                    try:
+                        writers = open_writers(job['output_file'], self.output_formats, {
+                            "source": job['video_file'],
+                            "language": self.language,
+                            "model": self.model_name
+                        })
+                    except OSError as e:
+                        log(f"✗ Error saving transcript formats: {str(e)}")
+                
+                whisper_start = time.time()
+                try:
+                    with cancellable_whisper(model, self.cancel_token, segment_callback=writers.add if writers else None):
+                        result = model.transcribe(audio_file, **transcribe_options)
+                except BaseException:
+                    if writers:
+                        writers.discard()
+                    raise
+                whisper_seconds = time.time() - whisper_start
+                
+                # Re-transcribe only the low-confidence ranges with the larger model
+                if self.refine_model is not None:
+                    result = refine_low_confidence_segments(
+                        result, audio_file, self.refine_model, transcribe_options,
+                        cancel_token=self.cancel_token, log=log
+                    )
+                else:
+                    # Only a plain Whisper pass measures this machine's speed for the model
+                    get_speed_profile().record(self.model_name, self.device, media_duration(audio_file), whisper_seconds)
+                result['model'] = self.model_name
+                result['refine_model'] = self.refine_model_name
+            if self.cache:
+                self.cache.put(
+                    audio_hash, result.get('model', self.model_name), used_options(cache_options, result), result,
+                    source=job['video_file']
+                )
+        
+        log(f"Transcription completed in {time.time() - start_time:.2f} seconds")
+        
+        # Subtitles and the JSON sidecar come from the segments, which aren't kept after this stage
+        if writers:
+            try:
+                writers.finish(result['segments'])
+                log(f"✓ Saved {', '.join(os.path.basename(path) for path in writers.paths)}")
+            except OSError as e:
+                log(f"✗ Error saving transcript formats: {str(e)}")
+        elif self.output_formats:
+            try:
+                written = write_transcript_formats(job['output_file'], result['segments'], self.output_formats, {
+                    "source": job['video_file'],
+                    "language": result.get('language'),
+                    "model": result.get('model', self.model_name),
+                    "duration": result.get('duration')
+                })
+                log(f"✓ Saved {', '.join(os.path.basename(path) for path in written)}")
+            except OSError as e:
+                log(f"✗ Error saving transcript formats: {str(e)}")
+        
+        if self.word_timestamps:
+            detailed = '\n'.join(
+                f"[{format_timestamp(segment['start'])}] {segment['text'].strip()}" for segment in result['segments']
+            )
+        else:
+            detailed = result['text']
+        
+        job['transcription'] = {
+            'text': result['text'],
+            'detailed': detailed,
+            'duration': result.get('duration', None)
+        }
+        self._advance(job, 'transcribed', transcription=job['transcription'])
+        return True
+    
+    def summarize_stage(self, job):
+        """Groq title and summary (network bound)"""
+        if not self.groq_api or job['transcription'].get('no_speech'):
+            return True
+        
+        saved = self._saved(job, 'summarized')
+        if saved:
+            job['groq_result'] = saved.get('groq_result')
+            return True
+        
+        # Read for every job - a long-lived engine should use the prompt saved most recently
+        system_prompt = load_saved_settings()["groq_system_prompt"]
+        success, result = self.groq_api.summarize_transcript(
+            job['transcription']['text'], system_prompt, job['video_file']
+        )
+        if success:
+            job['groq_result'] = result
+            job['log']("✓ Groq processing successful")
+        else:
+            job['log'](f"✗ Groq processing issue: {result}")
+        
+        self._advance(job, 'summarized', groq_result=job.get('groq_result'), groq_error=None if success else result)
+        return True
+    
+    def publish_stage(self, job):
+        """Write the transcript and add the Notion page (network bound)"""
+        transcription = job['transcription']
+        groq_result = job.get('groq_result')
+        
+        os.makedirs(os.path.dirname(job['output_file']), exist_ok=True)
+        with open(job['output_file'], "w", encoding="utf-8") as file:
+            if groq_result:
+                file.write(f"Title: {groq_result['title']}\n\n")
+                file.write(f"Summary: {groq_result['summary']}\n\n")
+                file.write("--- Original Transcript ---\n\n")
+            file.write(transcription['detailed'])
+        job['log'](f"✓ Saved: {os.path.basename(job['output_file'])}")
+        
+        # A page created before the batch was interrupted isn't created twice
+        notion_url = (job.get('queue_item') or {}).get('data', {}).get('notion_url')
+        if self.notion_api and notion_url:
+            job['log'](f"✓ Already in Notion: {notion_url}")
+        elif self.notion_api and not transcription.get('no_speech'):
+            success, message = self.notion_api.add_transcription_to_notion(
+                job['video_file'], transcription['detailed'], transcription.get('duration', None), groq_result
+            )
+            if success:
+                notion_url = self.notion_api.last_page_url
+                if job.get('batch_id', self.batch_id):
+                    self.job_queue.update_data(job.get('batch_id', self.batch_id), job['key'], notion_url=notion_url)
+                job['log'](f"✓ Added to Notion: {notion_url}")
+                
+                # A replay replaces the page an earlier run created
+                if job.get('replaces_notion_url'):
+                    archived, message = self.notion_api.archive_page(job['replaces_notion_url'])
+                    job['log'](f"✓ Archived the previous page: {job['replaces_notion_url']}" if archived
+                               else f"✗ Could not archive the previous page: {message}")
+            else:
+                job['log'](f"✗ Notion error: {message}")
+        job['notion_url'] = notion_url
+        
+        self._advance(job, 'published', notion_url=notion_url)
+        if self.manifest:
+            self.manifest.record(job['video_file'], job['output_file'])
+        job['completed'] = True
+        return True
+    
+    def complete_job(self, job):
+        """Clean up a finished job and report its result (called in input order)"""
+        if job.get('audio_file') and os.path.exists(job['audio_file']):
+            try:
+                os.remove(job['audio_file'])
+            except OSError:
+                pass
+        
+        if job.get('completed'):
+            status = "no_speech" if job['transcription'].get('no_speech') else "done"
+        elif job.get('cancelled'):
+            status = "cancelled"
+        else:
+            status = "failed"
+            if job.get('batch_id', self.batch_id):
+                self.job_queue.fail(job.get('batch_id', self.batch_id), job['key'], job.get('error') or "skipped")
+        self.counts[status] += 1
+        
+        if job.get('delete_video', self.delete_videos) and job.get('completed') and os.path.exists(job['video_file']):
+            try:
+                os.remove(job['video_file'])
+                job['log'](f"✓ Deleted video after processing: {os.path.basename(job['video_file'])}")
+            except OSError as e:
+                job['log'](f"✗ Error deleting video: {os.path.basename(job['video_file'])} - {str(e)}")
+        
+        if self.on_result:
+            self.on_result({
+                "index": job['index'],
+                "batch_id": job.get('batch_id', self.batch_id),
+                "key": job['key'],
+                "video_file": job.get('video_file'),
+                "output_file": job.get('output_file') if job.get('completed') else None,
+                "status": status,
+                "error": str(job['error']) if job.get('error') and not job.get('completed') else None,
+                "notion_url": job.get('notion_url')
+            })
+        
+        # Drop the results so a long-running watch doesn't keep every transcript in memory
+        job.pop('transcription', None)
+        job.pop('groq_result', None)
+    
+    def replay(self, jobs, batch_id=None, should_stop=None):
+        """
+        Re-run only Groq and Notion for transcripts that already exist (no Whisper)
+        
+        Parameters:
+            jobs (iterable): Job dicts with "key", "video_file", "output_file" (the transcript,
+                rewritten with the new header), "transcription", the old "groq_result" (kept
+                if Groq is off or fails) and optionally "replaces_notion_url" and "queue_item"
+            batch_id (str, optional): Job-queue batch the jobs belong to
+            should_stop (function, optional): Returns True to stop taking new jobs
+        
+        Returns:
+            dict: Number of jobs per status (done, no_speech, failed, cancelled)
+        """
+        self.manifest = None
+        self.batch_id = batch_id
+        self.job_queue = get_job_queue()
+        
+        # Both stages are network bound, so several transcripts are in flight at once
+        workers = stage_workers()
+        self.pipeline = StagePipeline(
+            [
+                Stage("summarize", self.summarize_stage, workers["summarize"]),
+                Stage("publish", self.publish_stage, workers["publish"])
+            ],
+            self.log,
+            should_stop=should_stop,
+            on_complete=self.complete_job
+        )
+        self.pipeline.run(jobs)
+        return dict(self.counts)
+    
+    def run(self, jobs, manifest=None, batch_id=None, should_stop=None):
+        """
+        Process jobs and block until they are done
+        
+        Parameters:
+            jobs (iterable): Job dicts with "key", "video_file" and "output_file";
+                Instagram jobs have "url", "download_dir" and optionally "output_dir"
+                instead, with the URL as "video_file" until it is downloaded.
+                "queue_item" holds the job-queue item when resuming
+            manifest (IncrementalManifest, optional): Records every published video
+            batch_id (str, optional): Job-queue batch the jobs belong to (a job's own
+                "batch_id" takes precedence, e.g. for shared-queue workers)
+            should_stop (function, optional): Returns True to stop taking new jobs
+        
+        Returns:
+            dict: Number of jobs per status (done, no_speech, failed, cancelled)
+        """
+        self.manifest = manifest
+        self.batch_id = batch_id
+        self.job_queue = get_job_queue()
+        self.load_model()
+        self.temp_dir = tempfile.mkdtemp(prefix="videotranscriber-")
+        
+        try:
+            # Whisper keeps working on the next file while Groq and Notion calls are in flight
+            workers = stage_workers()
+            self.pipeline = StagePipeline(
+                [
+                    Stage("download", self.download_stage, 1),
+                    Stage("extract", self.extract_stage, max(workers["extract"], self.transcribe_workers)),
+                    Stage("transcribe", self.transcribe_stage, self.transcribe_workers),
+                    Stage("summarize", self.summarize_stage, workers["summarize"]),
+                    Stage("publish", self.publish_stage, workers["publish"])
+                ],
+                self.log,
+                should_stop=should_stop,
+                on_complete=self.complete_job
+            )
+            self.pipeline.run(jobs)
+        finally:
+            if manifest:
+                manifest.save()
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+        
+        return dict(self.counts)
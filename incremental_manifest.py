@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import threading
+
+from transcript_cache import audio_content_hash
+
+MANIFEST_NAME = ".transcription_manifest.json"
+
+# Bump when the entry format changes so old manifests are ignored
+MANIFEST_VERSION = 1
+
+# Minimum seconds between manifest writes while a batch is running
+SAVE_INTERVAL = 5.0
+
+class IncrementalManifest:
+    """
+    Record of which videos were already transcribed into an output folder.
+    
+    Each entry maps a video's absolute path to its size, modification time,
+    content hash, the options it was processed with and its transcript file.
+    A video whose size and mtime are unchanged is skipped with a single stat
+    call; if only the mtime changed (e.g. the file was copied) its content
+    hash decides. Videos processed with different options are done again.
+    The manifest lives in the output folder as .transcription_manifest.json.
+    """
+    def __init__(self, output_dir, options):
+        """
+        Parameters:
+            output_dir (str): Folder the transcripts are written to
+            options (dict): Settings that change the output (model, language, Groq...)
+        """
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.options = options
+        self.lock = threading.Lock()
+        self.last_save = 0.0
+        self.dirty = False
+        
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.entries = manifest["entries"] if manifest.get("version") == MANIFEST_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+    
+    def is_unchanged(self, video_file):
+        """True if the video was already processed with these options and its transcript still exists"""
+        entry = self.entries.get(os.path.abspath(video_file))
+        if not entry or entry["options"] != self.options or not os.path.exists(entry["output_file"]):
+            return False
+        
+        try:
+            stat = os.stat(video_file)
+        except OSError:
+            return False
+        
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime == entry["mtime"]:
+            return True
+        
+        # Same size, new mtime: compare the content before processing it again
+        try:
+            unchanged = audio_content_hash(video_file) == entry["content_hash"]
+        except OSError:
+            return False
+        if unchanged:
+            with self.lock:
+                entry["mtime"] = stat.st_mtime
+                self.dirty = True
+        return unchanged
+    
+    def filter_changed(self, video_files):
+        """
+        Returns:
+            tuple: (videos to process, number of unchanged videos skipped)
+        """
+        changed = [video_file for video_file in video_files if not self.is_unchanged(video_file)]
+        self.save()
+        return changed, len(video_files) - len(changed)
+    
+    def record(self, video_file, output_file):
+        """Remember a processed video (saved to disk at most every SAVE_INTERVAL seconds)"""
+        try:
+            stat = os.stat(video_file)
+            content_hash = audio_content_hash(video_file)
+        except OSError:
+            return
+        
+        with self.lock:
+            self.entries[os.path.abspath(video_file)] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "content_hash": content_hash,
+                "options": self.options,
+                "output_file": os.path.abspath(output_file)
+            }
+            self.dirty = True
+        
+        if time.time() - self.last_save >= SAVE_INTERVAL:
+            self.save()
+    
+    def save(self):
+        """Write the manifest if it changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            
+            temp_file = self.path + ".tmp"
+            try:
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+                os.replace(temp_file, self.path)
+                self.dirty = False
+                self.last_save = time.time()
+            except OSError as e:
+                print(f"Could not save the batch manifest: {str(e)}")
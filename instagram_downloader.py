@@ -0,0 +1,147 @@
+import os
+import importlib.util
+import re
+import sys
+import subprocess
+
+from metadata_store import get_metadata_store
+
+class InstaloaderIntegration:
+    def __init__(self):
+        """Initialize the Instaloader integration"""
+        self.ensure_instaloader_installed()
+    
+    def ensure_instaloader_installed(self):
+        """Check if Instaloader is installed, and install it if not"""
+        # Check without importing it - the download functions import it when they run
+        return importlib.util.find_spec("instaloader") is not None
+    
+    def install_instaloader(self, callback=None):
+        """Install Instaloader using pip"""
+        try:
+            if callback:
+                callback(10, "Installing Instaloader...")
+            
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "instaloader"])
+            
+            if callback:
+                callback(100, "Instaloader installed successfully")
+            
+            return True, "Instaloader installed successfully"
+        except Exception as e:
+            if callback:
+                callback(0, f"Error installing Instaloader: {str(e)}")
+            
+            return False, f"Error installing Instaloader: {str(e)}"
+    
+    def extract_post_shortcode(self, url):
+        """
+        Extract the Instagram post shortcode from a URL
+        
+        Args:
+            url (str): Instagram URL
+        
+        Returns:
+            str: Post shortcode or None if invalid URL
+        """
+        # Match patterns like instagram.com/p/ABC123/ or instagram.com/reel/XYZ789/
+        match = re.search(r'instagram\.com/(?:p|reel|tv)/([^/?]+)', url)
+        if match:
+            return match.group(1)
+        return None
+    
+    def download_instagram_post(self, url, output_dir, callback=None):
+        """
+        Download an Instagram post using Instaloader
+        
+        Args:
+            url (str): Instagram post URL
+            output_dir (str): Directory to save the post
+            callback (function, optional): Callback function for progress updates
+        
+        Returns:
+            tuple: (success, filepath or error_message, description)
+        """
+        # First, ensure Instaloader is installed
+        try:
+            import instaloader
+        except ImportError:
+            success, message = self.install_instaloader(callback)
+            if not success:
+                return False, message, None
+            try:
+                import instaloader
+            except ImportError:
+                return False, "Failed to import Instaloader after installation. Please restart the application.", None
+        
+        # Extract post shortcode from URL
+        shortcode = self.extract_post_shortcode(url)
+        if not shortcode:
+            return False, "Invalid Instagram URL. Please provide a valid post URL (e.g., https://www.instagram.com/p/ABC123/).", None
+        
+        # A post downloaded to this folder before doesn't need another Instagram request
+        known = get_metadata_store().find_by_shortcode(shortcode)
+        if known and os.path.isfile(known["path"]) and \
+           os.path.dirname(known["path"]) == os.path.abspath(output_dir):
+            if callback:
+                callback(100, f"Already downloaded: {os.path.basename(known['path'])}")
+            return True, known["path"], known["description"] or ""
+        
+        if callback:
+            callback(20, f"Downloading post with shortcode: {shortcode}")
+        
+        try:
+            # Create output directory if it doesn't exist
+            os.makedirs(output_dir, exist_ok=True)
+            
+            # Initialize Instaloader with the output directory
+            L = instaloader.Instaloader(
+                dirname_pattern=output_dir,
+                filename_pattern="{shortcode}",
+                download_videos=True,
+                download_video_thumbnails=False,
+                download_geotags=False,
+                download_comments=False,
+                save_metadata=True,  # Save metadata to get the description
+                compress_json=False
+            )
+            
+            if callback:
+                callback(30, "Fetching post from Instagram...")
+            
+            # Get post by shortcode
+            post = instaloader.Post.from_shortcode(L.context, shortcode)
+            
+            # Get post description
+            description = post.caption if post.caption else ""
+            
+            if callback:
+                callback(50, "Downloading media...")
+            
+            # Download the post
+            L.download_post(post, target=shortcode)
+            
+            if callback:
+                callback(90, "Processing downloaded files...")
+            
+            # Find the downloaded video file
+            video_extensions = ['.mp4', '.mov']
+            downloaded_files = os.listdir(output_dir)
+            video_file = None
+            
+            for file in downloaded_files:
+                if any(file.endswith(ext) for ext in video_extensions) and shortcode in file:
+                    video_file = os.path.join(output_dir, file)
+                    break
+            
+            if video_file:
+                if callback:
+                    callback(100, f"Download completed: {os.path.basename(video_file)}")
+                return True, video_file, description
+            else:
+                return False, "No video was found in the post. The post might contain only images.", description
+        
+        except instaloader.exceptions.InstaloaderException as e:
+            return False, f"Instaloader error: {str(e)}", None
+        except Exception as e:
+            return False, f"Error downloading Instagram post: {str(e)}", None
@@ -0,0 +1,258 @@
+import time
+import itertools
+import threading
+
+from cancellation import TranscriptionCancelled
+
+# Lower runs first: a single file the user is waiting for goes ahead of batch work
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Finished jobs kept for the job list
+HISTORY_SIZE = 20
+
+class ManagedJob:
+    """One transcription job known to the JobManager (single file, batch, live recording...)."""
+    def __init__(self, manager, name, kind, priority, seq):
+        self.manager = manager
+        self.id = seq
+        self.name = name
+        self.kind = kind
+        self.priority = priority
+        self.seq = seq
+        self.state = QUEUED
+        self.detail = ""
+        self.submitted_at = time.time()
+        self.finished_at = None
+    
+    def acquire(self, cancel_token=None, on_wait=None):
+        return self.manager.acquire(self, cancel_token, on_wait)
+    
+    def checkpoint(self, cancel_token=None, on_pause=None, on_resume=None, on_wait=None):
+        return self.manager.checkpoint(self, cancel_token, on_pause, on_resume, on_wait)
+    
+    def finish(self, state=DONE):
+        self.manager.finish(self, state)
+
+class JobManager:
+    """
+    Decides which transcription job of this process uses Whisper next.
+    
+    The single-file tab, the folder batch, the Instagram batch and the saved
+    posts flow all submit their work here instead of checking each other's
+    flags. One job runs at a time; waiting jobs are ordered by priority and
+    then by submission, so an interactive job jumps ahead of queued batches.
+    A running batch calls checkpoint() between files and steps aside while a
+    higher-priority job is waiting, then continues where it stopped.
+    """
+    def __init__(self, poll_interval=0.5):
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._counter = itertools.count(1)
+        self._jobs = []
+        self._running = None
+        self._history = []
+        self._listeners = []
+    
+    def submit(self, name, kind, priority=PRIORITY_BATCH):
+        """
+        Register a job; it is queued until acquire() admits it
+        
+        Parameters:
+            name (str): Name shown in the job list (e.g. the file or folder name)
+            kind (str): What submitted the job ("file", "batch", "instagram", "live"...)
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BATCH (lower runs first)
+        
+        Returns:
+            ManagedJob: The job's handle
+        """
+        with self._condition:
+            seq = next(self._counter)
+            job = ManagedJob(self, name, kind, priority, seq)
+            self._jobs.append(job)
+        self._notify()
+        return job
+    
+    def _waiting(self):
+        """Jobs waiting for the slot, next first (caller holds the lock)"""
+        waiting = [job for job in self._jobs if job.state in (QUEUED, PAUSED)]
+        return sorted(waiting, key=lambda job: (job.priority, job.seq))
+    
+    def acquire(self, job, cancel_token=None, on_wait=None):
+        """
+        Block until the job is first in line and nothing else is running
+        
+        Parameters:
+            job (ManagedJob): Job returned by submit()
+            cancel_token (CancellationToken, optional): Token checked while waiting
+            on_wait (function, optional): Called with a message whenever the job's place in line changes
+        
+        Raises:
+            TranscriptionCancelled: If the token is canceled while waiting
+        """
+        last_message = None
+        
+        while True:
+            with self._condition:
+                if cancel_token and cancel_token.is_cancelled:
+                    raise TranscriptionCancelled("Operation canceled")
+                if job.state in FINISHED_STATES:
+                    raise TranscriptionCancelled("The job was removed from the queue")
+                
+                waiting = self._waiting()
+                if self._running is None and waiting[0] is job:
+                    job.state = RUNNING
+                    job.detail = ""
+                    self._running = job
+                    break
+                
+                ahead = self._running or waiting[0]
+                verb = "Paused for" if job.state == PAUSED else "Waiting for"
+                message = f"{verb} {ahead.name} (position {waiting.index(job) + 1} in the job queue)"
+                changed = message != last_message
+                if changed:
+                    job.detail = last_message = message
+                else:
+                    # Wake up when a job finishes or pauses, or poll for cancellation
+                    self._condition.wait(self.poll_interval)
+            
+            if changed:
+                self._notify()
+                if on_wait:
+                    on_wait(message)
+        
+        self._notify()
+    
+    def preempted_by(self, job):
+        """The waiting job that should run before this running job, or None"""
+        with self._condition:
+            waiting = self._waiting()
+            if waiting and waiting[0].priority < job.priority:
+                return waiting[0]
+            return None
+    
+    def checkpoint(self, job, cancel_token=None, on_pause=None, on_resume=None, on_wait=None):
+        """
+        Let a waiting higher-priority job run before the next unit of work
+        
+        Called by a running batch between files. If nothing more urgent is
+        waiting this returns at once; otherwise the batch is paused, the
+        other job runs and this call returns once the batch has its turn again.
+        
+        Parameters:
+            job (ManagedJob): The running job
+            cancel_token (CancellationToken, optional): Token checked while paused
+            on_pause (function, optional): Called with the preempting job before the slot is given up
+                (e.g. to unload the model so the other job has the memory)
+            on_resume (function, optional): Called once the job runs again
+            on_wait (function, optional): Called with wait messages while paused
+        
+        Returns:
+            bool: True if the job was paused
+        
+        Raises:
+            TranscriptionCancelled: If the token is canceled while paused
+        """
+        preempting = self.preempted_by(job)
+        if preempting is None:
+            return False
+        
+        if on_pause:
+            on_pause(preempting)
+        
+        with self._condition:
+            job.state = PAUSED
+            if self._running is job:
+                self._running = None
+            self._condition.notify_all()
+        self._notify()
+        
+        self.acquire(job, cancel_token, on_wait)
+        if on_resume:
+            on_resume()
+        return True
+    
+    def finish(self, job, state=DONE):
+        """Mark a job as done, failed or cancelled and hand the slot to the next one (safe to call twice)"""
+        with self._condition:
+            if job.state in FINISHED_STATES:
+                return
+            job.state = state
+            job.detail = ""
+            job.finished_at = time.time()
+            if self._running is job:
+                self._running = None
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._history.append(job)
+            del self._history[:-HISTORY_SIZE]
+            self._condition.notify_all()
+        self._notify()
+    
+    def snapshot(self):
+        """
+        Current jobs for display, running job first, then the queue in order, then recent finished jobs
+        
+        Returns:
+            list: dicts with id, name, kind, priority, state, position (0 = running,
+                  None = finished) and detail
+        """
+        with self._condition:
+            ordered = ([self._running] if self._running else []) + self._waiting()
+            rows = []
+            for position, job in enumerate(ordered, start=0 if self._running else 1):
+                rows.append(self._row(job, position))
+            for job in reversed(self._history):
+                rows.append(self._row(job, None))
+            return rows
+    
+    def _row(self, job, position):
+        return {
+            "id": job.id,
+            "name": job.name,
+            "kind": job.kind,
+            "priority": job.priority,
+            "state": job.state,
+            "position": position,
+            "detail": job.detail
+        }
+    
+    def add_listener(self, listener):
+        """Call listener() (from the job's thread) whenever a job is added or changes state"""
+        with self._condition:
+            self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def _notify(self):
+        with self._condition:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Error in job manager listener: {str(e)}")
+
+# Shared by every tab of the desktop app
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Process-wide JobManager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
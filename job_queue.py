@@ -0,0 +1,393 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+
+DB_FILE = os.path.join(os.path.expanduser("~"), ".videotranscriber", "jobs.db")
+
+# Path of a queue shared by several machines (e.g. on an NFS or SMB share)
+DB_ENV_VAR = "VIDEOTRANSCRIBER_JOBS_DB"
+
+# Batch kind that worker processes take items from
+SHARED_KIND = "shared"
+
+# A worker renews its leases this often; a lease not renewed for DEFAULT_LEASE_SECONDS expires
+DEFAULT_LEASE_SECONDS = 60.0
+HEARTBEAT_INTERVAL = 15.0
+
+# An item whose lease was claimed this many times without being published is given up
+MAX_ATTEMPTS = 3
+
+# Item states in processing order; an item never moves backwards
+STATES = ("pending", "downloaded", "extracted", "transcribed", "summarized", "published")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    output_dir TEXT,
+    options TEXT,
+    finished INTEGER NOT NULL DEFAULT 0,
+    created REAL,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS batches_source ON batches (kind, source, output_dir, finished);
+CREATE TABLE IF NOT EXISTS items (
+    batch_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    data TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    updated REAL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (batch_id, key)
+);
+"""
+
+# Columns added after the first release, for databases created before them
+MIGRATIONS = (
+    ("batches", "options", "TEXT"),
+    ("items", "lease_owner", "TEXT"),
+    ("items", "lease_expires", "REAL"),
+    ("items", "attempts", "INTEGER NOT NULL DEFAULT 0")
+)
+
+def state_reached(state, target):
+    """True if an item in `state` has completed the `target` stage"""
+    return STATES.index(state) >= STATES.index(target)
+
+def options_key(options):
+    """Canonical JSON of batch settings, so equal settings compare equal in SQL"""
+    return json.dumps(options, sort_keys=True) if options is not None else None
+
+def urls_source(urls):
+    """Batch source identifier for a list of URLs (the same list resumes the same batch)"""
+    return "urls:" + hashlib.sha256("\n".join(urls).encode("utf-8")).hexdigest()
+
+class JobQueue:
+    """
+    Durable record of batch jobs and the state of every item in them.
+    
+    Folder and Instagram batches are stored in an SQLite database
+    (~/.videotranscriber/jobs.db). Each item moves forward through STATES and
+    keeps the results of its finished stages (transcript, Groq summary,
+    Notion link) in a JSON column, so a batch that is started again after a
+    crash resumes where it stopped and never repeats a finished stage.
+    
+    Items of "shared" batches are claimed by worker processes, possibly on
+    other machines, with a lease. A worker renews its leases while it works
+    (heartbeat); the item of a worker that crashed goes back to the queue
+    once its lease expires.
+    """
+    def __init__(self, db_file=None, shared=False):
+        """
+        Parameters:
+            db_file (str, optional): Database file (default ~/.videotranscriber/jobs.db)
+            shared (bool): The file is used from several machines; WAL needs shared
+                memory on one host, so the rollback journal is used instead
+        """
+        self.db_file = db_file or DB_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_file)), exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+            for table, column, definition in MIGRATIONS:
+                columns = [row["name"] for row in self.connection.execute(f"PRAGMA table_info({table})")]
+                if column not in columns:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS items_claim ON items (state, lease_expires)"
+            )
+    
+    def _item(self, row):
+        if row is None:
+            return None
+        item = dict(row)
+        item["data"] = json.loads(item["data"])
+        return item
+    
+    def open_batch(self, kind, source, output_dir, keys, options=None):
+        """
+        Resume the unfinished batch for this source, output folder and settings, or start a new one
+        
+        Keys that aren't in the batch yet (e.g. files added to the folder) are
+        added as pending items. A batch started with other settings isn't
+        resumed, so its finished items aren't skipped with stale output.
+        
+        Parameters:
+            kind (str): "folder", "instagram" or "replay"
+            source (str): Input folder, or urls_source() of the URL list
+            output_dir (str): Output folder
+            keys (list): Item keys (video paths or URLs) in processing order
+            options (dict, optional): Settings that change the items' output
+        
+        Returns:
+            tuple: (batch id, True if an interrupted batch was resumed)
+        """
+        now = time.time()
+        
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT id FROM batches WHERE kind = ? AND source = ? AND output_dir IS ? AND options IS ? "
+                "AND finished = 0 ORDER BY created DESC LIMIT 1",
+                (kind, source, output_dir, options_key(options))
+            ).fetchone()
+            
+            resumed = row is not None
+            if resumed:
+                batch_id = row["id"]
+                self.connection.execute("UPDATE batches SET updated = ? WHERE id = ?", (now, batch_id))
+            else:
+                batch_id = uuid.uuid4().hex
+                self.connection.execute(
+                    "INSERT INTO batches (id, kind, source, output_dir, options, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (batch_id, kind, source, output_dir, options_key(options), now, now)
+                )
+            
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO items (batch_id, key, position, updated) VALUES (?, ?, ?, ?)",
+                [(batch_id, key, position, now) for position, key in enumerate(keys)]
+            )
+        
+        return batch_id, resumed
+    
+    def items(self, batch_id):
+        """
+        Returns:
+            dict: key -> item (key, position, state, data, error)
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM items WHERE batch_id = ? ORDER BY position", (batch_id,)
+            ).fetchall()
+        return {row["key"]: self._item(row) for row in rows}
+    
+    def get_item(self, batch_id, key):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM items WHERE batch_id = ? AND key = ?", (batch_id, key)
+            ).fetchone()
+        return self._item(row)
+    
+    def advance(self, batch_id, key, state, **data):
+        """
+        Record that an item finished a stage, merging the stage's results into its data
+        
+        The state only moves forward, so a late or repeated call can't undo progress.
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT state, data FROM items WHERE batch_id = ? AND key = ?", (batch_id, key)
+            ).fetchone()
+            if row is None:
+                return
+            
+            merged = json.loads(row["data"])
+            merged.update(data)
+            new_state = state if STATES.index(state) > STATES.index(row["state"]) else row["state"]
+            
+            self.connection.execute(
+                "UPDATE items SET state = ?, data = ?, error = NULL, updated = ? WHERE batch_id = ? AND key = ?",
+                (new_state, json.dumps(merged, ensure_ascii=False, default=float), time.time(), batch_id, key)
+            )
+    
+    def latest_value(self, keys, field):
+        """
+        Most recently recorded value of a data field for any of these keys, across all batches
+        (e.g. the Notion page an earlier run created for a video)
+        
+        Returns:
+            The value, or None if no item recorded it
+        """
+        placeholders = ", ".join("?" for _ in keys)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT data FROM items WHERE key IN ({placeholders}) ORDER BY updated DESC", list(keys)
+            ).fetchall()
+        for row in rows:
+            value = json.loads(row["data"]).get(field)
+            if value:
+                return value
+        return None
+    
+    def update_data(self, batch_id, key, **data):
+        """Merge results into an item without changing its state (e.g. a Notion link)"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT state FROM items WHERE batch_id = ? AND key = ?", (batch_id, key)
+            ).fetchone()
+        if row is not None:
+            self.advance(batch_id, key, row["state"], **data)
+    
+    def fail(self, batch_id, key, error):
+        """Record why an item stopped; it is retried from its last finished stage on resume"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE items SET error = ?, updated = ? WHERE batch_id = ? AND key = ?",
+                (str(error), time.time(), batch_id, key)
+            )
+    
+    def finish_batch(self, batch_id):
+        """Mark a batch as done so the next run over the same source starts fresh"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE batches SET finished = 1, updated = ? WHERE id = ?", (time.time(), batch_id)
+            )
+    
+    def claim(self, lease_id, lease_seconds=DEFAULT_LEASE_SECONDS, options=None):
+        """
+        Lease the next item of the shared batches (oldest batch first, in position order)
+        
+        Claiming is a single UPDATE, so two workers can never lease the same item.
+        Items that are published, leased by a live worker or out of attempts are passed over.
+        
+        Parameters:
+            lease_id (str): Unique id of this lease (needed to renew or release it)
+            lease_seconds (float): Seconds until the lease expires unless renewed
+            options (dict, optional): Only claim items of batches with these settings
+        
+        Returns:
+            dict: The item plus batch_id, output_dir and options, or None if nothing is available
+        """
+        now = time.time()
+        options_filter = "AND b.options = ?" if options is not None else ""
+        parameters = [lease_id, now + lease_seconds, now, SHARED_KIND, now, MAX_ATTEMPTS]
+        if options is not None:
+            parameters.append(options_key(options))
+        
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"""
+                UPDATE items SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ?
+                WHERE rowid = (
+                    SELECT i.rowid FROM items i JOIN batches b ON b.id = i.batch_id
+                    WHERE b.kind = ? AND b.finished = 0 AND i.state != 'published'
+                          AND (i.lease_expires IS NULL OR i.lease_expires < ?) AND i.attempts < ?
+                          {options_filter}
+                    ORDER BY b.created, i.position LIMIT 1
+                )
+                """,
+                parameters
+            )
+            row = self.connection.execute(
+                "SELECT i.*, b.output_dir, b.options FROM items i JOIN batches b ON b.id = i.batch_id "
+                "WHERE i.lease_owner = ?",
+                (lease_id,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        item = self._item(row)
+        item["options"] = json.loads(item["options"]) if item["options"] else {}
+        return item
+    
+    def next_claimable_options(self):
+        """Settings of the item claim() would return next, or None if the shared queue is empty"""
+        with self.lock:
+            row = self.connection.execute(
+                """
+                SELECT b.options FROM items i JOIN batches b ON b.id = i.batch_id
+                WHERE b.kind = ? AND b.finished = 0 AND i.state != 'published'
+                      AND (i.lease_expires IS NULL OR i.lease_expires < ?) AND i.attempts < ?
+                ORDER BY b.created, i.position LIMIT 1
+                """,
+                (SHARED_KIND, time.time(), MAX_ATTEMPTS)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["options"]) if row["options"] else {}
+    
+    def open_shared_items(self):
+        """Shared-queue items not published yet and not out of attempts (leased or not)"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT COUNT(*) AS open FROM items i JOIN batches b ON b.id = i.batch_id "
+                "WHERE b.kind = ? AND b.finished = 0 AND i.state != 'published' AND i.attempts < ?",
+                (SHARED_KIND, MAX_ATTEMPTS)
+            ).fetchone()
+        return row["open"]
+    
+    def heartbeat(self, batch_id, key, lease_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Renew a lease
+        
+        Returns:
+            bool: False if the lease was lost (it expired and another worker claimed the item)
+        """
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "UPDATE items SET lease_expires = ? WHERE batch_id = ? AND key = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, batch_id, key, lease_id)
+            )
+        return cursor.rowcount == 1
+    
+    def release(self, batch_id, key, lease_id):
+        """Give a lease back so the item can be claimed again at once (if it isn't published)"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE items SET lease_owner = NULL, lease_expires = NULL "
+                "WHERE batch_id = ? AND key = ? AND lease_owner = ?",
+                (batch_id, key, lease_id)
+            )
+    
+    def finish_if_done(self, batch_id):
+        """
+        Close a shared batch once every item is published or out of attempts
+        
+        Returns:
+            bool: True if the batch is finished
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT COUNT(*) AS open FROM items WHERE batch_id = ? AND state != 'published' AND attempts < ?",
+                (batch_id, MAX_ATTEMPTS)
+            ).fetchone()
+            if row["open"]:
+                return False
+            self.connection.execute(
+                "UPDATE batches SET finished = 1, updated = ? WHERE id = ?", (time.time(), batch_id)
+            )
+        return True
+    
+    def unfinished_batches(self, kind=None):
+        """
+        Returns:
+            list: dicts with id, kind, source, output_dir, total, done and leased item counts
+        """
+        query = """
+            SELECT b.id, b.kind, b.source, b.output_dir, b.updated,
+                   COUNT(i.key) AS total, SUM(i.state = 'published') AS done,
+                   SUM(i.lease_expires > ?) AS leased
+            FROM batches b LEFT JOIN items i ON i.batch_id = b.id
+            WHERE b.finished = 0 {}
+            GROUP BY b.id ORDER BY b.updated DESC
+        """.format("AND b.kind = ?" if kind else "")
+        
+        with self.lock:
+            rows = self.connection.execute(query, (time.time(), kind) if kind else (time.time(),)).fetchall()
+        return [dict(row) for row in rows]
+
+# Shared by the folder batch and the Instagram batch
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Process-wide JobQueue (VIDEOTRANSCRIBER_JOBS_DB selects a shared database)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            shared_db = os.environ.get(DB_ENV_VAR)
+            _queue = JobQueue(shared_db, shared=bool(shared_db))
+        return _queue
@@ -0,0 +1,330 @@
+import os
+import sys
+import subprocess
+import threading
+import time
+
+from cancellation import TranscriptionCancelled, cancellable_whisper
+from transcript_writers import open_writers, parse_formats, default_formats
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# Whisper only sees 30 seconds at a time, so the pending buffer must stay below that
+MAX_WINDOW_SECONDS = 30.0
+
+def format_timestamp(seconds):
+    """Format seconds as HH:MM:SS.mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+class LiveTranscriber:
+    """
+    Near-real-time transcription of a growing recording or a piped audio stream.
+    
+    Audio is read continuously (ffmpeg follows a file that is still being
+    written, or decodes stdin/a FIFO) into a pending buffer. Every `step`
+    seconds of new audio the buffer is transcribed; segments that end before
+    the live edge are finalized, appended to the output file and reported,
+    and the buffer is trimmed to the unfinished tail. Once the pending audio
+    reaches `max_latency` seconds everything in it is finalized, which bounds
+    how far the output can lag behind the live edge.
+    """
+    def __init__(self, model, source, output_file=None, language=None, step=5.0, max_latency=20.0,
+                 raw_pcm=False, idle_timeout=10.0, cancel_token=None, on_segment=None, on_status=None,
+                 output_formats=None):
+        """
+        Parameters:
+            model: Loaded Whisper model
+            source (str): Growing media file, FIFO path, or "-" for stdin
+            output_file (str, optional): File finalized segments are appended to
+            language (str, optional): Language code; detected from the first window if None
+            step (float): Seconds of new audio between decoding passes
+            max_latency (float): Maximum seconds of audio kept unfinalized
+            raw_pcm (bool): Source is already 16 kHz mono s16le PCM (skip ffmpeg)
+            idle_timeout (float): Stop when a growing file hasn't changed for this many seconds
+            cancel_token (CancellationToken, optional): Token that stops the session
+            on_segment (function, optional): Called with each finalized segment dict
+            on_status (function, optional): Called with status messages
+            output_formats (list, optional): Extra formats ("srt", "vtt", "tsv", "json") written
+                next to output_file, each segment as soon as it is finalized
+        """
+        self.model = model
+        self.source = source
+        self.output_file = output_file
+        self.language = language
+        self.step = step
+        self.max_latency = min(max_latency, MAX_WINDOW_SECONDS - step)
+        self.raw_pcm = raw_pcm
+        self.idle_timeout = idle_timeout
+        self.cancel_token = cancel_token
+        self.on_segment = on_segment
+        self.on_status = on_status
+        self.output_formats = output_formats or []
+        
+        self.process = None
+        self.writers = None
+        self.chunks = []
+        self.chunks_lock = threading.Condition()
+        self.stream_ended = False
+        self.segments = []
+    
+    def status(self, message):
+        if self.on_status:
+            self.on_status(message)
+    
+    def is_growing_file(self):
+        """True if the source is a regular file that may still be written to"""
+        return self.source != "-" and os.path.isfile(self.source)
+    
+    def start_reader(self):
+        """Start the process or thread that feeds PCM into the pending buffer"""
+        if self.raw_pcm:
+            if self.source == "-":
+                stream = sys.stdin.buffer
+            else:
+                stream = open(self.source, "rb")
+        else:
+            command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+            if self.is_growing_file():
+                # Keep reading at EOF instead of stopping - the recorder is still writing
+                command += ["-follow", "1"]
+            command += [
+                "-i", "pipe:0" if self.source == "-" else self.source,
+                "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+            ]
+            
+            self.process = subprocess.Popen(
+                command,
+                stdin=sys.stdin.buffer if self.source == "-" else subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            if self.cancel_token:
+                self.cancel_token.register_process(self.process)
+            stream = self.process.stdout
+        
+        threading.Thread(target=self.read_stream, args=(stream,), daemon=True).start()
+        
+        if self.process and self.is_growing_file():
+            threading.Thread(target=self.watch_file, daemon=True).start()
+    
+    def read_stream(self, stream):
+        """Read PCM from the stream until it ends"""
+        leftover = b""
+        try:
+            while True:
+                data = stream.read1(SAMPLE_RATE * BYTES_PER_SAMPLE) if hasattr(stream, "read1") \
+                    else stream.read(SAMPLE_RATE * BYTES_PER_SAMPLE)
+                if not data:
+                    break
+                
+                # Keep whole samples only
+                data = leftover + data
+                usable = len(data) - len(data) % BYTES_PER_SAMPLE
+                leftover = data[usable:]
+                
+                with self.chunks_lock:
+                    self.chunks.append(data[:usable])
+                    self.chunks_lock.notify_all()
+        finally:
+            with self.chunks_lock:
+                self.stream_ended = True
+                self.chunks_lock.notify_all()
+    
+    def watch_file(self):
+        """Stop following the file once it hasn't grown for idle_timeout seconds"""
+        last_size = -1
+        last_change = time.time()
+        
+        while self.process.poll() is None:
+            try:
+                size = os.path.getsize(self.source)
+            except OSError:
+                size = last_size
+            
+            if size != last_size:
+                last_size = size
+                last_change = time.time()
+            elif time.time() - last_change > self.idle_timeout:
+                self.status(f"{os.path.basename(self.source)} stopped growing - finishing")
+                # ffmpeg flushes what it has decoded when it gets SIGTERM
+                self.process.terminate()
+                break
+            
+            time.sleep(1.0)
+    
+    def take_audio(self, min_samples):
+        """
+        Block until at least min_samples new samples are available or the stream ends
+        
+        Returns:
+            tuple: (numpy float32 array of new samples, stream_ended)
+        """
+        import numpy as np
+        
+        with self.chunks_lock:
+            while not self.stream_ended and sum(len(chunk) for chunk in self.chunks) < min_samples * BYTES_PER_SAMPLE:
+                if self.cancel_token:
+                    self.cancel_token.raise_if_cancelled()
+                self.chunks_lock.wait(0.5)
+            
+            data = b"".join(self.chunks)
+            self.chunks = []
+            ended = self.stream_ended
+        
+        return np.frombuffer(data, np.int16).astype(np.float32) / 32768.0, ended
+    
+    def finalize(self, segment, offset):
+        """Shift a segment to stream time, append it to the output and report it"""
+        finalized = {
+            "id": len(self.segments),
+            "start": segment["start"] + offset,
+            "end": segment["end"] + offset,
+            "text": segment["text"].strip(),
+            "avg_logprob": segment.get("avg_logprob"),
+            "no_speech_prob": segment.get("no_speech_prob")
+        }
+        if not finalized["text"]:
+            return
+        
+        self.segments.append(finalized)
+        
+        if self.output_file:
+            with open(self.output_file, "a", encoding="utf-8") as f:
+                f.write(f"[{format_timestamp(finalized['start'])}] {finalized['text']}\n")
+        if self.writers:
+            self.writers.add(finalized)
+        
+        if self.on_segment:
+            self.on_segment(finalized)
+    
+    def run(self):
+        """
+        Transcribe until the stream ends or the token is canceled
+        
+        Returns:
+            list: All finalized segments
+        """
+        import numpy as np
+        
+        if self.output_file and self.output_formats:
+            self.writers = open_writers(self.output_file, self.output_formats, {"source": self.source})
+        
+        self.start_reader()
+        self.status("Listening for audio...")
+        
+        pending = np.zeros(0, dtype=np.float32)
+        pending_start = 0.0
+        step_samples = int(self.step * SAMPLE_RATE)
+        
+        try:
+            while True:
+                new_audio, ended = self.take_audio(step_samples)
+                pending = np.concatenate([pending, new_audio])
+                
+                if len(pending) == 0:
+                    if ended:
+                        break
+                    continue
+                
+                pending_seconds = len(pending) / SAMPLE_RATE
+                
+                options = {
+                    "task": "transcribe",
+                    "verbose": None,
+                    "condition_on_previous_text": False
+                }
+                if self.language:
+                    options["language"] = self.language
+                if self.segments:
+                    # Carry context across window boundaries without re-decoding it
+                    options["initial_prompt"] = self.segments[-1]["text"]
+                
+                with cancellable_whisper(self.model, self.cancel_token):
+                    result = self.model.transcribe(pending, **options)
+                
+                # Lock the language after the first window so it can't flip mid-session
+                if not self.language and result.get("language"):
+                    self.language = result["language"]
+                
+                segments = [segment for segment in result.get("segments", []) if segment["end"] > segment["start"]]
+                
+                if ended or pending_seconds >= self.max_latency:
+                    # End of stream, or the latency bound was hit: finalize everything
+                    final_segments = segments
+                    cut = len(pending)
+                else:
+                    # The last segment may still be cut off by the live edge
+                    final_segments = segments[:-1]
+                    cut = int(final_segments[-1]["end"] * SAMPLE_RATE) if final_segments else 0
+                
+                for segment in final_segments:
+                    self.finalize(segment, pending_start)
+                
+                cut = min(cut, len(pending))
+                pending = pending[cut:]
+                pending_start += cut / SAMPLE_RATE
+                
+                behind = pending_start + len(pending) / SAMPLE_RATE - (self.segments[-1]["end"] if self.segments else 0.0)
+                self.status(f"Live at {format_timestamp(pending_start + len(pending) / SAMPLE_RATE)} "
+                            f"({behind:.1f}s not yet finalized)")
+                
+                if ended:
+                    break
+        finally:
+            if self.writers:
+                self.writers.close()
+            if self.process:
+                if self.process.poll() is None:
+                    self.process.kill()
+                if self.cancel_token:
+                    self.cancel_token.unregister_process(self.process)
+        
+        self.status(f"Live transcription finished - {len(self.segments)} segments")
+        return self.segments
+
+def main(argv=None):
+    """Command-line entry point: transcribe a growing file or stdin stream live"""
+    import argparse
+    import torch
+    import whisper
+    
+    parser = argparse.ArgumentParser(description="Live transcription of a growing file or piped audio stream")
+    parser.add_argument("source", help="Growing media file, FIFO, or - for stdin")
+    parser.add_argument("-o", "--output", help="Transcript file to append finalized segments to")
+    parser.add_argument("-m", "--model", default="base", help="Whisper model (default: base)")
+    parser.add_argument("-l", "--language", default=None, help="Language code (default: detect)")
+    parser.add_argument("--step", type=float, default=5.0, help="Seconds of new audio between decoding passes")
+    parser.add_argument("--max-latency", type=float, default=20.0, help="Maximum seconds behind the live edge")
+    parser.add_argument("--raw-pcm", action="store_true", help="Source is 16 kHz mono s16le PCM")
+    parser.add_argument("--idle-timeout", type=float, default=10.0, help="Stop after a file stops growing for this long")
+    parser.add_argument("--formats", default=None, help="Also write these formats next to --output, e.g. srt,vtt,json")
+    args = parser.parse_args(argv)
+    
+    try:
+        output_formats = parse_formats(args.formats) if args.formats is not None else default_formats()
+    except ValueError as e:
+        parser.error(str(e))
+    if args.formats and not args.output:
+        parser.error("--formats needs --output")
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = whisper.load_model(args.model, device=device)
+    
+    transcriber = LiveTranscriber(
+        model, args.source, args.output, args.language, args.step, args.max_latency,
+        args.raw_pcm, args.idle_timeout,
+        on_segment=lambda segment: print(f"[{format_timestamp(segment['start'])}] {segment['text']}", flush=True),
+        on_status=lambda message: print(message, file=sys.stderr, flush=True),
+        output_formats=output_formats
+    )
+    
+    try:
+        transcriber.run()
+    except (KeyboardInterrupt, TranscriptionCancelled):
+        pass
+
+if __name__ == "__main__":
+    main()
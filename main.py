@@ -2,14 +2,58 @@ import os
 import sys
 import subprocess
 import argparse
-import tkinter as tk
 
 def main():
+    # Headless batch commands - handled before anything imports Tk or Gradio
+    if len(sys.argv) > 1 and sys.argv[1] in ('batch', 'instagram', 'replay', 'enqueue', 'worker', 'autotune'):
+        from cli import main as run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+    
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Video Transcriber with Whisper AI')
     parser.add_argument('-web', '--web', action='store_true', help='Run in web UI mode with Gradio')
+    parser.add_argument('-server', '--server', action='store_true', help='Run the background transcription server that keeps models loaded')
+    parser.add_argument('-live', '--live', metavar='SOURCE', help='Live-transcribe a growing recording, FIFO, or - for stdin')
+    parser.add_argument('-watch', '--watch', metavar='FOLDER', help='Transcribe new videos in a folder as they arrive (headless)')
+    parser.add_argument('-o', '--output', help='Transcript file for --live mode, or transcript folder for --watch mode')
+    parser.add_argument('-m', '--model', default='base', help='Whisper model for --live and --watch modes')
+    parser.add_argument('--groq', action='store_true', help='Summarize with Groq in --watch mode (saved Groq settings)')
+    parser.add_argument('--notion', action='store_true', help='Add transcripts to Notion in --watch mode (saved Notion settings)')
+    parser.add_argument('--formats', help='Extra transcript formats for --live and --watch modes, e.g. srt,vtt,tsv,json')
     args = parser.parse_args()
     
+    # Run the transcription server in the foreground
+    if args.server:
+        from transcription_server import main as run_server
+        run_server()
+        return
+    
+    # Live-transcribe a growing file or piped stream from the command line
+    if args.live:
+        from live_transcription import main as run_live
+        live_args = [args.live, '--model', args.model]
+        if args.output:
+            live_args += ['--output', args.output]
+        if args.formats:
+            live_args += ['--formats', args.formats]
+        run_live(live_args)
+        return
+    
+    # Watch a folder and transcribe new videos without the GUI
+    if args.watch:
+        from watch_folder import main as run_watch
+        watch_args = [args.watch, '--model', args.model]
+        if args.output:
+            watch_args += ['--output', args.output]
+        if args.groq:
+            watch_args.append('--groq')
+        if args.notion:
+            watch_args.append('--notion')
+        if args.formats:
+            watch_args += ['--formats', args.formats]
+        run_watch(watch_args)
+        return
+    
     # Check for required packages
     if args.web:
         # Check if Gradio is installed for web mode
@@ -34,6 +78,8 @@ def main():
         app.launch()
     else:
         # Traditional GUI mode
+        import tkinter as tk
+        
         try:
             import whisper
             import torch
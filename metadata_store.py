@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from transcript_cache import audio_content_hash
+
+DB_FILE = os.path.join(os.path.expanduser("~"), ".videotranscriber", "metadata.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    path TEXT PRIMARY KEY,
+    shortcode TEXT,
+    content_hash TEXT,
+    url TEXT,
+    description TEXT,
+    hashtags TEXT,
+    created REAL,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS videos_shortcode ON videos (shortcode);
+CREATE INDEX IF NOT EXISTS videos_content_hash ON videos (content_hash);
+"""
+
+# Columns added after the first release (table, column, definition)
+MIGRATIONS = (
+    ("videos", "size", "INTEGER"),
+    ("videos", "mtime", "REAL")
+)
+
+def file_signature(path):
+    """(size, modification time) of a file, or (None, None) if it can't be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_size, stat.st_mtime
+
+def shortcode_from_url(url):
+    """Instagram post shortcode of a /p/, /reel/ or /tv/ URL, or None"""
+    match = re.search(r'instagram\.com/(?:p|reel|tv)/([^/?]+)', url or "")
+    return match.group(1) if match else None
+
+def hashtags_from_description(description):
+    """Hashtags (without #) in a post caption"""
+    return re.findall(r'#(\w+)', description or "")
+
+class MetadataStore:
+    """
+    Persistent store of downloaded videos' original URLs, captions and hashtags.
+    
+    Records live in an SQLite database (~/.videotranscriber/metadata.db) keyed
+    by absolute file path, with indexes on the Instagram shortcode and the
+    file's content hash. A renamed or moved file is still found by its hash, and
+    a post that was already downloaded is found by its shortcode without asking
+    Instagram again. Files are only hashed when no stored hash can be reused
+    and, for lookups, when a stored file has the same size; unknown files are
+    remembered by path, size and modification time so they aren't hashed again.
+    One connection is shared by every thread of the process; WAL mode lets the
+    web UI, the server and the desktop app use it at once.
+    """
+    def __init__(self, db_file=None):
+        self.db_file = db_file or DB_FILE
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+            for table, column, definition in MIGRATIONS:
+                columns = [row["name"] for row in self.connection.execute(f"PRAGMA table_info({table})")]
+                if column not in columns:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS videos_size ON videos (size)")
+        
+        # (path, size, mtime) of files whose content matched no record
+        self._misses = set()
+    
+    def _record(self, row):
+        if row is None:
+            return None
+        record = dict(row)
+        record["hashtags"] = json.loads(record["hashtags"]) if record["hashtags"] else []
+        return record
+    
+    def put(self, video_path, url=None, description=None, shortcode=None, content_hash=None):
+        """
+        Store or update the metadata of a video file
+        
+        Fields that are None keep their stored value. The shortcode is taken
+        from the URL. When no content hash is given, the stored one is kept if
+        the file's size and modification time are unchanged; otherwise the file
+        is hashed.
+        """
+        video_path = os.path.abspath(video_path)
+        shortcode = shortcode or shortcode_from_url(url)
+        size, mtime = file_signature(video_path)
+        if content_hash is None and size is not None:
+            stored = self.get(video_path)
+            if stored and stored["content_hash"] and (stored["size"], stored["mtime"]) == (size, mtime):
+                content_hash = stored["content_hash"]
+            else:
+                try:
+                    content_hash = audio_content_hash(video_path)
+                except OSError:
+                    content_hash = None
+        hashtags = json.dumps(hashtags_from_description(description)) if description is not None else None
+        now = time.time()
+        
+        with self.lock, self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO videos (path, shortcode, content_hash, url, description, hashtags, created, updated,
+                                    size, mtime)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    shortcode = COALESCE(excluded.shortcode, shortcode),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    url = COALESCE(excluded.url, url),
+                    description = COALESCE(excluded.description, description),
+                    hashtags = COALESCE(excluded.hashtags, hashtags),
+                    updated = excluded.updated,
+                    size = COALESCE(excluded.size, size),
+                    mtime = COALESCE(excluded.mtime, mtime)
+                """,
+                (video_path, shortcode, content_hash, url, description, hashtags, now, now, size, mtime)
+            )
+            # A file that matched nothing before may match this record
+            self._misses.clear()
+    
+    def get(self, video_path):
+        """Record stored for a path, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM videos WHERE path = ?", (os.path.abspath(video_path),)
+            ).fetchone()
+        return self._record(row)
+    
+    def find_by_shortcode(self, shortcode):
+        """Most recently updated record of an Instagram post, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM videos WHERE shortcode = ? ORDER BY updated DESC LIMIT 1", (shortcode,)
+            ).fetchone()
+        return self._record(row)
+    
+    def find_by_hash(self, content_hash):
+        """Most recently updated record of a file with this content, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM videos WHERE content_hash = ? ORDER BY updated DESC LIMIT 1", (content_hash,)
+            ).fetchone()
+        return self._record(row)
+    
+    def lookup(self, video_path):
+        """
+        Metadata of a video file, by path or else by content
+        
+        A file found by its content is stored under its new path as well, so
+        the next lookup doesn't need to hash it again. The file is only hashed
+        when a stored file has the same size (or an unknown one), and a file
+        that matched nothing isn't hashed again until it changes.
+        
+        Returns:
+            dict: Record with path, shortcode, content_hash, url, description and hashtags, or None
+        """
+        record = self.get(video_path)
+        if record or not os.path.isfile(video_path):
+            return record
+        
+        size, mtime = file_signature(video_path)
+        miss_key = (os.path.abspath(video_path), size, mtime)
+        with self.lock:
+            if miss_key in self._misses:
+                return None
+            candidate = self.connection.execute(
+                "SELECT 1 FROM videos WHERE content_hash IS NOT NULL AND (size = ? OR size IS NULL) LIMIT 1",
+                (size,)
+            ).fetchone()
+        
+        record = None
+        if candidate:
+            try:
+                content_hash = audio_content_hash(video_path)
+            except OSError:
+                return None
+            record = self.find_by_hash(content_hash)
+        
+        if record:
+            self.put(video_path, record["url"], record["description"], record["shortcode"], content_hash)
+            record["path"] = os.path.abspath(video_path)
+        else:
+            with self.lock:
+                self._misses.add(miss_key)
+        return record
+    
+    def remove(self, video_path):
+        """Forget a video file"""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM videos WHERE path = ?", (os.path.abspath(video_path),))
+
+# Shared by the downloaders, the Notion integration and every transcription path
+_store = None
+_store_lock = threading.Lock()
+
+def get_metadata_store():
+    """Process-wide MetadataStore"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetadataStore()
+        return _store
@@ -0,0 +1,255 @@
+import os
+
+from selective_retranscription import DEFAULT_THRESHOLDS
+
+# Whisper emits timestamp tokens in 20 ms steps
+TIME_PRECISION = 0.02
+
+# Temperatures tried in turn while a window's decode looks unreliable (whisper.transcribe's default)
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+def _tokens_to_segments(tokens, tokenizer, time_offset):
+    """
+    Split decoded tokens into timed segments using Whisper's timestamp tokens
+    
+    Parameters:
+        tokens (list): Token ids returned by the decoder (without the SOT sequence)
+        tokenizer: Whisper tokenizer used for decoding
+        time_offset (float): Start time of the window in seconds
+    
+    Returns:
+        tuple: (closed_segments, trailing_segment or None)
+    """
+    timestamp_begin = tokenizer.timestamp_begin
+    segments = []
+    start_time = None
+    text_tokens = []
+    
+    for token in tokens:
+        if token >= tokenizer.eot:
+            if token < timestamp_begin:
+                # Other special tokens carry no text
+                continue
+            
+            timestamp = (token - timestamp_begin) * TIME_PRECISION
+            if text_tokens and start_time is not None:
+                segments.append({
+                    "start": time_offset + start_time,
+                    "end": time_offset + timestamp,
+                    "text": tokenizer.decode(text_tokens),
+                    "tokens": text_tokens
+                })
+                text_tokens = []
+                start_time = None
+            else:
+                start_time = timestamp
+        else:
+            text_tokens.append(token)
+    
+    trailing = None
+    if text_tokens:
+        trailing = {
+            "start": time_offset + (start_time or 0.0),
+            "end": None,
+            "text": tokenizer.decode(text_tokens),
+            "tokens": text_tokens
+        }
+    
+    return segments, trailing
+
+def _decode_with_fallback(model, audio_features, task, language, fp16):
+    """
+    Decode one encoded window, retrying at higher temperatures like whisper.transcribe
+    
+    A result that is too repetitive (compression ratio) or too unlikely (average
+    log probability) is decoded again at the next temperature, unless the window
+    looks like silence.
+    
+    Returns:
+        DecodingResult: The first acceptable result, or the one at the last temperature
+    """
+    from whisper.decoding import DecodingOptions
+    
+    for temperature in TEMPERATURES:
+        options = DecodingOptions(task=task, language=language, fp16=fp16, temperature=temperature)
+        result = model.decode(audio_features, options)[0]
+        
+        needs_fallback = result.compression_ratio > DEFAULT_THRESHOLDS["compression_ratio"] \
+            or result.avg_logprob < DEFAULT_THRESHOLDS["avg_logprob"]
+        if result.no_speech_prob > DEFAULT_THRESHOLDS["no_speech_prob"] or not needs_fallback:
+            break
+    
+    return result
+
+def transcribe_and_translate(model, audio_file, language=None, cancel_token=None, window_callback=None,
+                             word_timestamps=False):
+    """
+    Produce the original-language transcript and an English translation from one encoder pass
+    
+    Each 30-second window is run through the audio encoder once; the cached
+    encoder output is then decoded twice, once with task="transcribe" and once
+    with task="translate", each with whisper.transcribe's temperature fallback.
+    The transcription drives how far each window advances (windows it finds
+    silent are skipped for both tasks) and translated segments are clipped to
+    that advance, so both outputs stay aligned to the same windows.
+    
+    Parameters:
+        model: Loaded Whisper model (must be multilingual for translation)
+        audio_file (str): Path to the audio file
+        language (str, optional): Source language code; detected from the first window if None
+        cancel_token (CancellationToken, optional): Token checked before every window
+        window_callback (function, optional): Called as callback(frames_done, total_frames)
+        word_timestamps (bool): Add word-level timestamps to the transcription segments
+    
+    Returns:
+        dict: {"transcription": result, "translation": result, "language": code, "duration": seconds}
+            where each result has Whisper-style "text" and "segments" keys
+    """
+    import torch
+    from whisper.audio import N_FRAMES, HOP_LENGTH, SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+    
+    fp16 = model.device.type != "cpu"
+    dtype = torch.float16 if fp16 else torch.float32
+    n_mels = getattr(model.dims, "n_mels", 80)
+    
+    mel = log_mel_spectrogram(audio_file, n_mels=n_mels, padding=N_FRAMES)
+    content_frames = mel.shape[-1] - N_FRAMES
+    duration = content_frames * HOP_LENGTH / SAMPLE_RATE
+    
+    # Detect the language on the first window if it wasn't given
+    if language is None:
+        first_segment = pad_or_trim(mel, N_FRAMES).to(model.device).to(dtype)
+        _, probs = model.detect_language(first_segment)
+        language = max(probs, key=probs.get)
+    
+    tokenizer = get_tokenizer(model.is_multilingual, language=language, task="transcribe")
+    
+    outputs = {
+        "transcribe": [],
+        "translate": []
+    }
+    
+    seek = 0
+    last_speech_timestamp = 0.0
+    while seek < content_frames:
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        
+        segment_size = min(N_FRAMES, content_frames - seek)
+        time_offset = seek * HOP_LENGTH / SAMPLE_RATE
+        window_duration = segment_size * HOP_LENGTH / SAMPLE_RATE
+        
+        mel_segment = pad_or_trim(mel[:, seek:seek + segment_size], N_FRAMES).to(model.device).to(dtype)
+        
+        # Encode once - decode() skips the encoder when handed audio features
+        with torch.no_grad():
+            audio_features = model.embed_audio(mel_segment.unsqueeze(0))
+        
+        results = {}
+        for task in ("transcribe", "translate"):
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            results[task] = _decode_with_fallback(model, audio_features, task, language, fp16)
+            
+            # A window the model finds silent (and isn't confident about) is skipped
+            if task == "transcribe" and results[task].no_speech_prob > DEFAULT_THRESHOLDS["no_speech_prob"] \
+                    and results[task].avg_logprob <= DEFAULT_THRESHOLDS["avg_logprob"]:
+                break
+        
+        if "translate" not in results:
+            seek += segment_size
+            if window_callback:
+                window_callback(min(seek, content_frames), content_frames)
+            continue
+        
+        window_segments = {}
+        consumed = window_duration
+        
+        for task, result in results.items():
+            closed, trailing = _tokens_to_segments(result.tokens, tokenizer, time_offset)
+            
+            if task == "transcribe" and trailing is not None and closed:
+                # The last sentence runs past the window: re-decode it in the next one
+                consumed = closed[-1]["end"] - time_offset
+                trailing = None
+            
+            if trailing is not None:
+                trailing["end"] = time_offset + window_duration
+                closed.append(trailing)
+            
+            for segment in closed:
+                segment.update(
+                    seek=seek, temperature=result.temperature, avg_logprob=result.avg_logprob,
+                    compression_ratio=result.compression_ratio, no_speech_prob=result.no_speech_prob
+                )
+            window_segments[task] = closed
+        
+        window_end = time_offset + consumed
+        transcribed = [segment for segment in window_segments["transcribe"] if segment["start"] < window_end]
+        if word_timestamps and transcribed:
+            add_word_timestamps(
+                segments=transcribed, model=model, tokenizer=tokenizer, mel=mel_segment,
+                num_frames=segment_size, last_speech_timestamp=last_speech_timestamp
+            )
+            words = [word for segment in transcribed for word in segment.get("words", [])]
+            if words:
+                last_speech_timestamp = words[-1]["end"]
+        outputs["transcribe"].extend(transcribed)
+        
+        # Translated text past the transcription's advance is decoded again with the next window
+        outputs["translate"].extend(
+            dict(segment, end=min(segment["end"], window_end))
+            for segment in window_segments["translate"] if segment["start"] < window_end
+        )
+        
+        seek += max(1, min(segment_size, int(round(consumed * SAMPLE_RATE / HOP_LENGTH))))
+        
+        if window_callback:
+            window_callback(min(seek, content_frames), content_frames)
+    
+    def build_result(segments):
+        for index, segment in enumerate(segments):
+            segment["id"] = index
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": language
+        }
+    
+    return {
+        "transcription": build_result(outputs["transcribe"]),
+        "translation": build_result(outputs["translate"]),
+        "language": language,
+        "duration": duration
+    }
+
+def translation_output_path(output_file):
+    """Path of the English translation written next to a transcript file"""
+    base = os.path.splitext(output_file)[0]
+    if base.endswith("_transcript"):
+        base = base[:-len("_transcript")]
+    return base + "_translation.txt"
+
+def write_translation(output_file, transcription):
+    """
+    Write the English translation (if any) next to the transcript file
+    
+    Returns:
+        str: Path of the translation file, or None if there was no translation
+    """
+    if not transcription.get('translation_detailed'):
+        return None
+    
+    translation_file = translation_output_path(output_file)
+    with open(translation_file, "w", encoding="utf-8") as file:
+        file.write(transcription['translation_detailed'])
+    
+    return translation_file
+
+def summary_input_text(transcription):
+    """Transcript text sent to Groq, with the English translation appended when available"""
+    if transcription.get('translation'):
+        return f"{transcription['text']}\n\n--- English Translation ---\n\n{transcription['translation']}"
+    return transcription['text']
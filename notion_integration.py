@@ -1,9 +1,11 @@
 import requests
 import json
 import os
-import re
+import threading
 from datetime import datetime
 
+from metadata_store import get_metadata_store
+
 class NotionIntegration:
     def __init__(self, token=None, database_id=None):
         self.token = token
@@ -13,10 +15,19 @@ class NotionIntegration:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"  # Use the latest Notion API version
         }
-        # Store for original URLs and metadata
-        self.video_url_map = {}
-        self.video_description_map = {}
-        self.video_hashtags_map = {}
+        # Persistent store for original URLs and metadata (survives restarts)
+        self.metadata_store = get_metadata_store()
+        # Per-thread result of add_transcription_to_notion (batch pages are created concurrently)
+        self._local = threading.local()
+    
+    @property
+    def last_page_url(self):
+        """URL of the page created by this thread's last successful add_transcription_to_notion call"""
+        return getattr(self._local, "page_url", None)
+    
+    @last_page_url.setter
+    def last_page_url(self, url):
+        self._local.page_url = url
         
     def set_token(self, token):
         """Set or update the Notion API token"""
@@ -45,6 +56,34 @@ class NotionIntegration:
         except Exception as e:
             return False, f"Connection error: {str(e)}"
     
+    def archive_page(self, page_url):
+        """
+        Archive (move to trash) a page created earlier, e.g. before replacing it
+        
+        Parameters:
+            page_url (str): URL of the page; its id is the last 32 hex digits
+        
+        Returns:
+            tuple: (success, message)
+        """
+        if not self.token:
+            return False, "Notion API token is not set."
+        
+        page_id = page_url.rstrip("/").split("?")[0].replace("-", "")[-32:]
+        try:
+            response = requests.patch(
+                f"https://api.notion.com/v1/pages/{page_id}",
+                headers=self.headers,
+                data=json.dumps({"archived": True})
+            )
+            
+            if response.status_code == 200:
+                return True, "Page archived."
+            else:
+                return False, f"Failed to archive page: {response.status_code} - {response.text}"
+        except Exception as e:
+            return False, f"Error archiving page: {str(e)}"
+    
     def store_video_metadata(self, video_path, original_url, description=None):
         """
         Store the original URL and metadata for a downloaded video
@@ -54,15 +93,8 @@ class NotionIntegration:
             original_url (str): Original URL of the video
             description (str, optional): Description of the video
         """
-        self.video_url_map[video_path] = original_url
-        
-        if description:
-            self.video_description_map[video_path] = description
-            
-            # Extract hashtags from description
-            hashtags = re.findall(r'#(\w+)', description)
-            if hashtags:
-                self.video_hashtags_map[video_path] = hashtags
+        # Hashtags are extracted from the description by the store
+        self.metadata_store.put(video_path, original_url, description or None)
     
     def store_video_url(self, video_path, original_url):
         """
@@ -72,9 +104,10 @@ class NotionIntegration:
             video_path (str): Path to the video file
             original_url (str): Original URL of the video
         """
-        self.video_url_map[video_path] = original_url
+        self.metadata_store.put(video_path, original_url)
         
-    def add_transcription_to_notion(self, video_path, transcription_text, duration=None, groq_result=None):
+    def add_transcription_to_notion(self, video_path, transcription_text, duration=None, groq_result=None, translation_text=None,
+                                    related_page_url=None):
         """
         Add a new page to the Notion database with the transcription
         
@@ -83,10 +116,14 @@ class NotionIntegration:
             transcription_text (str): The transcription text to add
             duration (float, optional): Duration of the video in seconds
             groq_result (dict, optional): Processed result from Groq API containing title and summary
+            translation_text (str, optional): English translation of the transcription
+            related_page_url (str, optional): Notion page of a near-duplicate transcript to link to
         
         Returns:
             tuple: (success, message)
         """
+        self.last_page_url = None
+        
         if not self.token or not self.database_id:
             return False, "Notion API token or database ID is not set."
             
@@ -103,9 +140,10 @@ class NotionIntegration:
             page_title = groq_result["title"]
         
         # Get original URL and metadata if available
-        video_url = self.video_url_map.get(video_path)
-        video_description = self.video_description_map.get(video_path)
-        video_hashtags = self.video_hashtags_map.get(video_path, [])
+        metadata = self.metadata_store.lookup(video_path) or {}
+        video_url = metadata.get("url")
+        video_description = metadata.get("description")
+        video_hashtags = metadata.get("hashtags", [])
         
         # Create the page properties
         page_data = {
@@ -250,6 +288,39 @@ class NotionIntegration:
                 }
             })
         
+        # Add the English translation after the original transcription if available
+        if translation_text:
+            page_data["children"].append({
+                "object": "block",
+                "type": "heading_3",
+                "heading_3": {
+                    "rich_text": [
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": "English Translation"
+                            }
+                        }
+                    ]
+                }
+            })
+            
+            for i in range(0, len(translation_text), max_block_size):
+                page_data["children"].append({
+                    "object": "block",
+                    "type": "paragraph",
+                    "paragraph": {
+                        "rich_text": [
+                            {
+                                "type": "text",
+                                "text": {
+                                    "content": translation_text[i:i+max_block_size]
+                                }
+                            }
+                        ]
+                    }
+                })
+        
         # Add description after transcription if available
         if video_description:
             # Add a divider before the description
@@ -290,6 +361,37 @@ class NotionIntegration:
                 }
             })
         
+        # Link the page of a near-identical transcript (e.g. the same script read by another creator)
+        if related_page_url:
+            page_data["children"].append({
+                "object": "block",
+                "type": "divider",
+                "divider": {}
+            })
+            page_data["children"].append({
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": "Similar transcript: "
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": related_page_url,
+                                "link": {
+                                    "url": related_page_url
+                                }
+                            }
+                        }
+                    ]
+                }
+            })
+        
         # Add video link at the bottom if available
         if video_url:
             page_data["children"].append({
@@ -330,6 +432,7 @@ class NotionIntegration:
             )
             
             if response.status_code == 200:
+                self.last_page_url = response.json().get("url")
                 return True, "Transcription added to Notion successfully."
             else:
                 return False, f"Failed to add to Notion: {response.status_code} - {response.text}"
@@ -0,0 +1,283 @@
+import os
+import time
+import uuid
+import queue
+import threading
+from concurrent.futures import Future
+
+from headless_batch import HeadlessProcessor, transcript_path
+
+# Progress and status shown while a job is in each pipeline stage
+STAGE_STATUS = {
+    "download": (5, "Downloading..."),
+    "extract": (10, "Extracting audio..."),
+    "transcribe": (30, "Transcribing audio..."),
+    "summarize": (80, "Processing with Groq AI..."),
+    "publish": (90, "Saving transcript...")
+}
+
+def engine_settings(model_name="base", language=None, word_timestamps=False, groq_enabled=False,
+                    notion_enabled=False, refine_model_name=None, use_server=False, allow_downgrade=False,
+                    output_formats=None):
+    """Settings that decide whether an engine can be reused for a request"""
+    return {
+        "model_name": model_name,
+        "language": language,
+        "word_timestamps": bool(word_timestamps),
+        "groq_enabled": bool(groq_enabled),
+        "notion_enabled": bool(notion_enabled),
+        "refine_model_name": refine_model_name if refine_model_name not in (None, "None", model_name) else None,
+        "use_server": bool(use_server),
+        "allow_downgrade": bool(allow_downgrade),
+        "output_formats": list(output_formats or [])
+    }
+
+class EngineJob:
+    """
+    Handle of a job submitted to a PipelineEngine.
+    
+    `future` resolves to the job's result dict once it has finished: the
+    HeadlessProcessor result (status, output_file, error, notion_url...) plus
+    "transcription" and "groq_result". Progress arrives as event dicts -
+    {"type": "stage", "stage": name}, {"type": "log", "message": line} and
+    finally {"type": "result", "result": result} - through the on_event
+    callback and the events() iterator.
+    """
+    def __init__(self, job, on_event=None):
+        self.id = job['key']
+        self.job = job
+        self.future = Future()
+        self.on_event = on_event
+        self.events_queue = queue.Queue()
+        
+        job['on_stage'] = lambda stage: self._emit({"type": "stage", "stage": stage})
+        job['on_log'] = lambda message: self._emit({"type": "log", "message": message})
+    
+    def _emit(self, event):
+        event["job_id"] = self.id
+        event["time"] = time.time()
+        self.events_queue.put(event)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"Error in pipeline event callback: {str(e)}")
+    
+    def _finish(self, result=None, error=None):
+        if error is not None:
+            self._emit({"type": "error", "error": str(error)})
+            self.future.set_exception(error)
+        else:
+            self._emit({"type": "result", "result": result})
+            self.future.set_result(result)
+        self.events_queue.put(None)
+    
+    def events(self, timeout=None):
+        """Yield this job's events as they happen until it has finished"""
+        while True:
+            event = self.events_queue.get(timeout=timeout)
+            if event is None:
+                return
+            yield event
+    
+    def result(self, timeout=None):
+        """Block until the job has finished and return its result dict"""
+        return self.future.result(timeout)
+    
+    def done(self):
+        return self.future.done()
+    
+    def cancel(self):
+        """Drop the job if it hasn't started yet; returns False once it is running"""
+        if self.future.cancel():
+            self.events_queue.put(None)
+            return True
+        return False
+
+class PipelineEngine:
+    """
+    Long-lived transcription pipeline that every entry point submits jobs to.
+    
+    Wraps one HeadlessProcessor running on a background thread: submitted
+    jobs go through its download, extract, Whisper, Groq and publish stages
+    with one resident model, so the transcript cache, speech triage, memory
+    governor, stage concurrency and speed measurements apply to every caller.
+    submit() returns at once with an EngineJob (a future plus progress events).
+    """
+    def __init__(self, model_name="base", language=None, word_timestamps=False, groq_enabled=False,
+                 notion_enabled=False, refine_model_name=None, use_server=False, allow_downgrade=False,
+                 groq_api=None, notion_api=None, output_formats=None, log=print):
+        """
+        Parameters:
+            model_name (str): Whisper model kept loaded while the engine runs
+            language (str, optional): Language code; detected per file if None
+            word_timestamps (bool): Write segment timestamps into the transcripts
+            groq_enabled (bool): Add a Groq title and summary
+            notion_enabled (bool): Add each transcript to Notion
+            refine_model_name (str, optional): Larger model for low-confidence segments
+            use_server (bool): Transcribe in the background transcription server when it is reachable
+            allow_downgrade (bool): Load a smaller model instead of waiting when memory is short
+            groq_api (GroqIntegration, optional): Configured integration instead of the saved settings
+            notion_api (NotionIntegration, optional): Configured integration instead of the saved settings
+            output_formats (list, optional): Extra formats written next to each transcript ("srt", "vtt",
+                "tsv", "json")
+            log (function): Writes the engine's log lines (in submission order)
+        
+        Raises:
+            ValueError: If Groq or Notion is enabled but not configured
+        """
+        self.settings = engine_settings(
+            model_name, language, word_timestamps, groq_enabled, notion_enabled, refine_model_name, use_server,
+            allow_downgrade, output_formats
+        )
+        self.processor = HeadlessProcessor(
+            model_name, language, word_timestamps, groq_enabled, notion_enabled,
+            log=log, on_result=self._finished, refine_model_name=refine_model_name,
+            use_server=use_server, allow_downgrade=allow_downgrade, groq_api=groq_api, notion_api=notion_api,
+            output_formats=output_formats
+        )
+        self.log = log
+        self.submitted = queue.Queue()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    @property
+    def running(self):
+        return self.thread.is_alive() and not self.closed.is_set()
+    
+    def submit(self, video_file=None, url=None, output_file=None, output_dir=None, download_dir=None,
+               delete_video=False, on_event=None):
+        """
+        Queue a video file or an Instagram URL
+        
+        Parameters:
+            video_file (str, optional): Video to transcribe
+            url (str, optional): Instagram post to download and transcribe instead
+            output_file (str, optional): Transcript file (default: <video>_transcript.txt in output_dir,
+                or next to the video)
+            output_dir (str, optional): Folder for the transcript
+            download_dir (str, optional): Folder for downloaded Instagram videos
+            delete_video (bool): Delete the video once its transcript is saved
+            on_event (function, optional): Called with each progress event of this job
+        
+        Returns:
+            EngineJob: Handle with the job's future and events
+        
+        Raises:
+            RuntimeError: If the engine has been shut down
+        """
+        if not video_file and not url:
+            raise ValueError("A video file or an Instagram URL is required")
+        
+        job = {'key': uuid.uuid4().hex, 'delete_video': delete_video}
+        if url:
+            job['url'] = url
+            job['video_file'] = url
+            job['download_dir'] = download_dir or output_dir or os.getcwd()
+            job['output_dir'] = output_dir
+        else:
+            job['video_file'] = video_file
+            job['output_file'] = output_file or transcript_path(video_file, output_dir)
+        
+        engine_job = EngineJob(job, on_event)
+        with self.pending_lock:
+            if self.closed.is_set():
+                raise RuntimeError("The pipeline engine has been shut down")
+            self.pending[job['key']] = engine_job
+        self.submitted.put(engine_job)
+        return engine_job
+    
+    def _jobs(self):
+        """Submitted jobs, waiting for new ones until the engine is shut down"""
+        while True:
+            engine_job = self.submitted.get()
+            if engine_job is None:
+                return
+            if not engine_job.future.set_running_or_notify_cancel():
+                with self.pending_lock:
+                    self.pending.pop(engine_job.id, None)
+                continue
+            yield engine_job.job
+    
+    def _finished(self, result):
+        with self.pending_lock:
+            engine_job = self.pending.pop(result['key'], None)
+        if engine_job is None:
+            return
+        
+        # The processor drops the transcript right after reporting, so hand it over now
+        result = dict(
+            result,
+            transcription=engine_job.job.get('transcription'),
+            groq_result=engine_job.job.get('groq_result')
+        )
+        engine_job._finish(result)
+    
+    def _run(self):
+        try:
+            self.processor.run(self._jobs(), should_stop=self.closed.is_set)
+        except Exception as e:
+            self.log(f"Pipeline engine stopped: {str(e)}")
+            error = e
+        else:
+            error = RuntimeError("The pipeline engine was shut down")
+        finally:
+            self.processor.close()
+        
+        # Jobs that never reached the end (load failure or shutdown)
+        with self.pending_lock:
+            self.closed.set()
+            leftover = list(self.pending.values())
+            self.pending.clear()
+        for engine_job in leftover:
+            if engine_job.future.running() or engine_job.future.set_running_or_notify_cancel():
+                engine_job._finish(error=error)
+    
+    def shutdown(self, wait=True, cancel_current=False):
+        """
+        Stop the engine: queued jobs still run unless cancel_current is True,
+        which also aborts the jobs in progress. The model is unloaded afterwards.
+        """
+        if cancel_current:
+            self.closed.set()
+            self.processor.cancel()
+        self.submitted.put(None)
+        if wait:
+            self.thread.join()
+    
+    def cancel(self):
+        """Abort every job in progress and queued (the engine shuts down)"""
+        self.shutdown(wait=False, cancel_current=True)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine(model_name="base", language=None, word_timestamps=False, groq_enabled=False, notion_enabled=False,
+               refine_model_name=None, use_server=False, allow_downgrade=False, groq_api=None, notion_api=None,
+               output_formats=None):
+    """
+    Return the process-wide engine for these settings
+    
+    An engine with other settings (or one that was canceled) is shut down once
+    its queued jobs are done, so only one Whisper model stays resident.
+    """
+    global _engine
+    settings = engine_settings(
+        model_name, language, word_timestamps, groq_enabled, notion_enabled, refine_model_name, use_server,
+        allow_downgrade, output_formats
+    )
+    with _engine_lock:
+        if _engine is not None and _engine.running and _engine.settings == settings:
+            return _engine
+        
+        if _engine is not None:
+            _engine.shutdown(wait=False)
+        _engine = PipelineEngine(
+            model_name, language, word_timestamps, groq_enabled, notion_enabled,
+            refine_model_name=refine_model_name, use_server=use_server, allow_downgrade=allow_downgrade,
+            groq_api=groq_api, notion_api=notion_api, output_formats=output_formats
+        )
+        return _engine
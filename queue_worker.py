@@ -0,0 +1,186 @@
+import os
+import uuid
+import socket
+import threading
+
+from headless_batch import HeadlessProcessor, video_files_in, transcript_path
+from batch_scheduler import probe_durations, order_files
+from job_queue import get_job_queue, urls_source, SHARED_KIND, DEFAULT_LEASE_SECONDS, HEARTBEAT_INTERVAL
+
+# Jobs a worker holds leases for at once (one transcribing, one being extracted ahead)
+DEFAULT_PREFETCH = 2
+
+# Seconds between checks of an empty queue
+DEFAULT_POLL_INTERVAL = 5.0
+
+def enqueue(input_path, output_dir, options, urls=None):
+    """
+    Add a folder of videos or a list of Instagram URLs to the shared queue
+    
+    Videos are queued longest first, so with several workers no long file is
+    left running alone at the end. Enqueueing the same input and output
+    folder again adds only the files that aren't queued yet.
+    
+    Parameters:
+        input_path (str): Folder with videos, or the URL file (for its name only)
+        output_dir (str): Transcript folder (must be reachable from every worker)
+        options (dict): HeadlessProcessor.options() the items are processed with
+        urls (list, optional): Instagram URLs instead of the folder's videos
+    
+    Returns:
+        tuple: (batch id, number of items in the batch)
+    """
+    if urls is not None:
+        source = urls_source(urls)
+        keys = urls
+    else:
+        source = os.path.abspath(input_path)
+        video_files = [os.path.abspath(video_file) for video_file in video_files_in(input_path)]
+        keys = order_files(video_files, probe_durations(video_files), "longest")
+    
+    batch_id, _ = get_job_queue().open_batch(SHARED_KIND, source, os.path.abspath(output_dir), keys, options)
+    return batch_id, len(keys)
+
+class QueueWorker:
+    """
+    Worker process that transcribes items from the shared job queue.
+    
+    Items are claimed with a lease that a heartbeat thread renews while the
+    worker holds them; if the worker crashes, its leases expire and other
+    workers pick the items up again, continuing from the last stage recorded
+    in the queue. Only `prefetch` items are held at once, so a worker never
+    sits on work that an idle worker could start. The Whisper model is kept
+    loaded while consecutive items share the same settings.
+    """
+    def __init__(self, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, prefetch=DEFAULT_PREFETCH,
+                 exit_when_empty=False, poll_interval=DEFAULT_POLL_INTERVAL, log=print, on_result=None):
+        """
+        Parameters:
+            worker_id (str, optional): Name used in lease ids (default host:pid)
+            lease_seconds (float): Seconds a lease lasts without a heartbeat
+            prefetch (int): Items leased at once
+            exit_when_empty (bool): Return once every queued item is done instead of waiting for work
+            poll_interval (float): Seconds between checks of an empty queue
+            log (function): Writes one log line
+            on_result (function, optional): Called with each finished item's result dict
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.prefetch = max(1, prefetch)
+        self.exit_when_empty = exit_when_empty
+        self.poll_interval = poll_interval
+        self.log = log
+        self.on_result = on_result
+        
+        self.queue = get_job_queue()
+        self.slots = threading.Semaphore(self.prefetch)
+        self.leases = {}
+        self.leases_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.processor = None
+        self.counts = {"done": 0, "no_speech": 0, "failed": 0, "cancelled": 0}
+    
+    def stop(self, cancel_current=False):
+        """Stop claiming items; leased items finish unless cancel_current is True"""
+        self.stop_event.set()
+        if cancel_current and self.processor:
+            self.processor.cancel()
+    
+    def _heartbeat(self, done):
+        """Renew every held lease until `done` is set"""
+        interval = min(HEARTBEAT_INTERVAL, self.lease_seconds / 4)
+        while not done.wait(interval):
+            with self.leases_lock:
+                leases = list(self.leases.items())
+            for (batch_id, key), lease_id in leases:
+                if not self.queue.heartbeat(batch_id, key, lease_id, self.lease_seconds):
+                    self.log(f"Warning: lease on {key} was lost - another worker may process it too")
+    
+    def _jobs(self, options):
+        """Yield claimed items with these settings until the queue has none (or stop)"""
+        while not self.stop_event.is_set():
+            if not self.slots.acquire(timeout=1.0):
+                continue
+            
+            lease_id = f"{self.worker_id}/{uuid.uuid4().hex}"
+            item = self.queue.claim(lease_id, self.lease_seconds, options)
+            if item is None:
+                self.slots.release()
+                with self.leases_lock:
+                    busy = bool(self.leases)
+                waiting_options = self.queue.next_claimable_options()
+                if waiting_options is not None and not busy:
+                    # Items with other settings are waiting - reload the model for them
+                    return
+                if waiting_options is None and self.exit_when_empty and not busy \
+                   and not self.queue.open_shared_items():
+                    return
+                self.stop_event.wait(self.poll_interval if waiting_options is None else 1.0)
+                continue
+            
+            with self.leases_lock:
+                self.leases[(item['batch_id'], item['key'])] = lease_id
+            self.log(f"Claimed {item['key']} (attempt {item['attempts']})")
+            
+            job = {
+                'key': item['key'],
+                'batch_id': item['batch_id'],
+                'queue_item': item,
+                'video_file': item['key']
+            }
+            if item['key'].startswith(("http://", "https://")):
+                job['url'] = item['key']
+                job['download_dir'] = item['output_dir']
+            else:
+                job['output_file'] = transcript_path(item['key'], item['output_dir'])
+            yield job
+    
+    def _finished(self, result):
+        """Give the lease back and close the batch if this was its last item"""
+        with self.leases_lock:
+            lease_id = self.leases.pop((result['batch_id'], result['key']), None)
+        if lease_id:
+            self.queue.release(result['batch_id'], result['key'], lease_id)
+        self.slots.release()
+        
+        self.counts[result['status']] += 1
+        if result['status'] != "cancelled" and self.queue.finish_if_done(result['batch_id']):
+            self.log(f"Batch {result['batch_id']} is complete")
+        
+        if self.on_result:
+            self.on_result(result)
+    
+    def run(self):
+        """Process queue items until stopped (or until the queue is empty with exit_when_empty)"""
+        heartbeat_done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(heartbeat_done,), daemon=True)
+        heartbeat.start()
+        self.log(f"Worker {self.worker_id} waiting for jobs")
+        
+        try:
+            while not self.stop_event.is_set():
+                options = self.queue.next_claimable_options()
+                if options is None:
+                    # Leased items of other workers come back if those workers crash
+                    if self.exit_when_empty and not self.queue.open_shared_items():
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                
+                if self.processor is None or self.processor.options() != options:
+                    if self.processor:
+                        self.processor.close()
+                    self.processor = HeadlessProcessor(
+                        options.get("model", "base"), options.get("language"), options.get("word_timestamps", False),
+                        options.get("groq", False), options.get("notion", False),
+                        log=self.log, on_result=self._finished, output_formats=options.get("formats")
+                    )
+                self.processor.run(self._jobs(options), should_stop=self.stop_event.is_set)
+        finally:
+            self.stop_event.set()
+            if self.processor:
+                self.processor.close()
+            heartbeat_done.set()
+            heartbeat.join()
+        
+        return dict(self.counts)
@@ -0,0 +1,356 @@
+import os
+import subprocess
+import threading
+import time
+import wave
+
+from cancellation import TranscriptionCancelled
+
+# Approximate resident memory of a loaded Whisper model (weights + runtime overhead) in MB
+MODEL_MEMORY_MB = {
+    "tiny": 400,
+    "base": 600,
+    "small": 1400,
+    "medium": 3500,
+    "large": 7000
+}
+
+# Smallest to largest - used when a job has to be downgraded
+MODEL_ORDER = ["tiny", "base", "small", "medium", "large"]
+
+# whisper.load_audio decodes to 16 kHz float32, and the log-mel spectrogram
+# (80 bins x 100 frames/s, float32) plus intermediate copies roughly double that
+AUDIO_BYTES_PER_SECOND = 16000 * 4 * 2 + 80 * 100 * 4
+
+# Headroom left for Python, torch and the UI itself
+BASE_OVERHEAD_MB = 300
+
+# Seconds a job waits for other processes to free memory when this one runs nothing
+SYSTEM_MEMORY_WAIT = 60.0
+
+BUDGET_ENV_VAR = "VIDEOTRANSCRIBER_MEMORY_BUDGET_MB"
+DOWNGRADE_ENV_VAR = "VIDEOTRANSCRIBER_DOWNGRADE_ON_MEMORY"
+
+def model_memory_mb(model_name):
+    """Approximate RSS of a Whisper model in MB (unknown names are treated as 'large')"""
+    if not model_name or model_name == "None":
+        return 0
+    
+    for size in reversed(MODEL_ORDER):
+        if model_name.startswith(size):
+            return MODEL_MEMORY_MB[size]
+    
+    return MODEL_MEMORY_MB["large"]
+
+def audio_memory_mb(duration):
+    """Approximate memory needed to hold decoded audio of the given duration in MB"""
+    if not duration:
+        return 0
+    return int(duration * AUDIO_BYTES_PER_SECOND / (1024 * 1024)) + 1
+
+def media_duration(media_file):
+    """
+    Get the duration of an audio or video file in seconds
+    
+    WAV files are read from their header; anything else is probed with ffprobe.
+    
+    Returns:
+        float: Duration in seconds, or None if it could not be determined
+    """
+    try:
+        with wave.open(media_file, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except Exception:
+        pass
+    
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", media_file],
+            capture_output=True, text=True, check=True
+        )
+        return float(result.stdout.strip())
+    except Exception:
+        return None
+
+def _read_meminfo():
+    """Read /proc/meminfo into a dict of MB values (empty on non-Linux systems)"""
+    values = {}
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if parts:
+                    values[key] = int(parts[0]) // 1024
+    except Exception:
+        pass
+    return values
+
+def total_memory_mb():
+    """Total physical memory in MB, or None if it can't be determined"""
+    meminfo = _read_meminfo()
+    if "MemTotal" in meminfo:
+        return meminfo["MemTotal"]
+    
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def available_memory_mb():
+    """Memory the OS can hand out without swapping in MB, or None if unknown"""
+    return _read_meminfo().get("MemAvailable")
+
+def default_budget_mb():
+    """
+    Memory budget for transcription jobs in MB
+    
+    Uses the VIDEOTRANSCRIBER_MEMORY_BUDGET_MB environment variable if set,
+    otherwise 75% of physical memory.
+    """
+    configured = os.environ.get(BUDGET_ENV_VAR)
+    if configured:
+        try:
+            return int(configured)
+        except ValueError:
+            print(f"Ignoring invalid {BUDGET_ENV_VAR} value: {configured}")
+    
+    total = total_memory_mb()
+    if total:
+        return int(total * 0.75)
+    
+    # Unknown platform - don't block anything
+    return None
+
+def downgrade_by_default():
+    """True if VIDEOTRANSCRIBER_DOWNGRADE_ON_MEMORY asks for smaller models instead of waiting"""
+    return os.environ.get(DOWNGRADE_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+class Reservation:
+    """Memory held by an admitted job; release() it when the job finishes"""
+    def __init__(self, governor, job_name, model_name, refine_model_name, memory_mb, reason=None):
+        self.governor = governor
+        self.job_name = job_name
+        self.model_name = model_name
+        self.refine_model_name = refine_model_name
+        self.memory_mb = memory_mb
+        self.reason = reason
+        self._released = False
+    
+    def release(self):
+        """Return the reserved memory to the governor (safe to call twice)"""
+        if not self._released:
+            self._released = True
+            self.governor._release(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class ResourceGovernor:
+    """
+    Admission control for transcription jobs based on estimated memory use.
+    
+    Every job asks for model + refine model + decoded audio memory before it
+    loads anything. Jobs that would push this process past the budget (or past
+    the memory the OS still has available, which accounts for models loaded
+    by other processes such as the web UI) either wait for running jobs to
+    finish or are downgraded to a smaller model.
+    """
+    def __init__(self, budget_mb=None, poll_interval=2.0, system_wait=SYSTEM_MEMORY_WAIT):
+        """
+        Parameters:
+            budget_mb (int, optional): Memory budget in MB (default: default_budget_mb())
+            poll_interval (float): Seconds between checks of the system's available memory
+            system_wait (float): Seconds a job waits for other processes to free system memory
+                while this process runs nothing
+        """
+        self.budget_mb = budget_mb if budget_mb is not None else default_budget_mb()
+        self.poll_interval = poll_interval
+        self.system_wait = system_wait
+        self._condition = threading.Condition()
+        self._reservations = []
+        self._releases = 0
+    
+    @property
+    def reserved_mb(self):
+        """Memory currently reserved by running jobs in MB"""
+        with self._condition:
+            return sum(reservation.memory_mb for reservation in self._reservations)
+    
+    def estimate_mb(self, model_name, duration, refine_model_name=None):
+        """Estimated peak memory of one job in MB"""
+        return (model_memory_mb(model_name) + model_memory_mb(refine_model_name)
+                + audio_memory_mb(duration) + BASE_OVERHEAD_MB)
+    
+    def _check(self, required_mb, resident_mb):
+        """
+        Check whether a job fits right now (caller holds the lock)
+        
+        Returns:
+            str: Reason the job has to wait, or None if it fits
+        """
+        in_use = sum(reservation.memory_mb for reservation in self._reservations)
+        
+        if self.budget_mb is not None and in_use + required_mb > self.budget_mb:
+            if self._reservations:
+                return (f"needs ~{required_mb} MB but {in_use} MB of the {self.budget_mb} MB budget "
+                        f"is held by {len(self._reservations)} running job(s)")
+            return f"needs ~{required_mb} MB, more than the {self.budget_mb} MB memory budget"
+        
+        # Models already loaded by this process are part of the OS figure
+        available = available_memory_mb()
+        if available is not None and required_mb - resident_mb > available:
+            return f"needs ~{required_mb} MB but only {available} MB of system memory is available"
+        
+        return None
+    
+    def _candidates(self, model_name, refine_model_name, allow_downgrade):
+        """(model, refine_model) pairs to try, preferred first"""
+        candidates = [(model_name, refine_model_name)]
+        
+        if not allow_downgrade:
+            return candidates
+        
+        # Dropping the optional refinement pass is the cheapest downgrade
+        if refine_model_name and refine_model_name != "None":
+            candidates.append((model_name, None))
+        
+        if model_name in MODEL_ORDER:
+            for smaller in reversed(MODEL_ORDER[:MODEL_ORDER.index(model_name)]):
+                candidates.append((smaller, None))
+        
+        return candidates
+    
+    def acquire(self, job_name, model_name, duration=None, refine_model_name=None,
+                allow_downgrade=False, resident_model_name=None, cancel_token=None, on_wait=None):
+        """
+        Block until a job fits in the memory budget and reserve its memory
+        
+        When the job only waits for system memory while this process holds no
+        reservations, nothing here can free it; after system_wait seconds the
+        job runs anyway (with the smallest allowed model) and on_wait gets a
+        warning.
+        
+        Parameters:
+            job_name (str): Name shown in status messages (e.g. the file name)
+            model_name (str): Requested Whisper model
+            duration (float, optional): Audio duration in seconds
+            refine_model_name (str, optional): Model used for the refinement pass
+            allow_downgrade (bool): Use a smaller model instead of waiting
+            resident_model_name (str, optional): Model this process already has loaded
+            cancel_token (CancellationToken, optional): Token checked while waiting
+            on_wait (function, optional): Called with a message whenever the wait reason changes
+                (never while the governor's lock is held)
+        
+        Returns:
+            Reservation: The admitted job's reservation (model names may be downgraded)
+        
+        Raises:
+            TranscriptionCancelled: If the token is canceled while waiting
+        """
+        candidates = self._candidates(model_name, refine_model_name, allow_downgrade)
+        last_reason = None
+        alone_since = None
+        
+        while True:
+            reservation = None
+            message = None
+            
+            with self._condition:
+                if cancel_token and cancel_token.is_cancelled:
+                    raise TranscriptionCancelled("Operation canceled")
+                
+                reason = None
+                for candidate_model, candidate_refine in candidates:
+                    required = self.estimate_mb(candidate_model, duration, candidate_refine)
+                    resident = model_memory_mb(resident_model_name) if resident_model_name == candidate_model else 0
+                    candidate_reason = self._check(required, resident)
+                    
+                    if candidate_reason is None:
+                        admitted_reason = None
+                        if (candidate_model, candidate_refine) != candidates[0]:
+                            admitted_reason = (f"{job_name}: {reason} - using {candidate_model}"
+                                               + ("" if candidate_refine else " without refinement"))
+                        
+                        reservation = Reservation(self, job_name, candidate_model, candidate_refine,
+                                                  required, admitted_reason)
+                        message = admitted_reason
+                        break
+                    
+                    # Report why the requested configuration didn't fit
+                    if reason is None:
+                        reason = candidate_reason
+                
+                if reservation is None and self._reservations:
+                    alone_since = None
+                elif reservation is None:
+                    alone_since = alone_since or time.monotonic()
+                    smallest_model, smallest_refine = candidates[-1]
+                    smallest_required = self.estimate_mb(smallest_model, duration, smallest_refine)
+                    
+                    # Nothing running and even the smallest option exceeds the budget - waiting won't help
+                    over_budget = self.budget_mb is not None and smallest_required > self.budget_mb
+                    # Only other processes can free system memory - don't wait for them forever
+                    waited_out = time.monotonic() - alone_since >= self.system_wait
+                    
+                    if over_budget or waited_out:
+                        reservation = Reservation(self, job_name, smallest_model, smallest_refine, smallest_required,
+                                                  f"{job_name}: {reason} - running anyway, expect swapping")
+                        message = reservation.reason
+                
+                if reservation is not None:
+                    self._reservations.append(reservation)
+                else:
+                    releases = self._releases
+                    if reason != last_reason:
+                        last_reason = reason
+                        message = f"Waiting for memory - {job_name} {reason}"
+            
+            if message and on_wait:
+                on_wait(message)
+            
+            if reservation is not None:
+                return reservation
+            
+            # Wake up when a job finishes, or poll for memory freed by other processes
+            with self._condition:
+                if self._releases == releases:
+                    self._condition.wait(self.poll_interval)
+    
+    def try_acquire(self, job_name, model_name, duration=None):
+        """
+        Reserve memory for a job only if it fits right now
+        
+        Returns:
+            Reservation: The reservation, or None if the job doesn't fit
+        """
+        required = self.estimate_mb(model_name, duration)
+        with self._condition:
+            if self._check(required, 0) is not None:
+                return None
+            reservation = Reservation(self, job_name, model_name, None, required)
+            self._reservations.append(reservation)
+            return reservation
+    
+    def _release(self, reservation):
+        with self._condition:
+            if reservation in self._reservations:
+                self._reservations.remove(reservation)
+            self._releases += 1
+            self._condition.notify_all()
+
+# Shared by every UI and batch runner in this process
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor():
+    """Process-wide ResourceGovernor"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ResourceGovernor()
+        return _governor
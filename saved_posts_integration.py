@@ -1,8 +1,15 @@
 import os
+import queue
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+from metadata_store import get_metadata_store
+from disk_budget import DiskBudget, default_budget_mb
+from cancellation import CancellationToken, TranscriptionCancelled
+from transcript_dedup import TranscriptIndex
+from job_manager import get_job_manager, PRIORITY_BATCH, RUNNING, DONE, FAILED, CANCELLED
+
 def add_saved_posts_tab(gui_instance):
     """
     Add a tab for downloading and transcribing saved Instagram posts
@@ -108,6 +115,11 @@ def add_saved_posts_tab(gui_instance):
     ttk.Checkbutton(options_frame, text="Auto-delete videos after transcription", 
                   variable=gui_instance.instagram_auto_delete).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
     
+    # Disk budget - downloads pause while this much video waits for transcription
+    gui_instance.saved_disk_budget = tk.StringVar(value=str(default_budget_mb()))
+    ttk.Label(options_frame, text="Pause downloads above (MB untranscribed):").grid(row=4, column=0, sticky=tk.W, pady=5)
+    ttk.Entry(options_frame, textvariable=gui_instance.saved_disk_budget, width=8).grid(row=4, column=1, sticky=tk.W, pady=5)
+    
     options_frame.columnconfigure(1, weight=1)
     
     # Action buttons
@@ -118,6 +130,9 @@ def add_saved_posts_tab(gui_instance):
               command=lambda: download_saved_posts(gui_instance)).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="Test Login", 
               command=lambda: test_instagram_login(gui_instance)).pack(side=tk.LEFT, padx=5)
+    gui_instance.saved_cancel_button = ttk.Button(button_frame, text="Cancel", state=tk.DISABLED,
+                                                  command=lambda: cancel_saved_posts(gui_instance))
+    gui_instance.saved_cancel_button.pack(side=tk.LEFT, padx=5)
     
     # Progress bar and status
     progress_frame = ttk.Frame(saved_tab)
@@ -382,6 +397,10 @@ def download_saved_posts(gui_instance):
     update_saved_progress(gui_instance, 0, "Starting download...")
     gui_instance.saved_log.delete(1.0, tk.END)
     
+    # Stops the downloads and the transcription of this run (not the Instagram batch)
+    gui_instance.saved_cancel_token = CancellationToken()
+    gui_instance.saved_cancel_button.config(state=tk.NORMAL)
+    
     # Start download in a thread
     threading.Thread(
         target=download_saved_posts_thread,
@@ -389,8 +408,16 @@ def download_saved_posts(gui_instance):
         daemon=True
     ).start()
 
+def cancel_saved_posts(gui_instance):
+    """Stop the saved-posts downloads and the video being transcribed"""
+    if getattr(gui_instance, 'saved_cancel_token', None):
+        gui_instance.saved_cancel_token.cancel()
+        update_saved_log(gui_instance, "Canceling saved posts...")
+    gui_instance.saved_cancel_button.config(state=tk.DISABLED)
+
 def download_saved_posts_thread(gui_instance, output_dir):
     """Thread function to download saved posts"""
+    cancel_token = gui_instance.saved_cancel_token
     try:
         import instaloader
     except ImportError:
@@ -501,8 +528,28 @@ def download_saved_posts_thread(gui_instance, output_dir):
         update_saved_progress(gui_instance, 20, "Fetching saved posts...")
         update_saved_log(gui_instance, "Fetching list of saved posts...")
         
-        # Track videos for transcription
-        downloaded_videos = []
+        # Videos are transcribed while the next ones download; the disk budget
+        # pauses the downloads when transcription falls behind
+        transcribe = gui_instance.download_videos.get() and gui_instance.auto_transcribe.get()
+        video_queue = None
+        budget = None
+        consumer = None
+        if transcribe:
+            try:
+                budget_mb = int(gui_instance.saved_disk_budget.get())
+            except ValueError:
+                budget_mb = default_budget_mb()
+                update_saved_log(gui_instance, f"Invalid disk budget - using {budget_mb} MB")
+            budget = DiskBudget(output_dir, budget_mb)
+            video_queue = queue.Queue()
+            consumer = threading.Thread(
+                target=transcribe_saved_videos_thread,
+                args=(gui_instance, video_queue, budget, output_dir),
+                daemon=True
+            )
+            consumer.start()
+        
+        queued_videos = 0
         counter = 0
         
         try:
@@ -513,6 +560,9 @@ def download_saved_posts_thread(gui_instance, output_dir):
             for post in saved_posts:
                 if counter >= total_posts:
                     break
+                if cancel_token.is_cancelled:
+                    update_saved_log(gui_instance, f"Downloads canceled after {counter} posts")
+                    break
                 
                 try:
                     # Update progress
@@ -529,21 +579,43 @@ def download_saved_posts_thread(gui_instance, output_dir):
                         update_saved_log(gui_instance, f"Skipping post {post.shortcode} (is a video)")
                         continue
                     
-                    update_saved_log(gui_instance, f"Downloading post {post.shortcode} from {post.owner_username}...")
+                    # Determine filename based on instaloader pattern
+                    date_str = post.date_utc.strftime("%Y-%m-%d_%H-%M-%S")
+                    video_filename = f"{output_dir}/{post.owner_username}/{date_str}_UTC_{post.shortcode}.mp4"
                     
-                    # Download the post
-                    L.download_post(post, target=f"{post.owner_username}_{post.shortcode}")
+                    # Don't download a video again if an earlier run already did
+                    known = get_metadata_store().find_by_shortcode(post.shortcode) if post.is_video else None
+                    if known and os.path.isfile(known["path"]) and known["path"] == os.path.abspath(video_filename):
+                        update_saved_log(gui_instance, f"Already downloaded: {post.shortcode}")
+                    else:
+                        # Wait until transcription has caught up enough for another video
+                        if budget and post.is_video:
+                            if budget.wait_for_room(cancel_token, lambda message: update_saved_log(gui_instance, message)):
+                                update_saved_log(gui_instance, "Downloads resumed")
+                        
+                        update_saved_log(gui_instance, f"Downloading post {post.shortcode} from {post.owner_username}...")
+                        
+                        # Download the post
+                        L.download_post(post, target=f"{post.owner_username}_{post.shortcode}")
+                        
+                        # Remember the post's URL and caption for Notion and later runs
+                        if post.is_video and os.path.exists(video_filename):
+                            get_metadata_store().put(
+                                video_filename, f"https://www.instagram.com/p/{post.shortcode}/", post.caption or ""
+                            )
                     
-                    # Track video for transcription
-                    if post.is_video and gui_instance.download_videos.get() and gui_instance.auto_transcribe.get():
-                        # Determine filename based on instaloader pattern
-                        date_str = post.date_utc.strftime("%Y-%m-%d_%H-%M-%S")
-                        video_filename = f"{output_dir}/{post.owner_username}/{date_str}_UTC_{post.shortcode}.mp4"
+                    # Hand the video to transcription right away
+                    if post.is_video and transcribe:
                         if os.path.exists(video_filename):
-                            downloaded_videos.append(video_filename)
+                            budget.add(video_filename)
+                            video_queue.put(video_filename)
+                            queued_videos += 1
                             update_saved_log(gui_instance, f"✓ Video added to transcription queue: {post.shortcode}")
                     
                     counter += 1
+                except TranscriptionCancelled:
+                    update_saved_log(gui_instance, f"Downloads canceled after {counter} posts")
+                    break
                 except Exception as e:
                     update_saved_log(gui_instance, f"Error downloading post {post.shortcode}: {str(e)}")
                     continue
@@ -560,12 +632,8 @@ def download_saved_posts_thread(gui_instance, output_dir):
                 update_saved_progress(gui_instance, 100, f"Download complete - {counter} posts downloaded")
                 update_saved_log(gui_instance, f"Download complete - {counter} posts downloaded")
                 
-                # Start transcription if videos were downloaded
-                if downloaded_videos and gui_instance.auto_transcribe.get():
-                    update_saved_log(gui_instance, f"Starting transcription for {len(downloaded_videos)} videos...")
-                    
-                    # Queue videos for transcription
-                    gui_instance.root.after(0, lambda: queue_videos_for_transcription(gui_instance, downloaded_videos))
+                if queued_videos:
+                    update_saved_log(gui_instance, f"Transcription continues - {queued_videos} videos queued in total")
                 else:
                     gui_instance.root.after(0, lambda: messagebox.showinfo(
                         "Download Complete", 
@@ -580,6 +648,12 @@ def download_saved_posts_thread(gui_instance, output_dir):
                 "Error", 
                 f"Error fetching saved posts: {str(e)}"
             ))
+        finally:
+            # No more videos - the consumer finishes what it has and stops
+            if video_queue is not None:
+                video_queue.put(None)
+            else:
+                gui_instance.root.after(0, lambda: gui_instance.saved_cancel_button.config(state=tk.DISABLED))
     
     except Exception as e:
         update_saved_progress(gui_instance, 0, f"Error: {str(e)}")
@@ -589,55 +663,93 @@ def download_saved_posts_thread(gui_instance, output_dir):
             f"An unexpected error occurred: {str(e)}"
         ))
 
-def queue_videos_for_transcription(gui_instance, video_files):
-    """Queue multiple videos for transcription with auto-delete support"""
-    if not video_files:
-        return
+def transcribe_saved_videos_thread(gui_instance, video_queue, budget, output_dir):
+    """
+    Transcribe saved-post videos as the download thread hands them over
     
-    # Show confirmation dialog
-    if not messagebox.askyesno(
-        "Start Transcription", 
-        f"Ready to transcribe {len(video_files)} downloaded videos?\n\n"
-        "This will add them to the batch processing queue."
-    ):
-        return
+    Runs as one batch job in the job queue, so single-file jobs still go
+    first. Each video is released from the disk budget once it is done (and
+    deleted with auto-delete), which lets paused downloads continue. The
+    Whisper model stays loaded from one video to the next and is only
+    dropped while a single-file job runs in between.
+    """
+    from batch_instagram_integration import transcribe_instagram_video
+    
+    transcript_dir = os.path.join(output_dir, "transcripts")
+    cancel_token = gui_instance.saved_cancel_token
+    # Near-duplicate transcripts are only matched within this run
+    transcript_index = TranscriptIndex()
+    resident_models = {}
+    manager_job = get_job_manager().submit("Instagram saved posts", "saved", PRIORITY_BATCH)
+    log = lambda message: update_saved_log(gui_instance, message)
+    transcribed = 0
+    failed = 0
+    
+    def report_progress(value, status):
+        # The progress bar follows the downloads; transcription only updates the status line
+        gui_instance.root.after(0, lambda: gui_instance.saved_status.set(status))
+    
+    def pause_for(other_job):
+        """Free the model's memory for the job that goes first"""
+        log(f"Pausing transcription for {other_job.name}...")
+        resident_models.clear()
     
-    # Create a list to track completed videos for auto-deletion
-    if gui_instance.instagram_auto_delete.get():
-        if not hasattr(gui_instance, 'batch_completed_videos'):
-            gui_instance.batch_completed_videos = []
-        # Add these videos to the tracking list
-        gui_instance.batch_completed_videos.extend(video_files)
-    
-    # Switch to batch processing tab if it exists
-    for i in range(gui_instance.notebook.index("end")):
-        if gui_instance.notebook.tab(i, "text") == "Batch Processing":
-            gui_instance.notebook.select(i)
-            break
-    
-    # Set batch processing directories
-    if hasattr(gui_instance, 'batch_directory') and hasattr(gui_instance, 'batch_output_directory'):
-        # Get the common directory of the videos
-        common_dir = os.path.dirname(os.path.commonprefix(video_files))
-        output_dir = os.path.join(common_dir, "transcripts")
-        
-        gui_instance.batch_directory.set(common_dir)
-        gui_instance.batch_output_directory.set(output_dir)
-        
-        # Start batch processing
-        if hasattr(gui_instance, 'start_batch_transcription'):
-            gui_instance.root.after(500, gui_instance.start_batch_transcription)
+    try:
+        while True:
+            video_file = video_queue.get()
+            if video_file is None:
+                break
+            
+            try:
+                # Wait for this batch's turn - single-file jobs go first, even between two videos
+                if manager_job.state == RUNNING:
+                    manager_job.checkpoint(cancel_token, on_pause=pause_for, on_wait=log)
+                else:
+                    manager_job.acquire(cancel_token, on_wait=log)
+                
+                os.makedirs(transcript_dir, exist_ok=True)
+                output_file = os.path.join(
+                    transcript_dir, os.path.splitext(os.path.basename(video_file))[0] + "_transcript.txt"
+                )
+                log(f"Transcribing {os.path.basename(video_file)}...")
+                transcribe_instagram_video(
+                    gui_instance, video_file, output_file,
+                    cancel_token=cancel_token,
+                    transcript_index=transcript_index,
+                    log=log,
+                    update_progress=report_progress,
+                    resident_models=resident_models
+                )
+                
+                if os.path.exists(output_file):
+                    transcribed += 1
+                    update_saved_log(gui_instance, f"✓ Transcribed: {os.path.basename(output_file)}")
+                    
+                    if gui_instance.instagram_auto_delete.get() and os.path.exists(video_file):
+                        os.remove(video_file)
+                        update_saved_log(gui_instance, f"✓ Deleted video after processing: {os.path.basename(video_file)}")
+                else:
+                    failed += 1
+                    update_saved_log(gui_instance, f"✗ Transcription failed: {os.path.basename(video_file)}")
+            except TranscriptionCancelled:
+                failed += 1
+                update_saved_log(gui_instance, f"✗ Canceled before transcribing {os.path.basename(video_file)}")
+            except Exception as e:
+                failed += 1
+                update_saved_log(gui_instance, f"✗ Error transcribing {os.path.basename(video_file)}: {str(e)}")
+            finally:
+                budget.release(video_file)
+    finally:
+        resident_models.clear()
+        if cancel_token.is_cancelled:
+            manager_job.finish(CANCELLED)
         else:
-            messagebox.showinfo(
-                "Transcription", 
-                f"Videos have been downloaded to:\n{common_dir}\n\n"
-                "You can now manually transcribe them using the Transcription tab."
-            )
-    else:
-        # If batch processing is not available, just let the user know where the videos are
-        common_dir = os.path.dirname(os.path.commonprefix(video_files))
-        messagebox.showinfo(
-            "Download Complete", 
-            f"Videos have been downloaded to:\n{common_dir}\n\n"
-            "You can now manually transcribe them using the Transcription tab."
-        )
\ No newline at end of file
+            manager_job.finish(DONE if not failed else FAILED)
+        gui_instance.root.after(0, lambda: gui_instance.saved_cancel_button.config(state=tk.DISABLED))
+    
+    update_saved_log(gui_instance, f"Transcription complete - {transcribed} videos transcribed, {failed} failed")
+    gui_instance.root.after(0, lambda: messagebox.showinfo(
+        "Transcription Complete",
+        f"Transcribed {transcribed} saved videos.\n\n"
+        f"Transcripts saved to: {transcript_dir}"
+    ))
@@ -0,0 +1,176 @@
+import time
+
+# Whisper's own fallback thresholds (see whisper.transcribe defaults)
+DEFAULT_THRESHOLDS = {
+    "avg_logprob": -1.0,
+    "compression_ratio": 2.4,
+    "no_speech_prob": 0.6
+}
+
+SAMPLE_RATE = 16000
+
+def is_low_confidence(segment, thresholds=None):
+    """
+    Decide whether a Whisper segment should be re-transcribed with a larger model
+    
+    Parameters:
+        segment (dict): Whisper segment with avg_logprob, compression_ratio and no_speech_prob
+        thresholds (dict, optional): Overrides for DEFAULT_THRESHOLDS
+    
+    Returns:
+        bool: True if the segment looks unreliable
+    """
+    limits = dict(DEFAULT_THRESHOLDS)
+    if thresholds:
+        limits.update(thresholds)
+    
+    if segment.get("avg_logprob", 0.0) < limits["avg_logprob"]:
+        return True
+    
+    # Repetitive output (hallucination loops) compresses unusually well
+    if segment.get("compression_ratio", 0.0) > limits["compression_ratio"]:
+        return True
+    
+    # Text emitted over audio the model itself thinks is silence
+    if segment.get("no_speech_prob", 0.0) > limits["no_speech_prob"] and segment.get("text", "").strip():
+        return True
+    
+    return False
+
+def find_low_confidence_ranges(segments, duration, thresholds=None):
+    """
+    Group consecutive low-confidence segments into time ranges to re-transcribe
+    
+    Each range is widened into the silence gaps around it (up to the neighbouring
+    trusted segments) so the larger model gets clean boundaries without
+    overlapping text that is kept.
+    
+    Parameters:
+        segments (list): Whisper segments
+        duration (float): Total audio duration in seconds
+        thresholds (dict, optional): Overrides for DEFAULT_THRESHOLDS
+    
+    Returns:
+        list: (start, end, segment_indexes) tuples sorted by start time
+    """
+    ranges = []
+    current = None
+    
+    for index, segment in enumerate(segments):
+        if is_low_confidence(segment, thresholds):
+            if current is None:
+                current = [index]
+            else:
+                current.append(index)
+        elif current is not None:
+            ranges.append(current)
+            current = None
+    
+    if current is not None:
+        ranges.append(current)
+    
+    time_ranges = []
+    for indexes in ranges:
+        first = indexes[0]
+        last = indexes[-1]
+        start = segments[first - 1]["end"] if first > 0 else 0.0
+        end = segments[last + 1]["start"] if last + 1 < len(segments) else duration
+        if end > start:
+            time_ranges.append((start, end, indexes))
+    
+    return time_ranges
+
+def _offset_segment(segment, offset):
+    """Shift a segment (and its word timings) produced on a clip back to file time"""
+    shifted = dict(segment)
+    shifted["start"] = segment["start"] + offset
+    shifted["end"] = segment["end"] + offset
+    
+    if "words" in segment:
+        shifted["words"] = [
+            dict(word, start=word["start"] + offset, end=word["end"] + offset)
+            for word in segment["words"]
+        ]
+    
+    shifted["refined"] = True
+    return shifted
+
+def refine_low_confidence_segments(result, audio_file, refine_model, transcribe_options,
+                                   thresholds=None, cancel_token=None, log=None):
+    """
+    Re-transcribe only the low-confidence parts of a Whisper result with a larger model
+    
+    Parameters:
+        result (dict): Whisper transcription result from the fast model
+        audio_file (str or numpy.ndarray): Audio file (or 16 kHz samples) that produced the result
+        refine_model: Loaded (larger) Whisper model
+        transcribe_options (dict): Options used for the first pass
+        thresholds (dict, optional): Overrides for DEFAULT_THRESHOLDS
+        cancel_token (CancellationToken, optional): Token checked between ranges
+        log (function, optional): Called with progress messages
+    
+    Returns:
+        dict: Whisper-style result with the refined segments spliced in
+    """
+    import whisper
+    from cancellation import cancellable_whisper
+    
+    segments = result.get("segments", [])
+    if not segments:
+        return result
+    
+    # The transcription server passes audio that is already decoded
+    audio = whisper.load_audio(audio_file) if isinstance(audio_file, str) else audio_file
+    duration = len(audio) / SAMPLE_RATE
+    
+    ranges = find_low_confidence_ranges(segments, duration, thresholds)
+    if not ranges:
+        if log:
+            log("All segments passed the confidence check - no refinement needed")
+        return result
+    
+    refined_seconds = sum(end - start for start, end, _ in ranges)
+    if log:
+        log(f"Refining {len(ranges)} low-confidence ranges ({refined_seconds:.1f}s of {duration:.1f}s audio)")
+    
+    # Each range is independent, so don't carry text over from the previous clip
+    options = dict(transcribe_options)
+    options["condition_on_previous_text"] = False
+    options["verbose"] = False
+    
+    replaced = set()
+    new_segments = []
+    start_time = time.time()
+    
+    for start, end, indexes in ranges:
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        
+        clip = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        
+        # Give the larger model the trusted text just before the range as context
+        if indexes[0] > 0:
+            options["initial_prompt"] = segments[indexes[0] - 1]["text"].strip()
+        else:
+            options.pop("initial_prompt", None)
+        
+        with cancellable_whisper(refine_model, cancel_token):
+            clip_result = refine_model.transcribe(clip, **options)
+        
+        replaced.update(indexes)
+        new_segments.extend(_offset_segment(segment, start) for segment in clip_result.get("segments", []))
+    
+    kept_segments = [segment for index, segment in enumerate(segments) if index not in replaced]
+    merged = sorted(kept_segments + new_segments, key=lambda segment: segment["start"])
+    
+    for index, segment in enumerate(merged):
+        segment["id"] = index
+    
+    if log:
+        log(f"Refinement completed in {time.time() - start_time:.2f} seconds")
+    
+    refined_result = dict(result)
+    refined_result["segments"] = merged
+    refined_result["text"] = "".join(segment["text"] for segment in merged)
+    refined_result["refined_ranges"] = [(start, end) for start, end, _ in ranges]
+    return refined_result
@@ -0,0 +1,218 @@
+import os
+import subprocess
+
+import numpy as np
+
+from cancellation import run_cancellable
+from resource_governor import media_duration
+
+TRIAGE_ENV_VAR = "VIDEOTRANSCRIBER_SPEECH_TRIAGE"
+
+SAMPLE_RATE = 16000
+
+# 8-second windows spread evenly over the file are decoded: at least three
+# (start, middle, end), one more per two minutes of audio, at most twelve
+SAMPLE_SECONDS = 8.0
+NUM_WINDOWS = 3
+SECONDS_PER_WINDOW = 120.0
+MAX_WINDOWS = 12
+
+# 25 ms frames every 10 ms for the energy features
+FRAME_SIZE = 400
+HOP_SIZE = 160
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP_SIZE
+
+# Loudest frame below this level: the clip is silent
+SILENCE_DB = -50.0
+# Frames this far below the loud frames count as pauses between words
+PAUSE_DB = 25.0
+
+# A window looks like speech on a feature when it reaches these values
+MIN_MODULATION = 0.35      # share of envelope energy at the 2-8 Hz syllable rate
+MIN_PAUSE_RATIO = 0.08     # share of frames that are pauses
+MIN_VOICE_BAND = 0.6       # share of spectral energy between 300 Hz and 3.4 kHz
+
+# Whisper's no-speech probability above which a window is treated as non-speech
+NO_SPEECH_THRESHOLD = 0.6
+
+NO_SPEECH_TEXT = "[No speech detected]"
+
+def triage_enabled_by_default():
+    """
+    True if VIDEOTRANSCRIBER_SPEECH_TRIAGE=1 turns speech triage on
+    
+    Triage is opt-in: it only samples part of each file, and a wrong
+    "no speech" answer drops the whole transcript.
+    """
+    return os.environ.get(TRIAGE_ENV_VAR, "0").lower() in ("1", "true", "yes")
+
+def window_count(duration):
+    """Number of windows sampled from a file of the given duration"""
+    return min(MAX_WINDOWS, max(NUM_WINDOWS, NUM_WINDOWS + int(duration // SECONDS_PER_WINDOW)))
+
+def window_offsets(duration):
+    """Start times of the sampled windows (the whole clip if it is short)"""
+    if not duration or duration <= NUM_WINDOWS * SAMPLE_SECONDS:
+        return [0.0]
+    
+    count = window_count(duration)
+    last = duration - SAMPLE_SECONDS
+    return [last * i / (count - 1) for i in range(count)]
+
+def decode_window(audio_file, offset, seconds, cancel_token=None):
+    """Decode part of a file to 16 kHz mono float32 samples with ffmpeg"""
+    result = run_cancellable([
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-ss", f"{offset:.2f}", "-t", f"{seconds:.2f}",
+        "-i", audio_file, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+    ], cancel_token)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+def speech_features(samples):
+    """
+    Cheap energy and spectral features of one window
+    
+    Returns:
+        dict: peak_db, modulation, pause_ratio and voice_band (see the MIN_* constants)
+    """
+    if len(samples) < FRAME_SIZE * 10:
+        return {"peak_db": -120.0, "modulation": 0.0, "pause_ratio": 0.0, "voice_band": 0.0}
+    
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    loud_db = np.percentile(energy_db, 95)
+    
+    # Speech pauses between words and phrases; music and ambience rarely do
+    pause_ratio = float(np.mean(energy_db < loud_db - PAUSE_DB))
+    
+    # Syllables make the loudness envelope pulse at roughly 4 Hz
+    envelope = energy_db - np.mean(energy_db)
+    modulation_spectrum = np.abs(np.fft.rfft(envelope)) ** 2
+    frequencies = np.fft.rfftfreq(len(envelope), 1.0 / FRAMES_PER_SECOND)
+    in_range = (frequencies >= 0.5) & (frequencies <= 20.0)
+    syllabic = (frequencies >= 2.0) & (frequencies <= 8.0)
+    modulation = float(modulation_spectrum[syllabic].sum() / (modulation_spectrum[in_range].sum() + 1e-10))
+    
+    # Voiced speech keeps most of its energy in the telephone band
+    spectrum = np.abs(np.fft.rfft(samples)) ** 2
+    bins = np.fft.rfftfreq(len(samples), 1.0 / SAMPLE_RATE)
+    voice_band = float(spectrum[(bins >= 300) & (bins <= 3400)].sum() / (spectrum[bins >= 50].sum() + 1e-10))
+    
+    return {
+        "peak_db": float(energy_db.max()),
+        "modulation": modulation,
+        "pause_ratio": pause_ratio,
+        "voice_band": voice_band
+    }
+
+def speech_votes(features):
+    """Number of features (out of three) that look like speech"""
+    return (
+        int(features["modulation"] >= MIN_MODULATION)
+        + int(features["pause_ratio"] >= MIN_PAUSE_RATIO)
+        + int(features["voice_band"] >= MIN_VOICE_BAND)
+    )
+
+def no_speech_probabilities(model, windows, language=None):
+    """Whisper's no-speech probability for each window (one decoding step each)"""
+    import torch
+    import whisper
+    from whisper.audio import N_FRAMES
+    
+    mels = torch.stack([
+        whisper.pad_or_trim(whisper.log_mel_spectrogram(window, n_mels=model.dims.n_mels), N_FRAMES)
+        for window in windows
+    ]).to(model.device)
+    
+    # no_speech_prob comes from the first decoding step, so one token is enough
+    options = whisper.DecodingOptions(
+        task="transcribe",
+        language=language,
+        without_timestamps=True,
+        sample_len=1,
+        fp16=model.device.type == "cuda"
+    )
+    with torch.no_grad():
+        results = whisper.decode(model, mels, options)
+    return [result.no_speech_prob for result in results]
+
+def triage_audio(audio_file, model=None, language=None, cancel_token=None):
+    """
+    Decide whether a file contains speech from a few sampled seconds of audio
+    
+    Silent clips are rejected from their level alone. Otherwise a window counts
+    as speech when Whisper's first-step no-speech probability is low or at least
+    two energy/spectral features look like speech. Without a loaded model only
+    clips where no feature looks like speech are rejected. A file is skipped
+    only when none of its windows look like speech; anything uncertain (unknown
+    duration, a window that can't be decoded) counts as speech, so the file is
+    transcribed.
+    
+    Parameters:
+        audio_file (str): Extracted audio file
+        model: Loaded Whisper model, or None to use the audio features alone
+        language (str, optional): Language code passed to Whisper
+        cancel_token (CancellationToken, optional): Token that stops the decoding
+    
+    Returns:
+        dict: {"speech": bool, "reason": str, "duration": float or None,
+               "no_speech_prob": float or None}
+    """
+    duration = media_duration(audio_file)
+    if not duration:
+        # Without a duration the windows can't cover the file
+        return {"speech": True, "reason": "unknown duration", "duration": duration, "no_speech_prob": None}
+    
+    seconds = SAMPLE_SECONDS if duration > NUM_WINDOWS * SAMPLE_SECONDS else 30.0
+    windows = []
+    for offset in window_offsets(duration):
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        try:
+            window = decode_window(audio_file, offset, seconds, cancel_token)
+        except (OSError, subprocess.CalledProcessError):
+            window = []
+        if not len(window):
+            return {"speech": True, "reason": "audio could not be sampled", "duration": duration,
+                    "no_speech_prob": None}
+        windows.append(window)
+    
+    features = [speech_features(window) for window in windows]
+    
+    if max(feature["peak_db"] for feature in features) < SILENCE_DB:
+        return {"speech": False, "reason": "silent", "duration": duration, "no_speech_prob": None}
+    
+    votes = [speech_votes(feature) for feature in features]
+    
+    if model is None:
+        speech = max(votes) > 0
+        return {
+            "speech": speech,
+            "reason": "speech-like audio" if speech else "no speech-like audio features",
+            "duration": duration,
+            "no_speech_prob": None
+        }
+    
+    if cancel_token:
+        cancel_token.raise_if_cancelled()
+    
+    probabilities = no_speech_probabilities(model, windows, language)
+    speech = any(
+        probability < NO_SPEECH_THRESHOLD or vote >= 2
+        for probability, vote in zip(probabilities, votes)
+    )
+    
+    return {
+        "speech": speech,
+        "reason": "speech detected" if speech else "music or ambient audio only",
+        "duration": duration,
+        "no_speech_prob": min(probabilities)
+    }
+
+def no_speech_transcription(duration=None):
+    """Transcription record stored for a file that was skipped by triage"""
+    return {
+        "text": "",
+        "detailed": NO_SPEECH_TEXT,
+        "duration": duration,
+        "no_speech": True
+    }
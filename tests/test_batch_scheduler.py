@@ -0,0 +1,50 @@
+import pytest
+
+from batch_scheduler import (
+    order_files, completion_times, schedule_estimate, strategy_from_label, format_duration, STRATEGIES
+)
+
+DURATIONS = {"a.mp4": 30.0, "b.mp4": 300.0, "c.mp4": None, "d.mp4": 90.0}
+FILES = list(DURATIONS)
+
+def test_longest_first_puts_unknown_durations_at_the_average():
+    # c.mp4 counts as the mean of the known durations (140 s)
+    assert order_files(FILES, DURATIONS, "longest") == ["b.mp4", "c.mp4", "d.mp4", "a.mp4"]
+
+def test_shortest_first_and_input_order():
+    assert order_files(FILES, DURATIONS, "shortest") == ["a.mp4", "d.mp4", "c.mp4", "b.mp4"]
+    assert order_files(FILES, DURATIONS, "input") == FILES
+
+def test_ties_keep_input_order():
+    durations = {"x": 10.0, "y": 10.0, "z": 10.0}
+    assert order_files(["y", "x", "z"], durations, "longest") == ["y", "x", "z"]
+
+def test_completion_times_use_the_first_free_worker():
+    assert completion_times([5, 3, 2], workers=1) == [5, 8, 10]
+    assert completion_times([5, 3, 2], workers=2) == [5, 3, 5]
+
+def test_longest_first_shortens_the_makespan():
+    durations = {"long": 10.0, "m1": 4.0, "m2": 4.0, "s1": 3.0, "s2": 3.0}
+    input_order = ["s1", "s2", "m1", "m2", "long"]
+    lpt = schedule_estimate(order_files(input_order, durations, "longest"), durations, workers=2)
+    fifo = schedule_estimate(input_order, durations, workers=2)
+    assert lpt["makespan"] == 13.0
+    assert fifo["makespan"] == 17.0
+
+def test_shortest_first_gives_the_earliest_first_result():
+    spt = schedule_estimate(order_files(FILES, DURATIONS, "shortest"), DURATIONS)
+    lpt = schedule_estimate(order_files(FILES, DURATIONS, "longest"), DURATIONS)
+    assert spt["first_result"] == 30.0
+    assert spt["mean_completion"] < lpt["mean_completion"]
+    assert spt["makespan"] == pytest.approx(lpt["makespan"])
+
+def test_estimate_scales_with_processing_speed_and_handles_empty_batches():
+    assert schedule_estimate(["a.mp4"], DURATIONS, seconds_per_audio_second=0.5)["makespan"] == 15.0
+    assert schedule_estimate([], {}) == {"makespan": 0.0, "first_result": 0.0, "mean_completion": 0.0}
+
+def test_strategy_labels_and_duration_format():
+    for name, label in STRATEGIES.items():
+        assert strategy_from_label(label) == name
+        assert strategy_from_label(name) == name
+    assert strategy_from_label("unknown") == "longest"
+    assert format_duration(3725.4) == "1:02:05"
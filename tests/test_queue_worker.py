@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+
+import pytest
+
+from job_queue import JobQueue, DB_ENV_VAR, SHARED_KIND
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OPTIONS = {"model": "base", "language": None, "word_timestamps": False, "groq": False, "notion": False}
+
+# Runs a real QueueWorker whose HeadlessProcessor only records and publishes the
+# items it is handed, so no model or ffmpeg is needed
+WORKER_SCRIPT = """
+import os
+import sys
+import time
+
+import queue_worker
+from job_queue import get_job_queue
+
+PROCESSED_LOG, LEASE_SECONDS, HANG = sys.argv[1], float(sys.argv[2]), sys.argv[3] == "hang"
+
+class RecordingProcessor:
+    def __init__(self, model_name, language, word_timestamps, groq, notion, log=print, on_result=None,
+                 output_formats=None):
+        self.settings = {"model": model_name, "language": language, "word_timestamps": word_timestamps,
+                         "groq": groq, "notion": notion}
+        self.on_result = on_result
+    
+    def options(self):
+        return self.settings
+    
+    def run(self, jobs, should_stop=None):
+        for job in jobs:
+            with open(PROCESSED_LOG, "a", encoding="utf-8") as f:
+                f.write(f"{os.getpid()} {job['key']}\\n")
+            if HANG:
+                # Stuck mid-item until killed; the heartbeat keeps the lease alive meanwhile
+                time.sleep(3600)
+            time.sleep(0.02)
+            get_job_queue().advance(job['batch_id'], job['key'], 'published')
+            self.on_result({'batch_id': job['batch_id'], 'key': job['key'], 'status': 'done'})
+    
+    def cancel(self):
+        pass
+    
+    def close(self):
+        pass
+
+queue_worker.HeadlessProcessor = RecordingProcessor
+worker = queue_worker.QueueWorker(
+    lease_seconds=LEASE_SECONDS, exit_when_empty=True, poll_interval=0.1, log=lambda message: None
+)
+worker.run()
+"""
+
+def start_worker(tmp_path, lease_seconds=30.0, hang=False):
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=REPO_DIR)
+    env[DB_ENV_VAR] = str(tmp_path / "jobs.db")
+    return subprocess.Popen(
+        [sys.executable, "-c", WORKER_SCRIPT, str(tmp_path / "processed.log"), str(lease_seconds),
+         "hang" if hang else "run"],
+        cwd=REPO_DIR, env=env
+    )
+
+def processed(tmp_path):
+    """(pid, key) of every item a worker started processing"""
+    try:
+        with open(tmp_path / "processed.log", encoding="utf-8") as f:
+            return [tuple(line.split(" ", 1)) for line in f.read().splitlines()]
+    except FileNotFoundError:
+        return []
+
+def open_queue(tmp_path, count):
+    job_queue = JobQueue(str(tmp_path / "jobs.db"), shared=True)
+    keys = [f"/videos/clip{index:02d}.mp4" for index in range(count)]
+    batch_id, _ = job_queue.open_batch(SHARED_KIND, "/videos", str(tmp_path / "out"), keys, OPTIONS)
+    return job_queue, batch_id, keys
+
+def wait_all(workers, timeout=60):
+    deadline = time.time() + timeout
+    for worker in workers:
+        try:
+            worker.wait(max(0.1, deadline - time.time()))
+        except subprocess.TimeoutExpired:
+            for other in workers:
+                other.kill()
+            pytest.fail("Worker did not exit once the queue was empty")
+
+def test_workers_process_every_item_exactly_once(tmp_path):
+    job_queue, batch_id, keys = open_queue(tmp_path, 30)
+    
+    workers = [start_worker(tmp_path) for _ in range(3)]
+    wait_all(workers)
+    
+    assert [worker.returncode for worker in workers] == [0, 0, 0]
+    assert sorted(key for _, key in processed(tmp_path)) == keys
+    items = job_queue.items(batch_id)
+    assert all(item["state"] == "published" for item in items.values())
+    assert all(item["attempts"] == 1 for item in items.values())
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_killed_workers_item_is_reclaimed_after_its_lease_expires(tmp_path):
+    job_queue, batch_id, keys = open_queue(tmp_path, 3)
+    
+    stuck = start_worker(tmp_path, lease_seconds=1.0, hang=True)
+    deadline = time.time() + 30
+    while not processed(tmp_path):
+        if time.time() > deadline or stuck.poll() is not None:
+            stuck.kill()
+            pytest.fail("The first worker never claimed an item")
+        time.sleep(0.05)
+    stuck_pid, stuck_key = processed(tmp_path)[0]
+    
+    os.kill(stuck.pid, signal.SIGKILL)
+    stuck.wait()
+    
+    worker = start_worker(tmp_path, lease_seconds=1.0)
+    wait_all([worker])
+    
+    assert worker.returncode == 0
+    runs = processed(tmp_path)
+    assert sorted(key for pid, key in runs if pid != stuck_pid) == keys
+    assert [key for pid, key in runs].count(stuck_key) == 2
+    
+    items = job_queue.items(batch_id)
+    assert all(item["state"] == "published" for item in items.values())
+    assert items[stuck_key]["attempts"] == 2
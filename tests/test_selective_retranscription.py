@@ -0,0 +1,35 @@
+from selective_retranscription import find_low_confidence_ranges, is_low_confidence
+
+def segment(start, end, avg_logprob=-0.2, compression_ratio=1.5, no_speech_prob=0.1, text=" words"):
+    return {
+        "start": start, "end": end, "text": text,
+        "avg_logprob": avg_logprob, "compression_ratio": compression_ratio, "no_speech_prob": no_speech_prob
+    }
+
+def test_is_low_confidence():
+    assert not is_low_confidence(segment(0, 1))
+    assert is_low_confidence(segment(0, 1, avg_logprob=-1.5))
+    assert is_low_confidence(segment(0, 1, compression_ratio=3.0))
+    assert is_low_confidence(segment(0, 1, no_speech_prob=0.9))
+    # Silence without text is fine
+    assert not is_low_confidence(segment(0, 1, no_speech_prob=0.9, text=" "))
+    assert not is_low_confidence(segment(0, 1, avg_logprob=-1.5), thresholds={"avg_logprob": -2.0})
+
+def test_no_ranges_when_everything_is_trusted():
+    assert find_low_confidence_ranges([segment(0, 5), segment(5, 10)], 10.0) == []
+
+def test_consecutive_segments_form_one_range_widened_into_gaps():
+    segments = [
+        segment(0.0, 4.0),
+        segment(4.5, 8.0, avg_logprob=-1.4),
+        segment(8.0, 11.0, compression_ratio=2.9),
+        segment(12.0, 15.0),
+        segment(15.5, 18.0, avg_logprob=-1.2)
+    ]
+    ranges = find_low_confidence_ranges(segments, 20.0)
+    # Ranges reach from the end of the trusted segment before to the start of the one after
+    assert ranges == [(4.0, 12.0, [1, 2]), (15.0, 20.0, [4])]
+
+def test_range_at_the_start_begins_at_zero():
+    segments = [segment(1.0, 3.0, avg_logprob=-2.0), segment(3.5, 6.0)]
+    assert find_low_confidence_ranges(segments, 6.0) == [(0.0, 3.5, [0])]
@@ -0,0 +1,25 @@
+import pytest
+
+from speech_triage import MAX_WINDOWS, NUM_WINDOWS, SAMPLE_SECONDS, window_count, window_offsets
+
+@pytest.mark.parametrize("duration", [None, 0, 5.0, NUM_WINDOWS * SAMPLE_SECONDS])
+def test_short_clips_are_sampled_whole(duration):
+    assert window_offsets(duration) == [0.0]
+
+def test_offsets_cover_start_and_end():
+    offsets = window_offsets(60.0)
+    assert len(offsets) == NUM_WINDOWS
+    assert offsets[0] == 0.0
+    assert offsets[-1] == pytest.approx(60.0 - SAMPLE_SECONDS)
+    assert offsets == sorted(offsets)
+
+def test_longer_files_get_more_windows_up_to_the_limit():
+    assert window_count(60.0) == NUM_WINDOWS
+    assert window_count(600.0) > window_count(60.0)
+    assert window_count(10 * 3600.0) == MAX_WINDOWS
+    assert len(window_offsets(10 * 3600.0)) == MAX_WINDOWS
+
+def test_windows_are_evenly_spaced():
+    offsets = window_offsets(600.0)
+    gaps = [b - a for a, b in zip(offsets, offsets[1:])]
+    assert max(gaps) - min(gaps) < 1e-9
@@ -0,0 +1,54 @@
+from transcript_dedup import (
+    SHINGLE_SIZE, NUM_PERMUTATIONS, TranscriptIndex, shingles, minhash_signature, estimated_similarity
+)
+
+SCRIPT = (
+    "Today we look at three ways to keep sourdough starter alive while you are away on holiday "
+    "first feed it and put it in the fridge second dry a thin layer on baking paper third freeze "
+    "a spoonful in an ice cube tray and wake it up with warm water when you get back"
+)
+OTHER = (
+    "The new phone has a bigger battery and a brighter screen but the camera bump is huge and "
+    "the charger is no longer in the box so the real price is higher than the sticker says"
+)
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("One, two; THREE four five!") == shingles("one two three four five")
+
+def test_shingles_are_word_ngrams():
+    words = SCRIPT.split()
+    assert len(shingles(SCRIPT)) == len(set(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)))
+
+def test_short_and_empty_texts():
+    assert len(shingles("too short")) == 1
+    assert shingles("  ...  ") == set()
+
+def test_signature_is_deterministic():
+    signature = minhash_signature(shingles(SCRIPT))
+    assert signature.shape == (NUM_PERMUTATIONS,)
+    assert (signature == minhash_signature(shingles(SCRIPT))).all()
+
+def test_similarity_estimates_jaccard():
+    a = shingles(SCRIPT)
+    b = shingles(SCRIPT.replace("holiday", "vacation"))
+    jaccard = len(a & b) / len(a | b)
+    estimate = estimated_similarity(minhash_signature(a), minhash_signature(b))
+    assert abs(estimate - jaccard) < 0.15
+    assert estimated_similarity(minhash_signature(a), minhash_signature(shingles(OTHER))) < 0.1
+
+def test_index_finds_near_duplicate():
+    index = TranscriptIndex()
+    index.add(SCRIPT, source="first.mp4", groq_result={"title": "Sourdough"})
+    index.add(OTHER, source="phone.mp4")
+    
+    match = index.find(SCRIPT + " thanks for watching")
+    assert match["source"] == "first.mp4"
+    assert match["groq_result"] == {"title": "Sourdough"}
+    assert match["similarity"] >= index.threshold
+    assert "signature" not in match
+
+def test_index_ignores_unrelated_and_empty_text():
+    index = TranscriptIndex()
+    index.add(SCRIPT, source="first.mp4")
+    assert index.find(OTHER) is None
+    assert index.find("") is None
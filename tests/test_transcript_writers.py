@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from transcript_writers import (
+    srt_timestamp, vtt_timestamp, open_writers, write_transcript_formats, parse_formats, format_path
+)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": " Hello there.", "avg_logprob": -0.1, "no_speech_prob": 0.01,
+     "words": [{"word": " Hello", "start": 0.0, "end": 1.0, "probability": 0.91},
+               {"word": " there.", "start": 1.0, "end": 2.5, "probability": 0.8}]},
+    {"start": 2.5, "end": 3.0, "text": "   "},
+    {"start": 3661.0015, "end": 3662.2, "text": " Tab\there"}
+]
+
+@pytest.mark.parametrize("seconds, expected", [
+    (0.0, "00:00:00,000"),
+    (1.2345, "00:00:01,234"),
+    (59.9996, "00:01:00,000"),
+    (3661.5, "01:01:01,500")
+])
+def test_srt_timestamp(seconds, expected):
+    assert srt_timestamp(seconds) == expected
+    assert vtt_timestamp(seconds) == expected.replace(",", ".")
+
+def test_subtitle_formats(tmp_path):
+    output_file = str(tmp_path / "clip_transcript.txt")
+    paths = write_transcript_formats(output_file, SEGMENTS, ["srt", "vtt", "tsv"])
+    assert paths == [format_path(output_file, name) for name in ("srt", "vtt", "tsv")]
+    
+    srt = (tmp_path / "clip_transcript.srt").read_text(encoding="utf-8")
+    # Blank segments are skipped and numbering stays continuous
+    assert srt.startswith("1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n2\n01:01:01,002 --> ")
+    
+    vtt = (tmp_path / "clip_transcript.vtt").read_text(encoding="utf-8")
+    assert vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\nHello there.\n\n")
+    
+    tsv = (tmp_path / "clip_transcript.tsv").read_text(encoding="utf-8").splitlines()
+    assert tsv == ["start\tend\ttext", "0\t2500\tHello there.", "3661002\t3662200\tTab here"]
+
+def test_json_is_valid_with_header_and_segments(tmp_path):
+    output_file = str(tmp_path / "clip_transcript.txt")
+    write_transcript_formats(output_file, SEGMENTS, ["json"], info={"source": "clip.mp4", "language": "en"})
+    
+    data = json.loads((tmp_path / "clip_transcript.json").read_text(encoding="utf-8"))
+    assert data["source"] == "clip.mp4"
+    assert [segment["id"] for segment in data["segments"]] == [0, 1]
+    assert data["segments"][0]["confidence"] == pytest.approx(0.905, abs=1e-3)
+    assert data["segments"][0]["words"][1] == {"word": " there.", "start": 1.0, "end": 2.5, "probability": 0.8}
+    assert data["segments"][1]["confidence"] is None
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_json_framing_while_streaming(tmp_path, count):
+    writers = open_writers(str(tmp_path / "live_transcript.txt"), ["json"])
+    for index in range(count):
+        writers.add({"start": index, "end": index + 1, "text": f" part {index}"})
+    writers.close()
+    writers.close()
+    
+    data = json.loads((tmp_path / "live_transcript.json").read_text(encoding="utf-8"))
+    assert data == {"segments": data["segments"]}
+    assert [segment["text"] for segment in data["segments"]] == [f"part {index}" for index in range(count)]
+
+def test_parse_formats():
+    assert parse_formats("SRT, .json,txt,srt") == ["srt", "json"]
+    assert parse_formats(None) == []
+    with pytest.raises(ValueError):
+        parse_formats("docx")
+
+def test_finish_adds_only_segments_that_were_not_streamed(tmp_path):
+    writers = open_writers(str(tmp_path / "clip_transcript.txt"), ["tsv"])
+    writers.add(SEGMENTS[0])
+    writers.finish(SEGMENTS)
+    
+    tsv = (tmp_path / "clip_transcript.tsv").read_text(encoding="utf-8").splitlines()
+    assert tsv == ["start\tend\ttext", "0\t2500\tHello there.", "3661002\t3662200\tTab here"]
+
+def test_discard_removes_partial_files(tmp_path):
+    writers = open_writers(str(tmp_path / "clip_transcript.txt"), ["srt", "json"])
+    writers.add(SEGMENTS[0])
+    writers.discard()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import wave
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".videotranscriber", "transcript_cache")
+
+DEFAULT_MAX_SIZE_MB = 500
+SIZE_ENV_VAR = "VIDEOTRANSCRIBER_CACHE_MB"
+CACHE_ENV_VAR = "VIDEOTRANSCRIBER_CACHE"
+
+# Bump when the stored result format changes so old entries are ignored
+CACHE_VERSION = 1
+
+def cache_enabled_by_default():
+    """False if VIDEOTRANSCRIBER_CACHE=0 turns the transcript cache off"""
+    return os.environ.get(CACHE_ENV_VAR, "1").lower() not in ("0", "false", "no")
+
+def audio_content_hash(audio_file, chunk_frames=1 << 16):
+    """
+    Hash the decoded audio of a file
+    
+    For WAV files only the PCM frames and format are hashed, so the same audio
+    extracted twice (with different header metadata) gives the same hash.
+    Other files are hashed byte for byte.
+    
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    
+    try:
+        with wave.open(audio_file, "rb") as wav:
+            digest.update(f"{wav.getnchannels()}:{wav.getsampwidth()}:{wav.getframerate()}".encode("ascii"))
+            while True:
+                frames = wav.readframes(chunk_frames)
+                if not frames:
+                    break
+                digest.update(frames)
+        return digest.hexdigest()
+    except (wave.Error, EOFError):
+        digest = hashlib.sha256()
+    
+    with open(audio_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    
+    return digest.hexdigest()
+
+def transcription_options(model_name, language, word_timestamps, refine_model_name=None, translate=False):
+    """Decoding options that change the transcript, in the form used for cache keys"""
+    if not refine_model_name or refine_model_name in ("None", model_name):
+        refine_model_name = None
+    
+    return {
+        "task": "transcribe",
+        "language": language,
+        "word_timestamps": bool(word_timestamps),
+        "refine_model": refine_model_name,
+        "translate": bool(translate)
+    }
+
+def used_options(options, result):
+    """Options actually applied to a result (the governor may have dropped refinement)"""
+    if "refine_model" in result:
+        return dict(options, refine_model=result["refine_model"])
+    return options
+
+class TranscriptCache:
+    """
+    Persistent transcript cache keyed by audio content hash, model and options.
+    
+    Each entry is a JSON file under ~/.videotranscriber/transcript_cache holding
+    the Whisper result (with segments) and the optional translation. Entries
+    are evicted least-recently-used first once the cache grows past its size
+    limit; a hit refreshes the entry's modification time.
+    """
+    def __init__(self, cache_dir=None, max_size_mb=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        if max_size_mb is None:
+            try:
+                max_size_mb = int(os.environ.get(SIZE_ENV_VAR, DEFAULT_MAX_SIZE_MB))
+            except ValueError:
+                max_size_mb = DEFAULT_MAX_SIZE_MB
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.lock = threading.Lock()
+    
+    def key(self, audio_hash, model_name, options):
+        """Cache key for one audio/model/options combination"""
+        material = json.dumps({
+            "version": CACHE_VERSION,
+            "audio": audio_hash,
+            "model": model_name,
+            "options": options
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, audio_hash, model_name, options):
+        """
+        Look up a cached transcript
+        
+        Returns:
+            dict: {"result": whisper_result, "translation": result or None}, or None on a miss
+        """
+        path = self.entry_path(self.key(audio_hash, model_name, options))
+        
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        
+        return {"result": entry["result"], "translation": entry.get("translation")}
+    
+    def put(self, audio_hash, model_name, options, result, translation=None, source=None):
+        """Store a transcript and evict old entries if the cache is over its size limit"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        key = self.key(audio_hash, model_name, options)
+        entry = {
+            "version": CACHE_VERSION,
+            "audio_hash": audio_hash,
+            "model": model_name,
+            "options": options,
+            "source": source,
+            "created": time.time(),
+            "result": result,
+            "translation": translation
+        }
+        
+        # Write atomically so a concurrent reader never sees a partial file
+        path = self.entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                # numpy scalars in word timings are stored as plain floats
+                json.dump(entry, f, ensure_ascii=False, default=float)
+            os.replace(temp_path, path)
+        except Exception as e:
+            # A failed cache write must never fail the transcription itself
+            print(f"Could not store transcript in cache: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        
+        self.evict()
+    
+    def _entries(self):
+        """(path, size, mtime) of every entry file"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        
+        return entries
+    
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits its size limit"""
+        with self.lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            
+            for path, size, _ in entries:
+                if total <= self.max_size_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+    
+    def invalidate(self, audio_hash=None, model_name=None):
+        """
+        Delete entries for an audio hash and/or model (everything if neither is given)
+        
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        
+        with self.lock:
+            for path, _, _ in self._entries():
+                if audio_hash or model_name:
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            entry = json.load(f)
+                    except (OSError, ValueError):
+                        entry = {}
+                    
+                    if audio_hash and entry.get("audio_hash") != audio_hash:
+                        continue
+                    if model_name and entry.get("model") != model_name:
+                        continue
+                
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        
+        return removed
+    
+    def clear(self):
+        """Delete every cached transcript"""
+        return self.invalidate()
+    
+    def stats(self):
+        """
+        Returns:
+            tuple: (number of entries, total size in bytes)
+        """
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+# Shared by the GUI, batch, Instagram and web paths
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_transcript_cache():
+    """Process-wide TranscriptCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptCache()
+        return _cache
+
+def main(argv=None):
+    """Command-line entry point: inspect or invalidate the transcript cache"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Manage the transcript cache")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached transcript")
+    parser.add_argument("--model", help="Delete cached transcripts made with this model")
+    parser.add_argument("--audio", help="Delete cached transcripts of this audio file")
+    args = parser.parse_args(argv)
+    
+    cache = get_transcript_cache()
+    
+    if args.clear:
+        print(f"Removed {cache.clear()} cached transcripts")
+    elif args.model or args.audio:
+        audio_hash = audio_content_hash(args.audio) if args.audio else None
+        print(f"Removed {cache.invalidate(audio_hash, args.model)} cached transcripts")
+    
+    entries, size = cache.stats()
+    print(f"{entries} cached transcripts, {size / (1024 * 1024):.1f} MB in {cache.cache_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import re
+import zlib
+import threading
+
+import numpy as np
+
+# Word 5-grams: long enough that unrelated speech rarely shares them
+SHINGLE_SIZE = 5
+
+# 16 bands x 8 rows puts the LSH candidate threshold near a Jaccard similarity of 0.7
+NUM_BANDS = 16
+ROWS_PER_BAND = 8
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+
+# Candidates must also have this estimated Jaccard similarity to count as duplicates
+DEFAULT_THRESHOLD = 0.7
+
+# Mersenne prime 2^31 - 1 keeps a * x + b inside uint64 for 31-bit inputs
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of hashed word n-grams of a transcript (case and punctuation are ignored)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8")) & _PRIME} if words else set()
+    
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) & _PRIME
+        for i in range(len(words) - size + 1)
+    }
+
+def minhash_signature(shingle_set):
+    """MinHash signature (NUM_PERMUTATIONS uint64 values) of a shingle set"""
+    values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    hashed = (_A[:, None] * values[None, :] + _B[:, None]) % _PRIME
+    return hashed.min(axis=1)
+
+def estimated_similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two shingle sets from their signatures"""
+    return float(np.mean(signature_a == signature_b))
+
+class TranscriptIndex:
+    """
+    MinHash/LSH index of transcripts processed during a batch run.
+    
+    Each transcript's signature is split into bands; transcripts sharing any
+    band bucket are candidates, and a candidate counts as a near-duplicate
+    when the estimated Jaccard similarity of their word shingles reaches the
+    threshold. Records carry the Groq result and Notion page link so a
+    near-duplicate can reuse the summary instead of calling the LLM again.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.records = []
+        self.buckets = [{} for _ in range(NUM_BANDS)]
+    
+    def _band_keys(self, signature):
+        return [
+            signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+            for band in range(NUM_BANDS)
+        ]
+    
+    def find(self, text):
+        """
+        Find an earlier transcript that is a near-duplicate of this one
+        
+        Returns:
+            dict: The matching record with "similarity" added, or None
+        """
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return None
+        
+        signature = minhash_signature(shingle_set)
+        
+        with self.lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self.buckets[band].get(key, ()))
+            
+            best = None
+            for record_id in candidates:
+                score = estimated_similarity(signature, self.records[record_id]["signature"])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (record_id, score)
+            
+            if best is None:
+                return None
+            
+            record = {key: value for key, value in self.records[best[0]].items() if key != "signature"}
+            record["similarity"] = best[1]
+            return record
+    
+    def add(self, text, **fields):
+        """Index a transcript along with its results (groq_result, notion_url, source...)"""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return
+        
+        signature = minhash_signature(shingle_set)
+        
+        with self.lock:
+            record_id = len(self.records)
+            record = dict(fields)
+            record["signature"] = signature
+            self.records.append(record)
+            
+            for band, key in enumerate(self._band_keys(signature)):
+                self.buckets[band].setdefault(key, []).append(record_id)
@@ -0,0 +1,93 @@
+import os
+import re
+
+from headless_batch import VIDEO_EXTENSIONS
+from metadata_store import get_metadata_store
+from speech_triage import NO_SPEECH_TEXT
+
+TRANSCRIPT_SUFFIX = "_transcript.txt"
+
+# Written between the Groq header and the transcript (see the publish stages)
+ORIGINAL_TRANSCRIPT_MARKER = "--- Original Transcript ---"
+
+TIMESTAMP_PATTERN = re.compile(r"^\[\d{2}:\d{2}:\d{2}\.\d{3}\]\s?")
+
+def transcript_files_in(directory):
+    """All *_transcript.txt files under a folder, sorted by path"""
+    transcript_files = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith(TRANSCRIPT_SUFFIX):
+                transcript_files.append(os.path.join(root, file))
+    return sorted(transcript_files)
+
+def parse_transcript_file(transcript_file):
+    """
+    Read a transcript written by any of the batch paths
+    
+    Files with a Groq header look like "Title: ...", "Summary: ...",
+    "--- Original Transcript ---" followed by the transcript; timestamped
+    transcripts have one "[HH:MM:SS.mmm] text" line per segment.
+    
+    Returns:
+        tuple: (transcription dict with text, detailed and duration, groq_result dict
+                with title and summary from the header or None)
+    """
+    with open(transcript_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    
+    groq_result = None
+    header, marker, body = content.partition(f"\n\n{ORIGINAL_TRANSCRIPT_MARKER}\n\n")
+    if marker and header.startswith("Title: "):
+        title, _, summary = header[len("Title: "):].partition("\n\nSummary: ")
+        groq_result = {"title": title.strip(), "summary": summary.strip()}
+        detailed = body
+    else:
+        detailed = content
+    
+    if detailed.strip() == NO_SPEECH_TEXT:
+        return {"text": "", "detailed": NO_SPEECH_TEXT, "duration": None, "no_speech": True}, None
+    
+    text = " ".join(TIMESTAMP_PATTERN.sub("", line).strip() for line in detailed.splitlines() if line.strip())
+    return {"text": text, "detailed": detailed, "duration": None}, groq_result
+
+def video_for_transcript(transcript_file, video_dirs=None):
+    """
+    Video a transcript was made from, for the Notion page name and the saved
+    Instagram URL and caption
+    
+    Looks next to the transcript, in its parent folder (the default
+    <folder>/transcripts layout) and in video_dirs. A deleted video is still
+    found if its metadata was saved. Falls back to the name without extension.
+    """
+    name = os.path.basename(transcript_file)[:-len(TRANSCRIPT_SUFFIX)]
+    transcript_dir = os.path.dirname(os.path.abspath(transcript_file))
+    directories = [transcript_dir, os.path.dirname(transcript_dir)] + list(video_dirs or [])
+    
+    store = get_metadata_store()
+    for directory in directories:
+        for extension in VIDEO_EXTENSIONS:
+            video_file = os.path.join(directory, name + extension)
+            if os.path.isfile(video_file) or store.get(video_file):
+                return video_file
+    return os.path.join(transcript_dir, name)
+
+def replay_jobs(transcript_files, video_dirs=None):
+    """
+    Jobs for HeadlessProcessor.replay(), one per transcript file
+    
+    Returns:
+        list: Job dicts with key, video_file, output_file, transcription and the header's groq_result
+    """
+    jobs = []
+    for transcript_file in transcript_files:
+        transcription, groq_result = parse_transcript_file(transcript_file)
+        jobs.append({
+            'key': os.path.abspath(transcript_file),
+            'video_file': video_for_transcript(transcript_file, video_dirs),
+            'output_file': transcript_file,
+            'transcription': transcription,
+            'groq_result': groq_result,
+            'delete_video': False
+        })
+    return jobs
@@ -0,0 +1,265 @@
+import os
+import json
+import math
+
+FORMATS_ENV_VAR = "VIDEOTRANSCRIBER_OUTPUT_FORMATS"
+
+def srt_timestamp(seconds):
+    """Format seconds as HH:MM:SS,mmm"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def vtt_timestamp(seconds):
+    """Format seconds as HH:MM:SS.mmm"""
+    return srt_timestamp(seconds).replace(",", ".")
+
+def segment_confidence(segment):
+    """Average token probability of a Whisper segment (0-1), or None if unknown"""
+    if segment.get("avg_logprob") is None:
+        return None
+    return round(math.exp(segment["avg_logprob"]), 3)
+
+class TranscriptWriter:
+    """
+    Writes one transcript format, a segment at a time.
+    
+    The file is opened when the writer is created and every add() goes
+    straight to disk, so a long or live transcript is never held as one
+    string. Subclasses set `extension` and implement write_segment(), plus
+    write_header() / write_footer() if the format has them.
+    """
+    extension = None
+    
+    def __init__(self, path, info=None):
+        """
+        Parameters:
+            path (str): File to write
+            info (dict, optional): Details of the transcript (source, language, model...)
+                for formats with a header
+        """
+        self.path = path
+        self.info = info or {}
+        self.count = 0
+        self.file = open(path, "w", encoding="utf-8")
+        self.write_header()
+    
+    def write_header(self):
+        pass
+    
+    def write_segment(self, segment):
+        raise NotImplementedError
+    
+    def write_footer(self):
+        pass
+    
+    def add(self, segment):
+        """Write one segment dict (start, end, text and optionally words, avg_logprob, no_speech_prob)"""
+        if not segment.get("text", "").strip():
+            return
+        self.count += 1
+        self.write_segment(segment)
+        self.file.flush()
+    
+    def close(self):
+        if self.file.closed:
+            return
+        self.write_footer()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class SrtWriter(TranscriptWriter):
+    """SubRip subtitles."""
+    extension = "srt"
+    
+    def write_segment(self, segment):
+        self.file.write(f"{self.count}\n")
+        self.file.write(f"{srt_timestamp(segment['start'])} --> {srt_timestamp(segment['end'])}\n")
+        self.file.write(f"{segment['text'].strip()}\n\n")
+
+class VttWriter(TranscriptWriter):
+    """WebVTT subtitles."""
+    extension = "vtt"
+    
+    def write_header(self):
+        self.file.write("WEBVTT\n\n")
+    
+    def write_segment(self, segment):
+        self.file.write(f"{vtt_timestamp(segment['start'])} --> {vtt_timestamp(segment['end'])}\n")
+        self.file.write(f"{segment['text'].strip()}\n\n")
+
+class TsvWriter(TranscriptWriter):
+    """Tab-separated start and end in milliseconds plus text, like Whisper's own TSV output."""
+    extension = "tsv"
+    
+    def write_header(self):
+        self.file.write("start\tend\ttext\n")
+    
+    def write_segment(self, segment):
+        text = segment['text'].strip().replace("\t", " ")
+        self.file.write(f"{int(round(segment['start'] * 1000))}\t{int(round(segment['end'] * 1000))}\t{text}\n")
+
+class JsonWriter(TranscriptWriter):
+    """
+    JSON sidecar with segment start/end, confidence values and word timings.
+    
+    The segments array is written element by element; the file is complete
+    once the writer is closed.
+    """
+    extension = "json"
+    
+    def write_header(self):
+        header = json.dumps(self.info, ensure_ascii=False)
+        self.file.write(header[:-1] + (", " if self.info else "") + '"segments": [')
+    
+    def write_segment(self, segment):
+        entry = {
+            "id": self.count - 1,
+            "start": round(segment['start'], 3),
+            "end": round(segment['end'], 3),
+            "text": segment['text'].strip(),
+            "confidence": segment_confidence(segment),
+            "no_speech_prob": segment.get("no_speech_prob")
+        }
+        if segment.get("words"):
+            entry["words"] = [
+                {
+                    "word": word["word"],
+                    "start": round(word["start"], 3),
+                    "end": round(word["end"], 3),
+                    "probability": round(word["probability"], 3) if word.get("probability") is not None else None
+                }
+                for word in segment["words"]
+            ]
+        self.file.write(("," if self.count > 1 else "") + "\n  " + json.dumps(entry, ensure_ascii=False, default=float))
+    
+    def write_footer(self):
+        self.file.write("\n]}\n")
+
+# Format name -> writer class; register_writer() adds more
+WRITERS = {
+    "srt": SrtWriter,
+    "vtt": VttWriter,
+    "tsv": TsvWriter,
+    "json": JsonWriter
+}
+
+def register_writer(name, writer_class):
+    """Make another TranscriptWriter subclass available under a format name"""
+    WRITERS[name.lower()] = writer_class
+
+def parse_formats(value):
+    """
+    Format names from a comma-separated string or a list ("txt" is always written and ignored)
+    
+    Raises:
+        ValueError: If a format has no writer
+    """
+    if not value:
+        return []
+    names = value.split(",") if isinstance(value, str) else value
+    formats = []
+    for name in names:
+        name = name.strip().lower().lstrip(".")
+        if not name or name == "txt" or name in formats:
+            continue
+        if name not in WRITERS:
+            raise ValueError(f"Unknown transcript format: {name} (available: {', '.join(sorted(WRITERS))})")
+        formats.append(name)
+    return formats
+
+def default_formats():
+    """Extra formats from the VIDEOTRANSCRIBER_OUTPUT_FORMATS environment variable (e.g. "srt,json")"""
+    try:
+        return parse_formats(os.environ.get(FORMATS_ENV_VAR, ""))
+    except ValueError as e:
+        print(f"Ignoring {FORMATS_ENV_VAR}: {str(e)}")
+        return []
+
+def format_path(output_file, name):
+    """File of another format next to the transcript: <video>_transcript.txt -> <video>_transcript.srt"""
+    return os.path.splitext(output_file)[0] + "." + WRITERS[name].extension
+
+class MultiWriter:
+    """Several TranscriptWriters fed with the same segments."""
+    def __init__(self, writers):
+        self.writers = writers
+        self.received = 0
+    
+    @property
+    def paths(self):
+        return [writer.path for writer in self.writers]
+    
+    def add(self, segment):
+        self.received += 1
+        for writer in self.writers:
+            writer.add(segment)
+    
+    def finish(self, segments):
+        """Add the segments of the finished transcript that weren't streamed, then close"""
+        for segment in segments[self.received:]:
+            self.add(segment)
+        self.close()
+    
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+    
+    def discard(self):
+        """Close and delete the files of a transcription that failed or was canceled"""
+        self.close()
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def open_writers(output_file, formats, info=None):
+    """
+    Open a writer per format next to the transcript file
+    
+    Parameters:
+        output_file (str): The transcript (.txt) file the other formats are named after
+        formats (list): Format names (see WRITERS)
+        info (dict, optional): Details of the transcript for formats with a header
+    
+    Returns:
+        MultiWriter: Writers to add() segments to; close() it when done
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    writers = []
+    try:
+        for name in formats:
+            writers.append(WRITERS[name](format_path(output_file, name), info))
+    except Exception:
+        for writer in writers:
+            writer.close()
+        raise
+    return MultiWriter(writers)
+
+def write_transcript_formats(output_file, segments, formats, info=None):
+    """
+    Write Whisper segments in each format next to the transcript file
+    
+    Returns:
+        list: Paths of the files written
+    """
+    if not formats:
+        return []
+    with open_writers(output_file, formats, info) as writers:
+        for segment in segments:
+            writers.add(segment)
+    return writers.paths
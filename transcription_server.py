@@ -0,0 +1,427 @@
+import os
+import sys
+import gc
+import secrets
+import subprocess
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+from cancellation import CancellationToken, TranscriptionCancelled, cancellable_whisper
+
+SAMPLE_RATE = 16000
+
+DEFAULT_PORT = 50765
+PORT_ENV_VAR = "VIDEOTRANSCRIBER_SERVER_PORT"
+SERVER_ENV_VAR = "VIDEOTRANSCRIBER_USE_SERVER"
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".videotranscriber")
+AUTHKEY_FILE = os.path.join(CONFIG_DIR, "server_key")
+
+def server_address():
+    """Local address the transcription server listens on"""
+    port = DEFAULT_PORT
+    try:
+        port = int(os.environ.get(PORT_ENV_VAR, DEFAULT_PORT))
+    except ValueError:
+        print(f"Ignoring invalid {PORT_ENV_VAR} value")
+    return ("127.0.0.1", port)
+
+def server_enabled_by_default():
+    """True if VIDEOTRANSCRIBER_USE_SERVER asks the UIs to use the transcription server"""
+    return os.environ.get(SERVER_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+def load_authkey():
+    """
+    Shared secret for the local socket, created on first use
+    
+    Only processes that can read ~/.videotranscriber/server_key can submit jobs,
+    which matters because job messages are pickled.
+    """
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    
+    if not os.path.exists(AUTHKEY_FILE):
+        key = secrets.token_hex(32)
+        fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(key)
+    
+    with open(AUTHKEY_FILE, "r") as f:
+        return f.read().strip().encode("ascii")
+
+def _attach_shared_memory(name):
+    """Attach to a block created by the client without letting this process unlink it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker,
+        # which would destroy the client's block when the server exits
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(block._name, "shared_memory")
+        except Exception:
+            pass
+        return block
+
+class TranscriptionServer:
+    """
+    Long-lived local transcription daemon that keeps Whisper models warm.
+    
+    Clients connect over a local authenticated socket and send one job per
+    connection. The decoded audio is passed as the name of a shared memory
+    block, so the server transcribes the client's buffer in place instead of
+    receiving a copy. Jobs run one at a time; progress, status messages and
+    the final result are streamed back on the same connection.
+    """
+    def __init__(self, address=None, authkey=None):
+        self.address = address or server_address()
+        self.authkey = authkey or load_authkey()
+        self.models = {}
+        self.job_lock = threading.Lock()
+        self.listener = None
+        self.running = False
+    
+    def get_model(self, model_name, keep=()):
+        """Return a warm model, loading it (and evicting unused ones) if needed"""
+        import torch
+        import whisper
+        
+        if model_name not in self.models:
+            # Free models the current job doesn't need before loading another one
+            for name in list(self.models):
+                if name not in keep:
+                    del self.models[name]
+            gc.collect()
+            
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            print(f"Loading Whisper {model_name} model on {device}...")
+            self.models[model_name] = whisper.load_model(model_name, device=device)
+        
+        return self.models[model_name]
+    
+    def serve_forever(self):
+        """Accept client connections until stop() is called"""
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.running = True
+        print(f"Transcription server listening on {self.address[0]}:{self.address[1]}")
+        
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self.running:
+                    print(f"Connection error: {str(e)}")
+                continue
+            
+            threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+    
+    def stop(self):
+        """Stop accepting connections"""
+        self.running = False
+        if self.listener:
+            self.listener.close()
+    
+    def handle_connection(self, conn):
+        """Handle one request from a client"""
+        try:
+            request = conn.recv()
+            op = request.get("op")
+            
+            if op == "ping":
+                conn.send({"event": "pong", "models": list(self.models)})
+            elif op == "transcribe":
+                self.run_job(conn, request)
+            elif op == "shutdown":
+                conn.send({"event": "bye"})
+                self.stop()
+            else:
+                conn.send({"event": "error", "message": f"Unknown operation: {op}"})
+        except (EOFError, ConnectionError):
+            pass
+        except Exception as e:
+            try:
+                conn.send({"event": "error", "message": str(e)})
+            except Exception:
+                pass
+        finally:
+            conn.close()
+    
+    def run_job(self, conn, request):
+        """Transcribe the audio in the client's shared memory block"""
+        from resource_governor import get_governor
+        from selective_retranscription import refine_low_confidence_segments
+        from multitask_transcription import transcribe_and_translate
+        
+        cancel_token = CancellationToken()
+        send_lock = threading.Lock()
+        
+        def send(message):
+            with send_lock:
+                conn.send(message)
+        
+        # The client asks for cancellation on the same connection
+        def watch_for_cancel():
+            try:
+                while not cancel_token.is_cancelled:
+                    if conn.poll(0.2):
+                        if conn.recv().get("op") == "cancel":
+                            cancel_token.cancel()
+            except (EOFError, OSError):
+                # Client went away - nobody is waiting for the result
+                cancel_token.cancel()
+        
+        threading.Thread(target=watch_for_cancel, daemon=True).start()
+        
+        block = _attach_shared_memory(request["shm"])
+        audio = None
+        reservation = None
+        
+        try:
+            audio = np.ndarray((request["samples"],), dtype=np.float32, buffer=block.buf)
+            
+            if not self.job_lock.acquire(blocking=False):
+                send({"event": "status", "message": "Waiting for the running job to finish..."})
+                while not self.job_lock.acquire(timeout=0.5):
+                    cancel_token.raise_if_cancelled()
+            
+            try:
+                reservation = get_governor().acquire(
+                    request.get("job_name", "job"), request["model"], request["samples"] / SAMPLE_RATE,
+                    refine_model_name=request.get("refine_model"),
+                    allow_downgrade=request.get("allow_downgrade", False),
+                    resident_model_name=request["model"] if request["model"] in self.models else None,
+                    cancel_token=cancel_token,
+                    on_wait=lambda message: send({"event": "status", "message": message})
+                )
+                model_name = reservation.model_name
+                refine_model_name = reservation.refine_model_name
+                
+                if model_name not in self.models:
+                    send({"event": "status", "message": f"Loading Whisper {model_name} model on the server..."})
+                model = self.get_model(model_name, keep=(model_name, refine_model_name))
+                
+                def on_window(frames_done, total_frames):
+                    send({"event": "progress", "done": frames_done, "total": total_frames})
+                
+                options = dict(request.get("options", {}))
+                translation = None
+                
+                with cancellable_whisper(model, cancel_token, on_window):
+                    if request.get("translate"):
+                        multitask_result = transcribe_and_translate(
+                            model, audio, options.get("language"), cancel_token, on_window,
+                            word_timestamps=options.get("word_timestamps", False)
+                        )
+                        result = multitask_result["transcription"]
+                        result["duration"] = multitask_result["duration"]
+                        translation = multitask_result["translation"]
+                    else:
+                        result = model.transcribe(audio, **options)
+                
+                if refine_model_name and refine_model_name != "None" and refine_model_name != model_name:
+                    if refine_model_name not in self.models:
+                        send({"event": "status", "message": f"Loading Whisper {refine_model_name} model on the server..."})
+                    refine_model = self.get_model(refine_model_name, keep=(model_name, refine_model_name))
+                    result = refine_low_confidence_segments(
+                        result, audio, refine_model, options,
+                        cancel_token=cancel_token,
+                        log=lambda message: send({"event": "status", "message": message})
+                    )
+                else:
+                    refine_model_name = None
+                
+                # Record what actually ran - the governor may have downgraded the job
+                result["model"] = model_name
+                result["refine_model"] = refine_model_name
+                
+                send({
+                    "event": "result",
+                    "transcription": result,
+                    "translation": translation,
+                    "model": model_name
+                })
+            finally:
+                if reservation:
+                    reservation.release()
+                self.job_lock.release()
+        except TranscriptionCancelled:
+            send({"event": "cancelled"})
+        finally:
+            # Drop every view of the buffer before detaching from it
+            audio = None
+            gc.collect()
+            try:
+                block.close()
+            except BufferError:
+                pass
+            cancel_token.cancel()
+
+def decode_audio_to_shared_memory(media_file, cancel_token=None):
+    """
+    Decode a media file to 16 kHz mono float32 directly into a shared memory block
+    
+    Returns:
+        tuple: (SharedMemory block, number of samples) - the caller must close() and unlink() it
+    """
+    from cancellation import run_cancellable
+    
+    command = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", media_file,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+    ]
+    pcm = np.frombuffer(run_cancellable(command, cancel_token).stdout, np.int16)
+    
+    block = shared_memory.SharedMemory(create=True, size=max(pcm.size, 1) * 4)
+    audio = np.ndarray((pcm.size,), dtype=np.float32, buffer=block.buf)
+    np.divide(pcm, 32768.0, out=audio, casting="unsafe")
+    del audio
+    
+    return block, pcm.size
+
+class TranscriptionClient:
+    """Thin client that runs jobs on the transcription server"""
+    def __init__(self, address=None, authkey=None):
+        self.address = address or server_address()
+        self.authkey = authkey or load_authkey()
+    
+    def is_running(self):
+        """True if a server is answering on the configured address"""
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+        except Exception:
+            return False
+        
+        try:
+            conn.send({"op": "ping"})
+            return conn.recv().get("event") == "pong"
+        except Exception:
+            return False
+        finally:
+            conn.close()
+    
+    def ensure_running(self, timeout=15):
+        """
+        Start a detached server process if none is running
+        
+        Returns:
+            bool: True if a server is available
+        """
+        if self.is_running():
+            return True
+        
+        script = os.path.abspath(__file__)
+        creationflags = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        try:
+            subprocess.Popen(
+                [sys.executable, script],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=os.name != "nt", creationflags=creationflags
+            )
+        except Exception as e:
+            print(f"Could not start transcription server: {str(e)}")
+            return False
+        
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            time.sleep(0.5)
+            if self.is_running():
+                return True
+        
+        return False
+    
+    def transcribe(self, audio_file, model_name, options, refine_model_name=None, translate=False,
+                   allow_downgrade=False, cancel_token=None, window_callback=None, on_status=None):
+        """
+        Transcribe a media file on the server
+        
+        Parameters:
+            audio_file (str): Audio or video file to transcribe
+            model_name (str): Whisper model to use
+            options (dict): Options for model.transcribe (task, language, word_timestamps...)
+            refine_model_name (str, optional): Larger model for low-confidence segments
+            translate (bool): Also produce an English translation from the same encoder pass
+            allow_downgrade (bool): Let the server use a smaller model when memory is short
+            cancel_token (CancellationToken, optional): Token that aborts the job
+            window_callback (function, optional): Called as callback(frames_done, total_frames)
+            on_status (function, optional): Called with status messages from the server
+        
+        Returns:
+            dict: {"transcription": result, "translation": result or None, "model": model_name}
+        
+        Raises:
+            TranscriptionCancelled: If the token was canceled
+            RuntimeError: If the server reported an error
+        """
+        block, samples = decode_audio_to_shared_memory(audio_file, cancel_token)
+        
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+            try:
+                conn.send({
+                    "op": "transcribe",
+                    "job_name": os.path.basename(audio_file),
+                    "shm": block.name,
+                    "samples": samples,
+                    "model": model_name,
+                    "options": options,
+                    "refine_model": refine_model_name,
+                    "translate": translate,
+                    "allow_downgrade": allow_downgrade
+                })
+                
+                cancel_sent = False
+                while True:
+                    if cancel_token and cancel_token.is_cancelled and not cancel_sent:
+                        conn.send({"op": "cancel"})
+                        cancel_sent = True
+                    
+                    if not conn.poll(0.2):
+                        continue
+                    
+                    message = conn.recv()
+                    event = message.get("event")
+                    
+                    if event == "progress":
+                        if window_callback:
+                            window_callback(message["done"], message["total"])
+                    elif event == "status":
+                        if on_status:
+                            on_status(message["message"])
+                    elif event == "result":
+                        return message
+                    elif event == "cancelled":
+                        raise TranscriptionCancelled("Operation canceled")
+                    elif event == "error":
+                        raise RuntimeError(f"Transcription server error: {message['message']}")
+            finally:
+                conn.close()
+        finally:
+            block.close()
+            block.unlink()
+
+def get_server_client(start=True):
+    """
+    Client for the transcription server, starting the server if needed
+    
+    Returns:
+        TranscriptionClient: Connected client, or None if no server is available
+            (callers fall back to transcribing in-process)
+    """
+    client = TranscriptionClient()
+    if client.is_running() or (start and client.ensure_running()):
+        return client
+    return None
+
+def main():
+    server = TranscriptionServer()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,17 @@ import whisper
 import time
 from notion_integration import NotionIntegration  # Import our Notion integration class
 from groq_integration import GroqIntegration  # Import our Groq integration class
+from cancellation import CancellationToken, TranscriptionCancelled, run_cancellable, cancellable_whisper
+from selective_retranscription import refine_low_confidence_segments
+from multitask_transcription import transcribe_and_translate, write_translation, summary_input_text
+from resource_governor import get_governor, media_duration, downgrade_by_default
+from transcription_server import get_server_client, server_enabled_by_default
+from live_transcription import LiveTranscriber, MAX_WINDOW_SECONDS
+from transcript_cache import (get_transcript_cache, audio_content_hash, transcription_options,
+                              used_options, cache_enabled_by_default)
+from speech_triage import triage_enabled_by_default
+from job_manager import get_job_manager, PRIORITY_INTERACTIVE, DONE, FAILED, CANCELLED
+from transcript_writers import WRITERS, default_formats, write_transcript_formats, open_writers
 
 class VideoTranscriberGUI:
     def __init__(self, root):
@@ -23,11 +34,19 @@ class VideoTranscriberGUI:
         self.video_path = tk.StringVar()
         self.output_path = tk.StringVar()
         self.model_var = tk.StringVar(value="base")
+        self.refine_model_var = tk.StringVar(value="None")
         self.language_var = tk.StringVar(value="en")
         self.keep_audio_var = tk.BooleanVar(value=False)
         self.progress_var = tk.DoubleVar(value=0)
         self.status_var = tk.StringVar(value="Ready")
         self.word_timestamps_var = tk.BooleanVar(value=True)
+        self.translate_var = tk.BooleanVar(value=False)
+        self.output_format_vars = {name: tk.BooleanVar(value=name in default_formats()) for name in WRITERS}
+        self.downgrade_on_memory_var = tk.BooleanVar(value=downgrade_by_default())
+        self.use_server_var = tk.BooleanVar(value=server_enabled_by_default())
+        self.use_cache_var = tk.BooleanVar(value=cache_enabled_by_default())
+        self.dedup_reposts_var = tk.BooleanVar(value=True)
+        self.skip_no_speech_var = tk.BooleanVar(value=triage_enabled_by_default())
         
         # Notion integration variables
         self.notion_enabled = tk.BooleanVar(value=False)
@@ -52,6 +71,7 @@ class VideoTranscriberGUI:
         self.transcription_thread = None
         self.is_transcribing = False
         self.whisper_model = None
+        self.cancel_token = None
         
         # Load saved Notion settings if available
         self.load_notion_settings()
@@ -83,6 +103,9 @@ class VideoTranscriberGUI:
         # Groq settings tab
         self.create_groq_tab()
         
+        # Job queue tab
+        self.create_jobs_tab()
+        
         # ===== MAIN TAB =====
         # File selection frame
         file_frame = ttk.LabelFrame(main_tab, text="File Selection", padding="10")
@@ -122,6 +145,12 @@ class VideoTranscriberGUI:
                                      values=list(models.values()), width=15)
         model_combobox.pack(side=tk.LEFT, padx=5)
         
+        # Optional larger model used only for low-confidence segments
+        ttk.Label(model_frame, text="Refine low-confidence parts with:").pack(side=tk.LEFT, padx=5)
+        refine_combobox = ttk.Combobox(model_frame, textvariable=self.refine_model_var, 
+                                      values=["None", "small", "medium", "large"], width=10)
+        refine_combobox.pack(side=tk.LEFT, padx=5)
+        
         # Language selection
         language_frame = ttk.Frame(options_frame)
         language_frame.pack(fill=tk.X, pady=5)
@@ -147,6 +176,28 @@ class VideoTranscriberGUI:
         ttk.Checkbutton(options_frame, text="Include word-level timestamps", 
                       variable=self.word_timestamps_var).pack(anchor=tk.W, pady=5)
         
+        # Translation checkbox
+        ttk.Checkbutton(options_frame, text="Also create English translation (same encoder pass)", 
+                      variable=self.translate_var).pack(anchor=tk.W, pady=5)
+        
+        # Subtitle and JSON outputs
+        self.create_output_formats_row(options_frame)
+        
+        # Memory admission checkbox
+        ttk.Checkbutton(options_frame, text="Use a smaller model instead of waiting when memory is short", 
+                      variable=self.downgrade_on_memory_var).pack(anchor=tk.W, pady=5)
+        
+        # Transcription server checkbox
+        ttk.Checkbutton(options_frame, text="Transcribe in the background server (keeps models loaded)", 
+                      variable=self.use_server_var).pack(anchor=tk.W, pady=5)
+        
+        # Transcript cache checkbox and clear button
+        cache_frame = ttk.Frame(options_frame)
+        cache_frame.pack(fill=tk.X, pady=5)
+        ttk.Checkbutton(cache_frame, text="Reuse cached transcripts of identical audio", 
+                      variable=self.use_cache_var).pack(side=tk.LEFT)
+        ttk.Button(cache_frame, text="Clear Cache", command=self.clear_transcript_cache).pack(side=tk.LEFT, padx=10)
+        
         # Keep audio checkbox
         ttk.Checkbutton(options_frame, text="Keep extracted audio file", 
                       variable=self.keep_audio_var).pack(anchor=tk.W, pady=5)
@@ -180,6 +231,7 @@ class VideoTranscriberGUI:
         ttk.Button(button_frame, text="Start Transcription", command=self.start_transcription).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=self.cancel_transcription, state=tk.DISABLED).pack(side=tk.LEFT, padx=5)
         self.cancel_button = button_frame.winfo_children()[1]  # Store cancel button reference
+        ttk.Button(button_frame, text="Live Transcription", command=self.start_live_transcription).pack(side=tk.LEFT, padx=5)
         
         # Progress bar and status
         progress_frame = ttk.Frame(main_tab)
@@ -335,6 +387,37 @@ The Groq API will:
         
         groq_settings_frame.columnconfigure(1, weight=1)
 
+    def create_jobs_tab(self):
+        """Create the tab listing the running, queued and recently finished jobs of every tab"""
+        jobs_tab = ttk.Frame(self.notebook)
+        self.notebook.add(jobs_tab, text="Jobs")
+        
+        ttk.Label(jobs_tab, text="Single files run before batch work; a running batch pauses between files until they are done.",
+                  wraplength=700).pack(anchor=tk.W, padx=5, pady=5)
+        
+        columns = ("position", "job", "type", "state", "detail")
+        self.jobs_tree = ttk.Treeview(jobs_tab, columns=columns, show="headings", height=15)
+        for column, heading, width in (("position", "#", 60), ("job", "Job", 220), ("type", "Type", 90),
+                                       ("state", "State", 90), ("detail", "Details", 300)):
+            self.jobs_tree.heading(column, text=heading)
+            self.jobs_tree.column(column, width=width, anchor=tk.W)
+        self.jobs_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Job threads report changes; the list is redrawn on the main thread
+        get_job_manager().add_listener(lambda: self.root.after(0, self.refresh_jobs_list))
+    
+    def refresh_jobs_list(self):
+        """Redraw the job list from the job manager"""
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        for row in get_job_manager().snapshot():
+            if row["position"] == 0:
+                position = "running"
+            elif row["position"] is None:
+                position = ""
+            else:
+                position = str(row["position"])
+            self.jobs_tree.insert("", tk.END, values=(position, row["name"], row["kind"], row["state"], row["detail"]))
+    
     def toggle_token_visibility(self):
         """Toggle the visibility of the Notion API token"""
         if self.show_token_var.get():
@@ -556,17 +639,28 @@ The Groq API will:
         self.output_text.insert(tk.END, text)
         self.output_text.config(state=tk.DISABLED)
     
-    def extract_audio_with_ffmpeg(self, video_file, audio_file):
+    def append_output_text(self, text):
+        self.output_text.config(state=tk.NORMAL)
+        self.output_text.insert(tk.END, text)
+        self.output_text.see(tk.END)
+        self.output_text.config(state=tk.DISABLED)
+    
+    def extract_audio_with_ffmpeg(self, video_file, audio_file, cancel_token=None):
         self.update_progress(10, f"Extracting audio from {os.path.basename(video_file)}...")
         
         try:
-            # Use FFmpeg to extract audio
-            subprocess.run([
-                "ffmpeg", "-i", video_file, "-q:a", "0", "-map", "a", audio_file, "-y"
-            ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # Use FFmpeg to extract audio (killed immediately if the job is canceled) in
+            # Whisper's 16 kHz mono format, which repost fingerprints read directly
+            run_cancellable([
+                "ffmpeg", "-i", video_file, "-map", "a", "-ac", "1", "-ar", "16000", "-acodec", "pcm_s16le",
+                audio_file, "-y"
+            ], cancel_token)
             
             self.update_progress(30, "Audio extracted successfully")
             return True
+        except TranscriptionCancelled:
+            self.update_progress(0, "Transcription canceled")
+            return False
         except subprocess.CalledProcessError as e:
             self.update_progress(0, f"Error extracting audio: {str(e)}")
             messagebox.showerror("Error", f"Failed to extract audio: {str(e)}")
@@ -583,27 +677,141 @@ The Groq API will:
         seconds = seconds % 60
         return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
     
-    def transcribe_with_whisper(self, audio_file, model_name, language, word_timestamps):
-        self.update_progress(40, f"Loading Whisper {model_name} model (this may take some time)...")
+    def transcribe_in_process(self, audio_file, model_name, language, transcribe_options, cancel_token, on_window,
+                              update_progress=None, resident_models=None, on_segment=None):
+        """
+        Load the model in this process and transcribe; returns (result, translation_result)
+        
+        resident_models is a dict (model name -> loaded model) a batch keeps
+        between files so its models are loaded once; without it the models
+        are loaded fresh and dropped after this file. on_segment is called
+        with each segment as soon as its window is decoded.
+        """
+        update_progress = update_progress or self.update_progress
+        reservation = None
         
         try:
+            # Wait until the model and decoded audio fit in the memory budget
+            reservation = get_governor().acquire(
+                os.path.basename(audio_file), model_name, media_duration(audio_file),
+                refine_model_name=self.refine_model_var.get(),
+                allow_downgrade=self.downgrade_on_memory_var.get(),
+                resident_model_name=model_name if resident_models and model_name in resident_models else None,
+                cancel_token=cancel_token,
+                on_wait=lambda message: update_progress(38, message)
+            )
+            model_name = reservation.model_name
+            refine_model_name = reservation.refine_model_name
+            
             # Import whisper here to ensure it's fresh
             import whisper
             
             # Check for GPU
             device = "cuda" if torch.cuda.is_available() else "cpu"
             if device == "cuda":
-                self.update_progress(45, f"Using GPU acceleration with {device}")
+                update_progress(45, f"Using GPU acceleration with {device}")
+            else:
+                update_progress(45, f"Using CPU for processing (slower)")
+            
+            if resident_models is not None and model_name in resident_models:
+                whisper_model = resident_models[model_name]
+                update_progress(50, f"Using the loaded Whisper {model_name} model. Transcribing audio...")
             else:
-                self.update_progress(45, f"Using CPU for processing (slower)")
+                update_progress(45, f"Loading Whisper {model_name} model (this may take some time)...")
+                
+                # Always load a fresh model instance for each transcription
+                # This helps prevent the "'Whisper' object has no attribute 'model'" error
+                whisper_model = whisper.load_model(model_name, device=device)
+                if resident_models is not None:
+                    # The governor may have downgraded the model - drop the one it replaces
+                    resident_models.clear()
+                    resident_models[model_name] = whisper_model
+                
+                update_progress(50, "Model loaded. Transcribing audio...")
+            
+            translation_result = None
+            with cancellable_whisper(whisper_model, cancel_token, on_window, on_segment):
+                if self.translate_var.get():
+                    # Encode each window once and decode it for both tasks
+                    multitask_result = transcribe_and_translate(
+                        whisper_model, audio_file, language, cancel_token, on_window,
+                        word_timestamps=transcribe_options.get("word_timestamps", False)
+                    )
+                    result = multitask_result['transcription']
+                    result['duration'] = multitask_result['duration']
+                    translation_result = multitask_result['translation']
+                else:
+                    result = whisper_model.transcribe(audio_file, **transcribe_options)
             
-            # Always load a fresh model instance for each transcription
-            # This helps prevent the "'Whisper' object has no attribute 'model'" error
-            whisper_model = whisper.load_model(model_name, device=device)
+            # Re-transcribe only the low-confidence ranges with a larger model if requested
+            if refine_model_name and refine_model_name != "None" and refine_model_name != model_name:
+                if resident_models is not None and refine_model_name in resident_models:
+                    refine_model = resident_models[refine_model_name]
+                else:
+                    update_progress(88, f"Loading Whisper {refine_model_name} model for low-confidence segments...")
+                    refine_model = whisper.load_model(refine_model_name, device=device)
+                    if resident_models is not None:
+                        resident_models[refine_model_name] = refine_model
+                result = refine_low_confidence_segments(
+                    result, audio_file, refine_model, transcribe_options,
+                    cancel_token=cancel_token,
+                    log=lambda message: update_progress(89, message)
+                )
+                refine_model = None
+            else:
+                refine_model_name = None
             
-            self.update_progress(50, "Model loaded. Transcribing audio...")
+            # Record what actually ran - the governor may have downgraded the job
+            result['model'] = model_name
+            result['refine_model'] = refine_model_name
             
-            # Run transcription
+            return result, translation_result
+        finally:
+            if reservation:
+                reservation.release()
+    
+    def create_output_formats_row(self, parent):
+        """Checkboxes for the extra transcript formats (shared by the transcription and batch tabs)"""
+        formats_frame = ttk.Frame(parent)
+        formats_frame.pack(anchor=tk.W, pady=5)
+        
+        ttk.Label(formats_frame, text="Also save as:").pack(side=tk.LEFT)
+        for name, variable in self.output_format_vars.items():
+            ttk.Checkbutton(formats_frame, text=name.upper(), variable=variable).pack(side=tk.LEFT, padx=5)
+    
+    def selected_output_formats(self):
+        """Extra transcript formats checked in the options"""
+        return [name for name, variable in self.output_format_vars.items() if variable.get()]
+    
+    def save_output_formats(self, output_file, result, formats, source, update_progress):
+        """Write the checked subtitle/JSON formats from Whisper's segments next to the transcript"""
+        if not formats:
+            return
+        try:
+            written = write_transcript_formats(output_file, result['segments'], formats, {
+                "source": source,
+                "language": result.get('language'),
+                "model": result.get('model'),
+                "duration": result.get('duration')
+            })
+            update_progress(90, f"Saved {', '.join(os.path.basename(path) for path in written)}")
+        except OSError as e:
+            update_progress(90, f"Error saving transcript formats: {str(e)}")
+    
+    def transcribe_with_whisper(self, audio_file, model_name, language, word_timestamps, cancel_token=None,
+                                update_progress=None, formats_file=None, source=None, resident_models=None):
+        """
+        Transcribe an extracted audio file (cache, transcription server or a model loaded here)
+        
+        update_progress(value, status) reports progress; it defaults to the
+        Transcription tab's progress bar, batch callers pass their own.
+        With formats_file (the transcript path), the formats checked under
+        "Also save as" are written next to it; source is the video they
+        are named after in the JSON sidecar. resident_models keeps the
+        models loaded between calls (see transcribe_in_process).
+        """
+        update_progress = update_progress or self.update_progress
+        try:
             transcribe_options = {
                 "task": "transcribe",
                 "verbose": False,
@@ -613,11 +821,94 @@ The Groq API will:
             if language:
                 transcribe_options["language"] = language
             
+            # Report progress after each decoded 30-second window
+            def on_window(frames_done, total_frames):
+                if total_frames:
+                    update_progress(50 + 40 * min(frames_done / total_frames, 1.0), "Transcribing audio...")
+            
             start_time = time.time()
-            result = whisper_model.transcribe(audio_file, **transcribe_options)
+            writers = None
+            
+            # Reuse a stored transcript of the same audio, model and options
+            cache = get_transcript_cache() if self.use_cache_var.get() else None
+            cache_options = transcription_options(
+                model_name, language, word_timestamps, self.refine_model_var.get(), self.translate_var.get()
+            )
+            cached = None
+            if cache:
+                update_progress(35, "Checking transcript cache...")
+                audio_hash = audio_content_hash(audio_file)
+                cached = cache.get(audio_hash, model_name, cache_options)
+            
+            # Hand the job to the warm transcription server if enabled
+            client = None
+            if not cached and self.use_server_var.get():
+                update_progress(40, "Connecting to the transcription server...")
+                client = get_server_client()
+                if client is None:
+                    update_progress(40, "Transcription server unavailable - transcribing in this process")
+            
+            if cached:
+                update_progress(85, "Found cached transcript - skipped Whisper")
+                result = cached['result']
+                translation_result = cached['translation']
+            elif client:
+                server_result = client.transcribe(
+                    audio_file, model_name, transcribe_options,
+                    refine_model_name=self.refine_model_var.get(),
+                    translate=self.translate_var.get(),
+                    allow_downgrade=self.downgrade_on_memory_var.get(),
+                    cancel_token=cancel_token,
+                    window_callback=on_window,
+                    on_status=lambda message: update_progress(45, message)
+                )
+                result = server_result['transcription']
+                translation_result = server_result['translation']
+            else:
+                # The checked formats are written as each window is decoded, unless
+                # refinement will still replace some of the segments
+                refine_model_name = self.refine_model_var.get()
+                formats = self.selected_output_formats() if formats_file else []
+                if formats and refine_model_name in ("None", "", model_name):
+                    try:
+                        writers = open_writers(formats_file, formats, {
+                            "source": source or audio_file,
+                            "language": language,
+                            "model": model_name
+                        })
+                    except OSError as e:
+                        update_progress(50, f"Error saving transcript formats: {str(e)}")
+                
+                try:
+                    result, translation_result = self.transcribe_in_process(
+                        audio_file, model_name, language, transcribe_options, cancel_token, on_window,
+                        update_progress, resident_models, writers.add if writers else None
+                    )
+                except BaseException:
+                    if writers:
+                        writers.discard()
+                    raise
+            
+            if cache and not cached:
+                cache.put(
+                    audio_hash, result.get('model', model_name), used_options(cache_options, result),
+                    result, translation_result, source=audio_file
+                )
+            
             elapsed = time.time() - start_time
             
-            self.update_progress(90, f"Transcription completed in {elapsed:.2f} seconds")
+            update_progress(90, f"Transcription completed in {elapsed:.2f} seconds")
+            
+            if writers:
+                try:
+                    writers.finish(result['segments'])
+                    update_progress(90, f"Saved {', '.join(os.path.basename(path) for path in writers.paths)}")
+                except OSError as e:
+                    update_progress(90, f"Error saving transcript formats: {str(e)}")
+            elif formats_file:
+                self.save_output_formats(
+                    formats_file, result, self.selected_output_formats(), source or audio_file, update_progress
+                )
             
             # Format output based on word timestamps option
             if word_timestamps and 'words' in result:
@@ -634,25 +925,38 @@ The Groq API will:
                     segment_text = segment['text'].strip()
                     timestamped_text.append(f"[{segment_time}] {segment_text}")
                 
-                return {
+                transcription = {
                     'text': result['text'],
                     'detailed': '\n'.join(timestamped_text),
                     'duration': result.get('duration', None)
                 }
             else:
                 # Simple output without timestamps
-                return {
+                transcription = {
                     'text': result['text'],
                     'detailed': result['text'],
                     'duration': result.get('duration', None)
                 }
+            
+            # Attach the English translation produced in the same pass
+            if translation_result:
+                transcription['translation'] = translation_result['text']
+                transcription['translation_detailed'] = '\n'.join(
+                    f"[{self.format_timestamp(segment['start'])}] {segment['text'].strip()}"
+                    for segment in translation_result['segments']
+                ) if word_timestamps else translation_result['text']
+            
+            return transcription
                 
+        except TranscriptionCancelled:
+            update_progress(0, "Transcription canceled")
+            return None
         except Exception as e:
-            self.update_progress(0, f"Error during transcription: {str(e)}")
+            update_progress(0, f"Error during transcription: {str(e)}")
             messagebox.showerror("Error", f"An error occurred during transcription: {str(e)}")
             return None
     
-    def add_to_notion(self, video_path, transcription_text, duration=None, groq_result=None):
+    def add_to_notion(self, video_path, transcription_text, duration=None, groq_result=None, translation_text=None):
         """Add the transcription to Notion"""
         if not self.notion_enabled.get():
             return True, "Notion integration disabled."
@@ -660,7 +964,7 @@ The Groq API will:
         self.update_progress(95, "Adding transcription to Notion...")
         
         success, message = self.notion_api.add_transcription_to_notion(
-            video_path, transcription_text, duration, groq_result
+            video_path, transcription_text, duration, groq_result, translation_text
         )
         
         if success:
@@ -671,25 +975,44 @@ The Groq API will:
         
         return success, message
     
-    # Update the transcribe_video_thread method in video_transcriber_gui.py
-
     def transcribe_video_thread(self):
+        """Wait for this file's turn in the job queue (ahead of any batch), then transcribe it"""
         video_file = self.video_path.get()
         output_file = self.output_path.get()
+        cancel_token = self.cancel_token
+        
+        manager_job = get_job_manager().submit(os.path.basename(video_file), "file", PRIORITY_INTERACTIVE)
+        state = FAILED
+        try:
+            manager_job.acquire(cancel_token, on_wait=lambda message: self.update_progress(0, message))
+            self.transcribe_video(video_file, output_file)
+            state = CANCELLED if cancel_token.is_cancelled else DONE
+        except TranscriptionCancelled:
+            state = CANCELLED
+            self.is_transcribing = False
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
+        finally:
+            manager_job.finish(state)
+    
+    def transcribe_video(self, video_file, output_file):
         model_name = self.model_var.get()
         language = self.language_var.get() if self.language_var.get() != "None" else None
         keep_audio = self.keep_audio_var.get()
         word_timestamps = self.word_timestamps_var.get()
+        cancel_token = self.cancel_token
         
         # Create audio file name
         audio_file = os.path.splitext(video_file)[0] + ".wav"
         
         # Extract audio from video
-        if self.extract_audio_with_ffmpeg(video_file, audio_file):
+        if self.extract_audio_with_ffmpeg(video_file, audio_file, cancel_token):
             # Transcribe the audio
-            transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
+            transcription = self.transcribe_with_whisper(
+                audio_file, model_name, language, word_timestamps, cancel_token,
+                formats_file=output_file, source=video_file
+            )
             
-            if transcription:
+            if transcription and not cancel_token.is_cancelled:
                 # Process with Groq if enabled
                 groq_result = None
                 if self.groq_enabled.get():
@@ -700,7 +1023,7 @@ The Groq API will:
                     
                     # Process with Groq - pass the video file path for error tracking
                     success, result = self.groq_api.summarize_transcript(
-                        transcription['text'], system_prompt, video_file
+                        summary_input_text(transcription), system_prompt, video_file
                     )
                     
                     if success:
@@ -769,13 +1092,23 @@ The Groq API will:
                         self.update_progress(0, f"Error saving transcription: {str(e)}")
                         self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to save transcription: {str(e)}"))
                 
+                # Write the English translation next to the transcript
+                try:
+                    translation_file = write_translation(output_file, transcription)
+                    if translation_file:
+                        self.update_progress(95, f"Translation saved to {os.path.basename(translation_file)}")
+                except Exception as e:
+                    self.update_progress(90, f"Error saving translation: {str(e)}")
+                
                 # Add to Notion if enabled
                 if self.notion_enabled.get():
                     # Pass the groq_result to the add_to_notion method
                     if groq_result:
-                        self.add_to_notion(video_file, transcription['detailed'], transcription.get('duration', None), groq_result)
+                        self.add_to_notion(video_file, transcription['detailed'], transcription.get('duration', None), groq_result,
+                                           transcription.get('translation_detailed'))
                     else:
-                        self.add_to_notion(video_file, transcription['detailed'], transcription.get('duration', None))
+                        self.add_to_notion(video_file, transcription['detailed'], transcription.get('duration', None),
+                                           translation_text=transcription.get('translation_detailed'))
                 else:
                     self.update_progress(100, f"Transcription saved to {os.path.basename(output_file)}")
             
@@ -848,16 +1181,116 @@ The Groq API will:
         
         # Start transcription in a separate thread
         self.is_transcribing = True
+        self.cancel_token = CancellationToken()
         self.transcription_thread = threading.Thread(target=self.transcribe_video_thread)
         self.transcription_thread.daemon = True
         self.transcription_thread.start()
     
+    def clear_transcript_cache(self):
+        """Delete every cached transcript"""
+        entries, size = get_transcript_cache().stats()
+        if not entries:
+            messagebox.showinfo("Transcript Cache", "The transcript cache is already empty.")
+            return
+        
+        if messagebox.askyesno("Transcript Cache", f"Delete {entries} cached transcripts ({size / (1024 * 1024):.1f} MB)?"):
+            removed = get_transcript_cache().clear()
+            self.status_var.set(f"Cleared {removed} cached transcripts")
+    
+    def start_live_transcription(self):
+        """Transcribe a recording that is still being written (e.g. by OBS) as it grows"""
+        if not self.video_path.get():
+            messagebox.showerror("Error", "Please select the recording file to follow.")
+            return
+        
+        if not self.output_path.get():
+            messagebox.showerror("Error", "Please specify an output file.")
+            return
+        
+        if self.is_transcribing:
+            messagebox.showinfo("Info", "Transcription is already in progress.")
+            return
+        
+        # Reset UI
+        self.progress_var.set(0)
+        self.status_var.set("Starting live transcription...")
+        self.update_output_text("")
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        self.is_transcribing = True
+        self.cancel_token = CancellationToken()
+        self.transcription_thread = threading.Thread(target=self.live_transcription_thread)
+        self.transcription_thread.daemon = True
+        self.transcription_thread.start()
+    
+    def live_transcription_thread(self):
+        source = self.video_path.get()
+        output_file = self.output_path.get()
+        model_name = self.model_var.get()
+        language = self.language_var.get() if self.language_var.get() != "None" else None
+        cancel_token = self.cancel_token
+        
+        # A live recording counts as interactive - batches pause until it ends
+        manager_job = get_job_manager().submit(os.path.basename(source), "live", PRIORITY_INTERACTIVE)
+        state = FAILED
+        reservation = None
+        
+        try:
+            manager_job.acquire(cancel_token, on_wait=lambda message: self.update_progress(0, message))
+            
+            # Reserve the model and the longest decoding window in the memory budget
+            reservation = get_governor().acquire(
+                os.path.basename(source), model_name, MAX_WINDOW_SECONDS,
+                allow_downgrade=self.downgrade_on_memory_var.get(),
+                cancel_token=cancel_token,
+                on_wait=lambda message: self.update_progress(3, message)
+            )
+            model_name = reservation.model_name
+            
+            self.update_progress(5, f"Loading Whisper {model_name} model...")
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = whisper.load_model(model_name, device=device)
+            
+            # Start a fresh transcript - segments are appended as they are finalized
+            open(output_file, "w", encoding="utf-8").close()
+            
+            def on_segment(segment):
+                line = f"[{self.format_timestamp(segment['start'])}] {segment['text']}\n"
+                self.root.after(0, lambda: self.append_output_text(line))
+            
+            transcriber = LiveTranscriber(
+                model, source, output_file, language,
+                cancel_token=cancel_token,
+                on_segment=on_segment,
+                on_status=lambda message: self.root.after(0, lambda: self.status_var.set(message)),
+                output_formats=self.selected_output_formats()
+            )
+            segments = transcriber.run()
+            
+            state = DONE
+            self.update_progress(100, f"Live transcription finished - {len(segments)} segments saved to {os.path.basename(output_file)}")
+        except TranscriptionCancelled:
+            state = CANCELLED
+            self.update_progress(0, "Live transcription stopped")
+        except Exception as e:
+            # `e` is unbound by the time the callback runs
+            message = str(e)
+            self.update_progress(0, f"Error during live transcription: {message}")
+            self.root.after(0, lambda message=message: messagebox.showerror("Error", f"Live transcription failed: {message}"))
+        finally:
+            if reservation:
+                reservation.release()
+            manager_job.finish(state)
+            self.is_transcribing = False
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
+    
     def cancel_transcription(self):
         if self.is_transcribing:
-            # We can't actually stop the thread, but we can mark it as canceled
-            # and clean up when it's done
+            # Kill the running ffmpeg process and stop Whisper at its next decoding step
+            if self.cancel_token:
+                self.cancel_token.cancel()
             self.is_transcribing = False
             self.status_var.set("Transcription canceled")
             self.progress_var.set(0)
-            messagebox.showinfo("Info", "Transcription has been canceled. Please wait for current operations to complete.")
+            messagebox.showinfo("Info", "Transcription has been canceled.")
             self.cancel_button.config(state=tk.DISABLED)
\ No newline at end of file
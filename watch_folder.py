@@ -0,0 +1,360 @@
+import os
+import sys
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+from headless_batch import HeadlessProcessor, is_video_file, video_files_in, transcript_path
+from incremental_manifest import IncrementalManifest
+from transcript_writers import parse_formats, default_formats
+
+# A file must keep the same size and mtime this long before it is processed
+DEFAULT_SETTLE_SECONDS = 3.0
+# Folder scan interval when inotify isn't available
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify event bits (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+def _load_libc():
+    """libc with inotify, or None on systems without it"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+class InotifyWatcher:
+    """
+    Reports files created, finished or moved into a folder tree (Linux inotify).
+    
+    New subfolders are watched as soon as they appear. wait() returns
+    (path, state) pairs: "open" when a file was created and is still being
+    written, "closed" when its writer closed it or it was moved in, and None
+    when a file was found by rescanning a folder.
+    """
+    def __init__(self, directory):
+        self.libc = _load_libc()
+        if self.libc is None:
+            raise OSError("inotify is not available on this system")
+        
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        self.directory = directory
+        self.watches = {}
+        try:
+            self._watch_tree(directory)
+        except OSError:
+            os.close(self.fd)
+            raise
+    
+    def _watch_tree(self, directory):
+        """Watch a folder and its subfolders; returns the video files already in them"""
+        found = []
+        for root, dirs, files in os.walk(directory):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, f"Could not watch {root}: {os.strerror(errno)}")
+            self.watches[wd] = root
+            found.extend(os.path.join(root, file) for file in files if is_video_file(file))
+        return found
+    
+    def wait(self, timeout):
+        """Block up to `timeout` seconds for events and return the (path, state) pairs"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        
+        changes = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+            
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped - fall back to a full rescan
+                changes.extend((path, None) for path in video_files_in(self.directory))
+                continue
+            
+            if wd not in self.watches or not name:
+                continue
+            path = os.path.join(self.watches[wd], name)
+            
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changes.extend((found, None) for found in self._watch_tree(path))
+                    except OSError:
+                        pass
+            elif is_video_file(name):
+                changes.append((path, "open" if mask & IN_CREATE else "closed"))
+        
+        return changes
+    
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Same interface as InotifyWatcher, by comparing folder scans (any platform)"""
+    def __init__(self, directory, interval=DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.last_scan = time.time()
+        self.snapshot = self._scan()
+    
+    def _scan(self):
+        snapshot = {}
+        for path in video_files_in(self.directory):
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime)
+            except OSError:
+                pass
+        return snapshot
+    
+    def wait(self, timeout):
+        time.sleep(max(0.0, min(timeout, self.last_scan + self.interval - time.time())))
+        if time.time() - self.last_scan < self.interval:
+            return []
+        
+        snapshot = self._scan()
+        self.last_scan = time.time()
+        changes = [(path, None) for path, signature in snapshot.items() if self.snapshot.get(path) != signature]
+        self.snapshot = snapshot
+        return changes
+    
+    def close(self):
+        pass
+
+class FolderWatcher:
+    """
+    Headless watch mode: transcribe every video that lands in a folder.
+    
+    Files are detected with inotify (or by polling the folder where inotify
+    isn't available) and handed to the batch pipeline once their writer has
+    closed them and their size has stayed the same for `settle_seconds`, so
+    half-copied files are never processed. Whisper is loaded once and stays
+    resident. Videos already in the folder are processed at start-up unless
+    the incremental manifest in the output folder shows they were done with
+    the same settings.
+    """
+    def __init__(self, watch_dir, output_dir, model_name="base", language=None, word_timestamps=False,
+                 groq_enabled=False, notion_enabled=False, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True, log=print, output_formats=None):
+        """
+        Parameters:
+            watch_dir (str): Folder to watch (including subfolders)
+            output_dir (str): Folder the transcripts are written to
+            model_name (str): Whisper model kept loaded while watching
+            language (str, optional): Language code; detected per file if None
+            word_timestamps (bool): Write segment timestamps into the transcripts
+            groq_enabled (bool): Add a Groq title and summary (uses the saved Groq settings)
+            notion_enabled (bool): Add each transcript to Notion (uses the saved Notion settings)
+            settle_seconds (float): Seconds a file must stay unchanged before it is processed
+            poll_interval (float): Folder scan interval when polling
+            use_inotify (bool): False to always poll (e.g. network shares inotify can't see)
+            log (function): Writes one log line
+            output_formats (list, optional): Extra formats written next to each transcript ("srt", "vtt",
+                "tsv", "json")
+        """
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.log = log
+        
+        self.processor = HeadlessProcessor(
+            model_name, language, word_timestamps, groq_enabled, notion_enabled,
+            log=log, on_result=self._finished, output_formats=output_formats
+        )
+        self.manifest = IncrementalManifest(self.output_dir, self.processor.options())
+        
+        self.stop_event = threading.Event()
+        self.candidates = {}
+        self.writing = set()
+        self.active = set()
+        self.active_lock = threading.Lock()
+    
+    @property
+    def processed_count(self):
+        return self.processor.counts["done"] + self.processor.counts["no_speech"]
+    
+    def stop(self, cancel_current=False):
+        """Stop watching; files in progress finish unless cancel_current is True"""
+        self.stop_event.set()
+        if cancel_current:
+            self.processor.cancel()
+    
+    def _track(self, path, state):
+        with self.active_lock:
+            if path in self.active:
+                return
+        if state == "open":
+            self.writing.add(path)
+        elif state == "closed":
+            self.writing.discard(path)
+        self.candidates.setdefault(path, None)
+    
+    def _settled(self, now):
+        """Candidates whose writers are done and whose size and mtime have stopped changing"""
+        ready = []
+        for path in sorted(self.candidates):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted or renamed before it settled
+                del self.candidates[path]
+                self.writing.discard(path)
+                continue
+            
+            signature = (stat.st_size, stat.st_mtime)
+            previous = self.candidates[path]
+            if previous is None or previous[0] != signature:
+                self.candidates[path] = (signature, now)
+            elif stat.st_size > 0 and path not in self.writing and now - previous[1] >= self.settle_seconds:
+                del self.candidates[path]
+                ready.append(path)
+        return ready
+    
+    def _jobs(self, watcher):
+        """Yield a job for each settled video until stopped (consumed by the pipeline's feeder)"""
+        for path in video_files_in(self.watch_dir):
+            self._track(path, None)
+        
+        while not self.stop_event.is_set():
+            # Check pending files often so a finished file is picked up quickly
+            timeout = 0.25 if self.candidates else 1.0
+            for path, state in watcher.wait(timeout):
+                self._track(path, state)
+            
+            for video_file in self._settled(time.time()):
+                if self.stop_event.is_set():
+                    return
+                if self.manifest.is_unchanged(video_file):
+                    continue
+                
+                with self.active_lock:
+                    self.active.add(video_file)
+                yield {
+                    'key': video_file,
+                    'video_file': video_file,
+                    'output_file': transcript_path(video_file, self.output_dir)
+                }
+    
+    def _finished(self, result):
+        # A file changed again while it was being processed is picked up on its next event
+        with self.active_lock:
+            self.active.discard(result['key'])
+    
+    def run(self):
+        """Watch until stop() is called; returns the number of videos transcribed"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        watcher = None
+        if self.use_inotify:
+            try:
+                watcher = InotifyWatcher(self.watch_dir)
+                self.log(f"Watching {self.watch_dir} with inotify")
+            except OSError as e:
+                self.log(f"inotify unavailable ({str(e)}) - polling every {self.poll_interval:g} seconds instead")
+        if watcher is None:
+            watcher = PollingWatcher(self.watch_dir, self.poll_interval)
+            if not self.use_inotify:
+                self.log(f"Watching {self.watch_dir} by polling every {self.poll_interval:g} seconds")
+        
+        try:
+            # The model stays loaded for the whole session
+            self.processor.load_model()
+            self.log(f"Ready. Transcripts are written to {self.output_dir}")
+            self.processor.run(self._jobs(watcher), self.manifest, should_stop=self.stop_event.is_set)
+        finally:
+            watcher.close()
+            self.processor.close()
+        
+        return self.processed_count
+
+def main(argv=None):
+    """Command-line entry point: transcribe new videos in a folder until interrupted"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Watch a folder and transcribe new videos as they arrive")
+    parser.add_argument("folder", help="Folder to watch (including subfolders)")
+    parser.add_argument("-o", "--output", help="Transcript folder (default: <folder>/transcripts)")
+    parser.add_argument("-m", "--model", default="base", help="Whisper model (default: base)")
+    parser.add_argument("-l", "--language", default=None, help="Language code (default: detect)")
+    parser.add_argument("--timestamps", action="store_true", help="Include segment timestamps")
+    parser.add_argument("--groq", action="store_true", help="Add a Groq title and summary (saved Groq settings)")
+    parser.add_argument("--notion", action="store_true", help="Add transcripts to Notion (saved Notion settings)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is processed")
+    parser.add_argument("--poll", action="store_true", help="Poll the folder instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between folder scans")
+    parser.add_argument("--formats", default=None, help="Also write these formats next to each transcript, e.g. srt,vtt,json")
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.folder):
+        parser.error(f"folder not found: {args.folder}")
+    try:
+        output_formats = parse_formats(args.formats) if args.formats is not None else default_formats()
+    except ValueError as e:
+        parser.error(str(e))
+    
+    def log(message):
+        print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+    
+    try:
+        folder_watcher = FolderWatcher(
+            args.folder, args.output or os.path.join(args.folder, "transcripts"), args.model, args.language,
+            args.timestamps, args.groq, args.notion, args.settle, args.poll_interval, not args.poll, log,
+            output_formats
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    
+    thread = threading.Thread(target=folder_watcher.run, daemon=True)
+    thread.start()
+    
+    # First Ctrl+C finishes the files in progress, a second one aborts them
+    interrupted = False
+    while thread.is_alive():
+        try:
+            thread.join(0.5)
+        except KeyboardInterrupt:
+            if interrupted:
+                log("Aborting the files in progress...")
+                folder_watcher.stop(cancel_current=True)
+            else:
+                interrupted = True
+                log("Stopping - finishing the files in progress (Ctrl+C again to abort)...")
+                folder_watcher.stop()
+    
+    log(f"Stopped. Transcribed {folder_watcher.processed_count} videos.")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 import os
 import sys
 import tempfile
-import whisper
+import threading
 import torch
-import time
 import gradio as gr
-import subprocess
 from datetime import datetime
 
 from notion_integration import NotionIntegration
 from groq_integration import GroqIntegration
-from instagram_integration import InstaloaderIntegration
+from instagram_downloader import InstaloaderIntegration
+from resource_governor import downgrade_by_default
+from transcription_server import server_enabled_by_default
+from batch_scheduler import probe_durations, format_duration
+from batch_planner import plan_batch, describe_plan, EtaTracker
+from pipeline_engine import get_engine, STAGE_STATUS
+from disk_budget import DiskBudget
+from transcript_writers import default_formats
 
 class WebTranscriberUI:
     def __init__(self):
@@ -20,9 +25,16 @@ class WebTranscriberUI:
         self.groq_api = GroqIntegration()
         self.instaloader_api = InstaloaderIntegration()
         
-        # State variables
-        self.whisper_model = None
-        self.current_model_name = None
+        # State variables (transcription runs on the shared pipeline engine; get_engine
+        # replaces it when the settings change, so every engine used here is kept for cancel)
+        self.engines = []
+        self.engines_lock = threading.Lock()
+        self.downgrade_on_memory = downgrade_by_default()
+        self.use_server = server_enabled_by_default()
+        self.output_formats = default_formats()
+        
+        # Transcripts and downloads stay here until the server stops, so they can be downloaded
+        self.output_dir = tempfile.mkdtemp(prefix="videotranscriber-web-")
         
         # Create the Gradio interface
         self.create_ui()
@@ -74,6 +86,11 @@ class WebTranscriberUI:
                         value="en",
                         label="Language"
                     )
+                    refine_dropdown = gr.Dropdown(
+                        choices=["None", "small", "medium", "large"],
+                        value="None",
+                        label="Refine Low-Confidence Parts With"
+                    )
                 
                 with gr.Row():
                     timestamps_checkbox = gr.Checkbox(value=True, label="Include word-level timestamps")
@@ -83,7 +100,9 @@ class WebTranscriberUI:
                     notion_checkbox = gr.Checkbox(value=False, label="Send to Notion after transcription")
                     groq_checkbox = gr.Checkbox(value=False, label="Process with Groq AI after transcription")
                 
-                transcribe_button = gr.Button("Start Transcription", variant="primary")
+                with gr.Row():
+                    transcribe_button = gr.Button("Start Transcription", variant="primary")
+                    cancel_button = gr.Button("Cancel")
                 
                 progress = gr.Slider(
                     minimum=0,
@@ -114,11 +133,18 @@ class WebTranscriberUI:
                 timestamps_checkbox, 
                 keep_audio_checkbox,
                 notion_checkbox,
-                groq_checkbox
+                groq_checkbox,
+                refine_dropdown
             ],
             outputs=[progress, status, transcript_output, transcript_file]
         )
         
+        cancel_button.click(
+            fn=self.cancel_processing,
+            inputs=[],
+            outputs=[status]
+        )
+        
         download_button.click(
             fn=lambda x: x,
             inputs=[transcript_file],
@@ -146,6 +172,11 @@ class WebTranscriberUI:
                         value="en",
                         label="Language"
                     )
+                    batch_refine_dropdown = gr.Dropdown(
+                        choices=["None", "small", "medium", "large"],
+                        value="None",
+                        label="Refine Low-Confidence Parts With"
+                    )
                 
                 with gr.Row():
                     batch_timestamps_checkbox = gr.Checkbox(value=True, label="Include word-level timestamps")
@@ -155,7 +186,9 @@ class WebTranscriberUI:
                     batch_notion_checkbox = gr.Checkbox(value=False, label="Send to Notion after transcription")
                     batch_groq_checkbox = gr.Checkbox(value=False, label="Process with Groq AI after transcription")
                 
-                batch_transcribe_button = gr.Button("Start Batch Transcription", variant="primary")
+                with gr.Row():
+                    batch_transcribe_button = gr.Button("Start Batch Transcription", variant="primary")
+                    batch_cancel_button = gr.Button("Cancel")
                 
                 batch_progress = gr.Slider(
                     minimum=0,
@@ -191,11 +224,18 @@ class WebTranscriberUI:
                 batch_timestamps_checkbox, 
                 batch_keep_audio_checkbox,
                 batch_notion_checkbox,
-                batch_groq_checkbox
+                batch_groq_checkbox,
+                batch_refine_dropdown
             ],
             outputs=[batch_progress, batch_status, batch_log, batch_files_output]
         )
         
+        batch_cancel_button.click(
+            fn=self.cancel_processing,
+            inputs=[],
+            outputs=[batch_status]
+        )
+        
         batch_download.click(
             fn=lambda x: x,
             inputs=[batch_files_output],
@@ -395,437 +435,234 @@ class WebTranscriberUI:
             outputs=[groq_system_prompt]
         )
     
-    def extract_audio_with_ffmpeg(self, video_file, audio_file):
-        """Extract audio from video file using FFmpeg"""
-        try:
-            subprocess.run([
-                "ffmpeg", "-i", video_file, "-q:a", "0", "-map", "a", audio_file, "-y"
-            ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"Error extracting audio: {str(e)}")
-            return False
-        except FileNotFoundError:
-            print("Error: FFmpeg not found. Please install FFmpeg.")
-            return False
+    def get_pipeline_engine(self, model_name="base", language=None, word_timestamps=False, notion_enabled=False,
+                            groq_enabled=False, refine_model_name=None):
+        """Shared pipeline engine for these settings (raises ValueError if Groq or Notion isn't configured)"""
+        engine = get_engine(
+            model_name, language, word_timestamps, groq_enabled, notion_enabled,
+            refine_model_name=refine_model_name,
+            use_server=self.use_server,
+            allow_downgrade=self.downgrade_on_memory,
+            groq_api=self.groq_api,
+            notion_api=self.notion_api,
+            output_formats=self.output_formats
+        )
+        with self.engines_lock:
+            # An engine replaced by get_engine keeps running its queued jobs until it is done
+            self.engines = [other for other in self.engines if other.running and other is not engine]
+            self.engines.append(engine)
+        return engine
     
-    def format_timestamp(self, seconds):
-        """Convert seconds to HH:MM:SS.MS format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+    def cancel_processing(self):
+        """Cancel the running transcription jobs on every engine used here (kills ffmpeg and stops Whisper)"""
+        with self.engines_lock:
+            engines = [engine for engine in self.engines if engine.running]
+            self.engines = []
+        for engine in engines:
+            engine.cancel()
+        return "Canceling..." if engines else "Nothing to cancel"
     
-    def transcribe_with_whisper(self, audio_file, model_name, language, word_timestamps):
-        """Transcribe audio file using Whisper"""
+    def process_video_file(self, video_file, model_name, language, word_timestamps, keep_audio, notion_enabled, groq_enabled, refine_model_name=None):
+        """Process a single video file (yields progress, status, preview and file as it goes)"""
+        if video_file is None:
+            yield 0, "Error: No video file selected", "", None
+            return
+        
         try:
-            # Check if we need to load a new model or reuse an existing one
-            if self.whisper_model is None or model_name != self.current_model_name:
-                # Check for GPU
-                device = "cuda" if torch.cuda.is_available() else "cpu"
-                
-                # Load the model
-                self.whisper_model = whisper.load_model(model_name, device=device)
-                self.current_model_name = model_name
-            
-            # Set up transcription options
-            transcribe_options = {
-                "task": "transcribe",
-                "verbose": False,
-                "word_timestamps": word_timestamps,
-            }
-            
-            if language:
-                transcribe_options["language"] = language
-            
-            # Run transcription
-            start_time = time.time()
-            result = self.whisper_model.transcribe(audio_file, **transcribe_options)
-            elapsed = time.time() - start_time
-            
-            # Format output based on word timestamps option
-            if word_timestamps and 'words' in result:
-                # Create detailed output with word-level timestamps
-                detailed_text = result['text']
-                
-                # Create a timestamped transcript
-                timestamped_text = []
-                
-                for segment in result['segments']:
-                    segment_time = self.format_timestamp(segment['start'])
-                    segment_text = segment['text'].strip()
-                    timestamped_text.append(f"[{segment_time}] {segment_text}")
-                
-                return {
-                    'text': result['text'],
-                    'detailed': '\n'.join(timestamped_text),
-                    'duration': result.get('duration', None),
-                    'elapsed': elapsed
-                }
-            else:
-                # Simple output without timestamps
-                return {
-                    'text': result['text'],
-                    'detailed': result['text'],
-                    'duration': result.get('duration', None),
-                    'elapsed': elapsed
-                }
-                
+            engine = self.get_pipeline_engine(model_name, language, word_timestamps, notion_enabled, groq_enabled, refine_model_name)
+        except ValueError as e:
+            yield 0, f"Error: {str(e)}", "", None
+            return
+        
+        # Extracted audio lives in the engine's temporary folder (keep_audio never applied in web mode)
+        video_basename = os.path.basename(video_file.name)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(self.output_dir, f"{os.path.splitext(video_basename)[0]}_{timestamp}_transcript.txt")
+        job = engine.submit(video_file.name, output_file=output_file)
+        
+        for event in job.events():
+            if event["type"] == "stage":
+                progress, status = STAGE_STATUS[event["stage"]]
+                yield progress, status, "", None
+        
+        try:
+            result = job.result()
         except Exception as e:
-            print(f"Error during transcription: {str(e)}")
-            raise e
-    
-    def process_with_groq(self, transcript_text, system_prompt=None):
-        """Process transcript with Groq AI"""
-        if not system_prompt:
-            system_prompt = """You are an expert at summarizing video transcripts. Given a transcript text:
-1. Create a clear, concise title that accurately represents the core content
-2. Summarize the key points in plain language without jargon
-3. Be straightforward and avoid clickbait language
-4. Don't leave out important details from the transcript
-5. Format your response as JSON with "title" and "summary" fields"""
+            yield 0, f"Error during transcription: {str(e)}", "", None
+            return
         
-        # Process with Groq
-        success, result = self.groq_api.summarize_transcript(transcript_text, system_prompt)
+        if result['status'] == "cancelled":
+            yield 0, "Transcription canceled", "", None
+            return
+        if result['status'] == "failed":
+            yield 0, f"Error during transcription: {result['error']}", "", None
+            return
         
-        return success, result
+        with open(result['output_file'], "r", encoding="utf-8") as file:
+            preview_text = file.read()
+        
+        # Truncate preview if too long
+        if len(preview_text) > 10000:
+            preview_text = preview_text[:10000] + "...\n\n[Content truncated in preview. Full text in downloaded file.]"
+        
+        yield 100, "Transcription completed", preview_text, result['output_file']
     
-    def process_video_file(self, video_file, model_name, language, word_timestamps, keep_audio, notion_enabled, groq_enabled):
-        """Process a single video file"""
-        if video_file is None:
-            return 0, "Error: No video file selected", "", None
+    def follow_jobs(self, jobs, names, progress_updates, output_files, eta=None):
+        """
+        Collect the log lines and results of engine jobs in order
         
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            progress_updates = []
+        Yields (progress, status) after every log line and finished job; the
+        transcripts (and videos that were kept) are appended to output_files.
+        """
+        total = len(jobs)
+        for position, (job, name) in enumerate(zip(jobs, names)):
+            progress_percent = position / total * 100
+            status = f"Processing: {name}"
+            if eta:
+                status += f" - about {format_duration(eta.remaining_seconds())} left"
+            progress_updates.append(f"\nProcessing ({position+1}/{total}): {name}")
+            yield progress_percent, status
             
-            # Get video file path
-            video_file_path = video_file.name
-            video_basename = os.path.basename(video_file_path)
+            for event in job.events():
+                if event["type"] == "log":
+                    progress_updates.append(event["message"])
+                    yield progress_percent, status
             
-            # Create audio file path
-            audio_file = os.path.join(temp_dir, os.path.splitext(video_basename)[0] + ".wav")
-            
-            # Create output file path
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = os.path.join(temp_dir, f"{os.path.splitext(video_basename)[0]}_{timestamp}_transcript.txt")
-            
-            # Extract audio
-            progress_updates.append(f"Extracting audio from {video_basename}...")
-            if not self.extract_audio_with_ffmpeg(video_file_path, audio_file):
-                return 0, "Error extracting audio from video", "", None
+            try:
+                result = job.result()
+            except Exception as e:
+                progress_updates.append(f"✗ Error processing {name}: {str(e)}")
+                continue
             
-            progress_updates.append(f"Audio extracted successfully")
+            if result['status'] == "cancelled":
+                progress_updates.append("\nBatch processing canceled")
+                return
             
-            # Transcribe audio
-            progress_updates.append(f"Loading Whisper {model_name} model...")
-            progress_updates.append(f"Transcribing audio...")
+            if 'url' in job.job and result['video_file'] != job.job['url'] and os.path.exists(result['video_file']):
+                output_files.append(result['video_file'])
+            if result['output_file']:
+                output_files.append(result['output_file'])
             
-            try:
-                transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
-                
-                progress_updates.append(f"Transcription completed in {transcription['elapsed']:.2f} seconds")
-                
-                # Process with Groq if enabled
-                groq_result = None
-                if groq_enabled:
-                    progress_updates.append("Processing transcription with Groq AI...")
-                    # Get system prompt from settings
-                    system_prompt = None  # We'd load this from saved settings
-                    
-                    # Process with Groq
-                    success, result = self.process_with_groq(transcription['text'], system_prompt)
-                    
-                    if success:
-                        groq_result = result
-                        progress_updates.append("Groq AI processing complete")
-                        
-                        # Write enhanced transcription to file
-                        with open(output_file, "w", encoding="utf-8") as file:
-                            file.write(f"Title: {groq_result['title']}\n\n")
-                            file.write(f"Summary: {groq_result['summary']}\n\n")
-                            file.write("--- Original Transcript ---\n\n")
-                            file.write(transcription['detailed'])
-                        
-                        progress_updates.append(f"Enhanced transcription saved to file")
-                        
-                        # Preview text
-                        preview_text = f"Title: {groq_result['title']}\n\n"
-                        preview_text += f"Summary: {groq_result['summary']}\n\n"
-                        preview_text += "--- Original Transcript ---\n\n"
-                        preview_text += transcription['detailed']
-                    else:
-                        progress_updates.append(f"Groq AI processing issue - using original transcription")
-                        
-                        # Write original transcription to file
-                        with open(output_file, "w", encoding="utf-8") as file:
-                            file.write(transcription['detailed'])
-                        
-                        progress_updates.append(f"Original transcription saved to file")
-                        
-                        # Preview text
-                        preview_text = transcription['detailed']
-                else:
-                    # Write original transcription to file
-                    with open(output_file, "w", encoding="utf-8") as file:
-                        file.write(transcription['detailed'])
-                    
-                    progress_updates.append(f"Transcription saved to file")
-                    
-                    # Preview text
-                    preview_text = transcription['detailed']
-                
-                # Add to Notion if enabled
-                if notion_enabled:
-                    progress_updates.append("Adding transcription to Notion...")
-                    
-                    success, message = self.notion_api.add_transcription_to_notion(
-                        video_file_path, 
-                        transcription['detailed'], 
-                        transcription.get('duration', None), 
-                        groq_result
-                    )
-                    
-                    if success:
-                        progress_updates.append("Transcription added to Notion successfully")
-                    else:
-                        progress_updates.append(f"Error adding to Notion: {message}")
-                
-                # Clean up audio file if not keeping
-                if not keep_audio and os.path.exists(audio_file):
-                    try:
-                        os.remove(audio_file)
-                    except Exception as e:
-                        progress_updates.append(f"Warning: Could not remove temporary audio file: {str(e)}")
-                
-                # Truncate preview if too long
-                if len(preview_text) > 10000:
-                    preview_text = preview_text[:10000] + "...\n\n[Content truncated in preview. Full text in downloaded file.]"
-                
-                # Return results
-                status_text = "Transcription completed"
-                log_text = "\n".join(progress_updates)
-                
-                return 100, status_text, preview_text, output_file
-                
-            except Exception as e:
-                return 0, f"Error during transcription: {str(e)}", "\n".join(progress_updates), None
+            if eta:
+                eta.file_done(job.job['video_file'])
+                status = eta.status(position + 1, total)
+            yield (position + 1) / total * 100, status
     
-    def process_batch_files(self, batch_files, model_name, language, word_timestamps, keep_audio, notion_enabled, groq_enabled):
-        """Process multiple video files in batch"""
+    def process_batch_files(self, batch_files, model_name, language, word_timestamps, keep_audio, notion_enabled, groq_enabled, refine_model_name=None):
+        """Process multiple video files in batch (yields progress, status, log and files as it goes)"""
         if not batch_files:
-            return 0, "Error: No video files selected", "No files to process", []
+            yield 0, "Error: No video files selected", "No files to process", []
+            return
         
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            progress_updates = []
-            output_files = []
-            
-            total_files = len(batch_files)
-            processed_count = 0
-            
-            # Process each video file
-            for video_file in batch_files:
-                video_file_path = video_file.name
-                video_basename = os.path.basename(video_file_path)
-                
-                progress_updates.append(f"\nProcessing ({processed_count+1}/{total_files}): {video_basename}")
-                
-                # Create audio file path
-                audio_file = os.path.join(temp_dir, os.path.splitext(video_basename)[0] + ".wav")
-                
-                # Create output file path
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = os.path.join(temp_dir, f"{os.path.splitext(video_basename)[0]}_{timestamp}_transcript.txt")
-                
-                # Extract audio
-                progress_updates.append(f"Extracting audio from {video_basename}...")
-                if not self.extract_audio_with_ffmpeg(video_file_path, audio_file):
-                    progress_updates.append(f"✗ Error extracting audio from {video_basename}")
-                    continue
-                
-                # Transcribe audio
-                try:
-                    progress_updates.append(f"Transcribing audio...")
-                    transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
-                    
-                    progress_updates.append(f"✓ Transcription completed in {transcription['elapsed']:.2f} seconds")
-                    
-                    # Process with Groq if enabled
-                    groq_result = None
-                    if groq_enabled:
-                        progress_updates.append(f"Processing with Groq AI: {video_basename}")
-                        
-                        # Get system prompt from settings
-                        system_prompt = None  # We'd load this from saved settings
-                        
-                        # Process with Groq
-                        success, result = self.process_with_groq(transcription['text'], system_prompt)
-                        
-                        if success:
-                            groq_result = result
-                            progress_updates.append(f"✓ Groq processing successful: {video_basename}")
-                            
-                            # Write enhanced transcription to file
-                            with open(output_file, "w", encoding="utf-8") as file:
-                                file.write(f"Title: {groq_result['title']}\n\n")
-                                file.write(f"Summary: {groq_result['summary']}\n\n")
-                                file.write("--- Original Transcript ---\n\n")
-                                file.write(transcription['detailed'])
-                            
-                            progress_updates.append(f"✓ Saved enhanced transcription: {os.path.basename(output_file)}")
-                        else:
-                            progress_updates.append(f"✗ Groq processing issue: {result}")
-                            
-                            # Write original transcription to file
-                            with open(output_file, "w", encoding="utf-8") as file:
-                                file.write(transcription['detailed'])
-                            
-                            progress_updates.append(f"✓ Saved original transcription: {os.path.basename(output_file)}")
-                    else:
-                        # Write original transcription to file
-                        with open(output_file, "w", encoding="utf-8") as file:
-                            file.write(transcription['detailed'])
-                        
-                        progress_updates.append(f"✓ Saved transcription: {os.path.basename(output_file)}")
-                    
-                    # Add to Notion if enabled
-                    if notion_enabled:
-                        if groq_result:
-                            success, message = self.notion_api.add_transcription_to_notion(
-                                video_file_path, 
-                                transcription['detailed'], 
-                                transcription.get('duration', None), 
-                                groq_result
-                            )
-                        else:
-                            success, message = self.notion_api.add_transcription_to_notion(
-                                video_file_path, 
-                                transcription['detailed'], 
-                                transcription.get('duration', None)
-                            )
-                            
-                        if success:
-                            progress_updates.append(f"✓ Added to Notion: {video_basename}")
-                        else:
-                            progress_updates.append(f"✗ Notion error: {message}")
-                    
-                    # Clean up audio file if not keeping
-                    if not keep_audio and os.path.exists(audio_file):
-                        try:
-                            os.remove(audio_file)
-                        except Exception as e:
-                            progress_updates.append(f"Warning: Could not remove temporary audio file: {str(e)}")
-                    
-                    # Add output file to results
-                    output_files.append(output_file)
-                    
-                except Exception as e:
-                    progress_updates.append(f"✗ Error transcribing {video_basename}: {str(e)}")
-                
-                # Update progress
-                processed_count += 1
-                progress_percent = (processed_count / total_files) * 100
-                
-            # Complete batch processing
-            completion_message = f"Batch processing completed. Processed {processed_count} of {total_files} files."
-            log_text = "\n".join(progress_updates)
-            
-            return progress_percent, completion_message, log_text, output_files
+        try:
+            engine = self.get_pipeline_engine(model_name, language, word_timestamps, notion_enabled, groq_enabled, refine_model_name)
+        except ValueError as e:
+            yield 0, f"Error: {str(e)}", "", []
+            return
+        
+        progress_updates = []
+        output_files = []
+        total_files = len(batch_files)
+        
+        # Estimate the run from the probed durations and this machine's measured Whisper speed
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        durations = probe_durations([video_file.name for video_file in batch_files])
+        plan = plan_batch(list(durations), durations, model_name, device, groq_enabled, notion_enabled)
+        progress_updates.append(describe_plan(plan))
+        eta = EtaTracker(durations, plan["rtf"])
+        yield 0, f"Starting batch - expected time about {format_duration(plan['wall_seconds'])}", \
+            "\n".join(progress_updates), []
+        
+        # All files go to the engine at once, so Whisper moves on while Groq and Notion calls run
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        jobs = []
+        names = []
+        for video_file in batch_files:
+            video_basename = os.path.basename(video_file.name)
+            output_file = os.path.join(self.output_dir, f"{os.path.splitext(video_basename)[0]}_{timestamp}_transcript.txt")
+            jobs.append(engine.submit(video_file.name, output_file=output_file))
+            names.append(video_basename)
+        
+        progress_percent = 0
+        status = ""
+        for progress_percent, status in self.follow_jobs(jobs, names, progress_updates, output_files, eta):
+            yield progress_percent, status, "\n".join(progress_updates), output_files
+        
+        # Complete batch processing
+        processed_count = int(round(progress_percent / 100 * total_files))
+        completion_message = f"Batch processing completed. Processed {processed_count} of {total_files} files."
+        yield progress_percent, completion_message, "\n".join(progress_updates), output_files
+    
+    def ensure_instaloader(self, progress_updates):
+        """Install Instaloader if needed; returns an error message if that failed"""
+        if self.instaloader_api.ensure_instaloader_installed():
+            return None
+        
+        progress_updates.append("Instaloader not installed. Attempting to install...")
+        success, message = self.instaloader_api.install_instaloader()
+        if not success:
+            return message
+        
+        progress_updates.append("✓ Instaloader installed successfully")
+        return None
     
     def process_instagram_url(self, url, auto_delete, transcribe_after):
         """Process a single Instagram URL"""
         if not url or not url.strip():
-            return 0, "Error: No Instagram URL provided", "Please enter an Instagram URL", []
+            yield 0, "Error: No Instagram URL provided", "Please enter an Instagram URL", []
+            return
         
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            progress_updates = []
-            output_files = []
-            
-            # Ensure Instaloader is installed
-            if not self.instaloader_api.ensure_instaloader_installed():
-                # Try to install Instaloader
-                progress_updates.append("Instaloader not installed. Attempting to install...")
-                success, message = self.instaloader_api.install_instaloader()
-                
-                if not success:
-                    return 0, "Error: Failed to install Instaloader", message, []
-                
-                progress_updates.append("✓ Instaloader installed successfully")
-            
-            # Download Instagram post
-            progress_updates.append(f"Starting download of: {url}")
-            
+        progress_updates = []
+        output_files = []
+        
+        error = self.ensure_instaloader(progress_updates)
+        if error:
+            yield 0, "Error: Failed to install Instaloader", error, []
+            return
+        
+        download_dir = os.path.join(self.output_dir, "instagram")
+        progress_updates.append(f"Starting download of: {url}")
+        
+        if not transcribe_after:
             try:
                 success, result, description = self.instaloader_api.download_instagram_post(
                     url, 
-                    temp_dir,
+                    download_dir,
                     None  # No callback in web mode
                 )
-                
-                if success:
-                    video_path = result
-                    progress_updates.append(f"✓ Downloaded: {os.path.basename(video_path)}")
-                    output_files.append(video_path)
-                    
-                    # Store the original URL and description for Notion integration
-                    self.notion_api.store_video_metadata(video_path, url, description)
-                    
-                    if transcribe_after:
-                        # Transcribe the video
-                        progress_updates.append(f"Starting transcription of downloaded video...")
-                        
-                        # Extract audio
-                        audio_file = os.path.join(temp_dir, os.path.splitext(os.path.basename(video_path))[0] + ".wav")
-                        if self.extract_audio_with_ffmpeg(video_path, audio_file):
-                            # Set up transcription parameters
-                            model_name = "base"  # Default model
-                            language = "en"  # Default language
-                            word_timestamps = True
-                            
-                            # Transcribe audio
-                            try:
-                                transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
-                                
-                                # Create output file path
-                                output_file = os.path.splitext(video_path)[0] + "_transcript.txt"
-                                
-                                # Write transcription to file
-                                with open(output_file, "w", encoding="utf-8") as file:
-                                    file.write(transcription['detailed'])
-                                
-                                progress_updates.append(f"✓ Transcribed: {os.path.basename(output_file)}")
-                                output_files.append(output_file)
-                                
-                            except Exception as e:
-                                progress_updates.append(f"✗ Error transcribing video: {str(e)}")
-                        else:
-                            progress_updates.append("✗ Failed to extract audio for transcription")
-                    
-                    # Auto-delete the video if requested and transcription is complete
-                    if auto_delete and transcribe_after and len(output_files) > 1:
-                        try:
-                            os.remove(video_path)
-                            progress_updates.append(f"✓ Deleted video after transcription: {os.path.basename(video_path)}")
-                            # Remove the video from output files
-                            output_files.remove(video_path)
-                        except Exception as e:
-                            progress_updates.append(f"✗ Error deleting video: {str(e)}")
-                else:
-                    error_message = result
-                    progress_updates.append(f"✗ Download failed: {error_message}")
-                    return 0, f"Download failed: {error_message}", "\n".join(progress_updates), []
-                
-                return 100, "Download complete", "\n".join(progress_updates), output_files
-                
             except Exception as e:
-                return 0, f"Error: {str(e)}", f"An unexpected error occurred:\n{str(e)}", []
+                yield 0, f"Error: {str(e)}", f"An unexpected error occurred:\n{str(e)}", []
+                return
+            
+            if not success:
+                progress_updates.append(f"✗ Download failed: {result}")
+                yield 0, f"Download failed: {result}", "\n".join(progress_updates), []
+                return
+            
+            progress_updates.append(f"✓ Downloaded: {os.path.basename(result)}")
+            
+            # Store the original URL and description for Notion integration
+            self.notion_api.store_video_metadata(result, url, description)
+            yield 100, "Download complete", "\n".join(progress_updates), [result]
+            return
+        
+        # Download and transcribe with the default settings of the Instagram tab
+        engine = self.get_pipeline_engine("base", "en", True)
+        job = engine.submit(url=url, download_dir=download_dir, delete_video=auto_delete)
+        for progress_percent, status in self.follow_jobs([job], [url], progress_updates, output_files):
+            yield progress_percent, status, "\n".join(progress_updates), output_files
+        
+        if not output_files:
+            yield 0, "Download or transcription failed", "\n".join(progress_updates), []
+            return
+        
+        yield 100, "Download complete", "\n".join(progress_updates), output_files
     
     def process_instagram_batch(self, url_file, auto_delete):
         """Process a batch of Instagram URLs from a file"""
         if url_file is None:
-            return 0, "Error: No URL file selected", "Please upload a text file with Instagram URLs (one per line)", []
+            yield 0, "Error: No URL file selected", "Please upload a text file with Instagram URLs (one per line)", []
+            return
         
         # Read URLs from file
         try:
@@ -839,105 +676,35 @@ class WebTranscriberUI:
                     instagram_urls.append(url)
             
             if not instagram_urls:
-                return 0, "Error: No valid Instagram URLs found", "No valid Instagram URLs found in the file. URLs should contain 'instagram.com/p/', 'instagram.com/reel/', or 'instagram.com/tv/'.", []
+                yield 0, "Error: No valid Instagram URLs found", "No valid Instagram URLs found in the file. URLs should contain 'instagram.com/p/', 'instagram.com/reel/', or 'instagram.com/tv/'.", []
+                return
             
         except Exception as e:
-            return 0, f"Error reading URL file: {str(e)}", f"Failed to read URLs from file: {str(e)}", []
+            yield 0, f"Error reading URL file: {str(e)}", f"Failed to read URLs from file: {str(e)}", []
+            return
         
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            progress_updates = []
-            output_files = []
-            
-            # Ensure Instaloader is installed
-            if not self.instaloader_api.ensure_instaloader_installed():
-                # Try to install Instaloader
-                progress_updates.append("Instaloader not installed. Attempting to install...")
-                success, message = self.instaloader_api.install_instaloader()
-                
-                if not success:
-                    return 0, "Error: Failed to install Instaloader", message, []
-                
-                progress_updates.append("✓ Instaloader installed successfully")
-            
-            total_urls = len(instagram_urls)
-            processed_count = 0
-            
-            # Process each URL
-            for url in instagram_urls:
-                progress_updates.append(f"\nProcessing ({processed_count+1}/{total_urls}): {url}")
-                
-                try:
-                    success, result, description = self.instaloader_api.download_instagram_post(
-                        url, 
-                        temp_dir,
-                        None  # No callback in web mode
-                    )
-                    
-                    if success:
-                        video_path = result
-                        progress_updates.append(f"✓ Downloaded: {os.path.basename(video_path)}")
-                        output_files.append(video_path)
-                        
-                        # Store the original URL and description for Notion integration
-                        self.notion_api.store_video_metadata(video_path, url, description)
-                        
-                        # Transcribe the video
-                        progress_updates.append(f"Starting transcription of downloaded video...")
-                        
-                        # Extract audio
-                        audio_file = os.path.join(temp_dir, os.path.splitext(os.path.basename(video_path))[0] + ".wav")
-                        if self.extract_audio_with_ffmpeg(video_path, audio_file):
-                            # Set up transcription parameters
-                            model_name = "base"  # Default model
-                            language = "en"  # Default language
-                            word_timestamps = True
-                            
-                            # Transcribe audio
-                            try:
-                                transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
-                                
-                                # Create output file path
-                                output_file = os.path.splitext(video_path)[0] + "_transcript.txt"
-                                
-                                # Write transcription to file
-                                with open(output_file, "w", encoding="utf-8") as file:
-                                    file.write(transcription['detailed'])
-                                
-                                progress_updates.append(f"✓ Transcribed: {os.path.basename(output_file)}")
-                                output_files.append(output_file)
-                                
-                                # Auto-delete the video if requested and transcription is complete
-                                if auto_delete:
-                                    try:
-                                        os.remove(video_path)
-                                        progress_updates.append(f"✓ Deleted video after transcription: {os.path.basename(video_path)}")
-                                        # Remove the video from output files if it was successfully deleted
-                                        if video_path in output_files:
-                                            output_files.remove(video_path)
-                                    except Exception as e:
-                                        progress_updates.append(f"✗ Error deleting video: {str(e)}")
-                                
-                            except Exception as e:
-                                progress_updates.append(f"✗ Error transcribing video: {str(e)}")
-                        else:
-                            progress_updates.append("✗ Failed to extract audio for transcription")
-                    else:
-                        error_message = result
-                        progress_updates.append(f"✗ Download failed: {error_message}")
-                
-                except Exception as e:
-                    progress_updates.append(f"✗ Error processing {url}: {str(e)}")
-                
-                # Update progress
-                processed_count += 1
-                progress_percent = (processed_count / total_urls) * 100
-            
-            # Complete batch processing
-            completion_message = f"Batch processing completed. Processed {processed_count} of {total_urls} URLs."
-            log_text = "\n".join(progress_updates)
-            
-            return progress_percent, completion_message, log_text, output_files
+        progress_updates = []
+        output_files = []
+        
+        error = self.ensure_instaloader(progress_updates)
+        if error:
+            yield 0, "Error: Failed to install Instaloader", error, []
+            return
+        
+        # Download and transcribe with the default settings of the Instagram tab
+        download_dir = os.path.join(self.output_dir, "instagram")
+        engine = self.get_pipeline_engine("base", "en", True)
+        jobs = [engine.submit(url=url, download_dir=download_dir, delete_video=auto_delete) for url in instagram_urls]
+        
+        total_urls = len(instagram_urls)
+        progress_percent = 0
+        for progress_percent, status in self.follow_jobs(jobs, instagram_urls, progress_updates, output_files):
+            yield progress_percent, status, "\n".join(progress_updates), output_files
+        
+        # Complete batch processing
+        processed_count = int(round(progress_percent / 100 * total_urls))
+        completion_message = f"Batch processing completed. Processed {processed_count} of {total_urls} URLs."
+        yield progress_percent, completion_message, "\n".join(progress_updates), output_files
     
     def test_notion_connection(self, token, database_id):
         """Test the connection to Notion API"""
@@ -1336,6 +1103,16 @@ class WebTranscriberUI:
             downloaded_files = []
             counter = 0
             
+            # Videos are transcribed while the next ones download (with the default
+            # settings of the Instagram tab); the disk budget pauses the downloads
+            # when transcription falls behind
+            engine = None
+            budget = None
+            jobs = []
+            if auto_transcribe and download_videos:
+                engine = self.get_pipeline_engine("base", "en", True)
+                budget = DiskBudget(output_dir)
+            
             try:
                 saved_posts = L.get_saved_posts()
                 total_posts = post_count if post_count else 999999  # Arbitrarily large number if downloading all
@@ -1356,16 +1133,27 @@ class WebTranscriberUI:
                             log_messages.append(f"Skipping post {post.shortcode} (is a video)")
                             continue
                         
-                        log_messages.append(f"Downloading post {post.shortcode} from {post.owner_username}...")
+                        # Determine filename based on instaloader pattern
+                        date_str = post.date_utc.strftime("%Y-%m-%d_%H-%M-%S")
+                        video_filename = f"{output_dir}/{post.owner_username}/{date_str}_UTC_{post.shortcode}.mp4"
                         
-                        # Download the post
-                        L.download_post(post, target=f"{post.owner_username}_{post.shortcode}")
+                        # Don't download a video again if an earlier run already did
+                        known = self.notion_api.metadata_store.find_by_shortcode(post.shortcode) if post.is_video else None
+                        if known and os.path.isfile(known["path"]) and known["path"] == os.path.abspath(video_filename):
+                            log_messages.append(f"Already downloaded: {post.shortcode}")
+                        else:
+                            # Wait until transcription has caught up enough for another video
+                            if budget and post.is_video:
+                                if budget.wait_for_room(on_wait=log_messages.append):
+                                    log_messages.append("Downloads resumed")
+                            
+                            log_messages.append(f"Downloading post {post.shortcode} from {post.owner_username}...")
+                            
+                            # Download the post
+                            L.download_post(post, target=f"{post.owner_username}_{post.shortcode}")
                         
                         # Track files
                         if post.is_video and download_videos:
-                            # Determine filename based on instaloader pattern
-                            date_str = post.date_utc.strftime("%Y-%m-%d_%H-%M-%S")
-                            video_filename = f"{output_dir}/{post.owner_username}/{date_str}_UTC_{post.shortcode}.mp4"
                             if os.path.exists(video_filename):
                                 downloaded_videos.append(video_filename)
                                 downloaded_files.append(video_filename)
@@ -1374,50 +1162,40 @@ class WebTranscriberUI:
                                 # Store metadata for Notion
                                 description = post.caption if post.caption else ""
                                 self.notion_api.store_video_metadata(video_filename, f"https://www.instagram.com/p/{post.shortcode}/", description)
+                                
+                                # Hand the video to transcription right away
+                                if engine:
+                                    budget.add(video_filename)
+                                    job = engine.submit(video_filename, delete_video=auto_delete)
+                                    job.future.add_done_callback(lambda _, video_path=video_filename: budget.release(video_path))
+                                    jobs.append(job)
                         
                         counter += 1
                     except Exception as e:
                         log_messages.append(f"Error downloading post {post.shortcode}: {str(e)}")
                         continue
                 
-                # Process videos if needed
-                if auto_transcribe and downloaded_videos:
-                    for i, video_path in enumerate(downloaded_videos):
+                # Collect the transcription results
+                if jobs:
+                    for i, (job, video_path) in enumerate(zip(jobs, downloaded_videos)):
                         log_messages.append(f"\nTranscribing video {i+1}/{len(downloaded_videos)}: {os.path.basename(video_path)}")
+                        try:
+                            result = job.result()
+                        except Exception as e:
+                            log_messages.append(f"✗ Error transcribing video: {str(e)}")
+                            continue
                         
-                        # Extract audio
-                        audio_file = os.path.splitext(video_path)[0] + ".wav"
-                        if self.extract_audio_with_ffmpeg(video_path, audio_file):
-                            # Transcribe with default settings
-                            model_name = "base"
-                            language = "en"
-                            word_timestamps = True
+                        if result['status'] in ("done", "no_speech"):
+                            downloaded_files.append(result['output_file'])
+                            log_messages.append(f"✓ Transcribed: {os.path.basename(result['output_file'])}")
                             
-                            try:
-                                transcription = self.transcribe_with_whisper(audio_file, model_name, language, word_timestamps)
-                                output_file = os.path.splitext(video_path)[0] + "_transcript.txt"
-                                
-                                # Write transcription to file
-                                with open(output_file, "w", encoding="utf-8") as file:
-                                    file.write(transcription['detailed'])
-                                
-                                downloaded_files.append(output_file)
-                                log_messages.append(f"✓ Transcribed: {os.path.basename(output_file)}")
-                                
-                                # Delete video if auto-delete is enabled
-                                if auto_delete:
-                                    try:
-                                        os.remove(video_path)
-                                        log_messages.append(f"✓ Deleted video after transcription: {os.path.basename(video_path)}")
-                                        # Remove from downloaded files
-                                        if video_path in downloaded_files:
-                                            downloaded_files.remove(video_path)
-                                    except Exception as e:
-                                        log_messages.append(f"✗ Error deleting video: {str(e)}")
-                            except Exception as e:
-                                log_messages.append(f"✗ Error transcribing video: {str(e)}")
+                            # The engine deleted the video if auto-delete is enabled
+                            if auto_delete and not os.path.exists(video_path):
+                                log_messages.append(f"✓ Deleted video after transcription: {os.path.basename(video_path)}")
+                                if video_path in downloaded_files:
+                                    downloaded_files.remove(video_path)
                         else:
-                            log_messages.append(f"✗ Error extracting audio from video")
+                            log_messages.append(f"✗ Error transcribing video: {result['error'] or result['status']}")
                 
                 # Complete download process
                 if counter == 0:
@@ -1469,7 +1247,8 @@ class WebTranscriberUI:
         # Load settings first
         self.load_settings()
         
-        # Launch the Gradio interface
+        # Launch the Gradio interface (the queue lets the batch tab stream its progress)
+        self.interface.queue()
         self.interface.launch(share=True)
 
 def create_web_ui():